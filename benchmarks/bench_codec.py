@@ -0,0 +1,103 @@
+"""
+Encode and decode a burst of spot messages inline, on a thread pool and on a
+process pool, and report throughput alongside the longest the event loop was
+held up while the burst went through.
+
+    python -m benchmarks.bench_codec --messages 5000 --workers 4
+
+The stall is what other tasks, such as the scraper, would see: a ticker task
+sleeps for a millisecond at a time and records its longest gap between wakes.
+"""
+
+import argparse
+import time
+
+import anyio
+from meshage.config import MQTTConfig
+from meshage.messages import MeshtasticTextMessage
+from meshage.parser import MeshtasticMessageParser
+
+# Absolute, since process pool workers import this file as a plain script
+from benchmarks.bench_spot import make_records
+from src.CodecService import CodecService
+from src.Spot import Spot
+from src.SpotCoalescer import SpotCoalescer
+
+
+class Ticker:
+    """Measures how late the event loop runs a task that is ready."""
+
+    def __init__(self):
+        self.worst = 0.0
+
+    async def run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await anyio.sleep(0.001)
+            self.worst = max(self.worst, time.perf_counter() - started - 0.001)
+
+
+async def burst(codec: CodecService, calls: list, concurrency: int) -> float:
+    """Run every call through the codec, concurrency at a time."""
+    pending = iter(calls)
+
+    async def worker():
+        for func, *args in pending:
+            await func(*args)
+
+    started = time.perf_counter()
+    async with anyio.create_task_group() as tg:
+        for _ in range(concurrency):
+            tg.start_soon(worker)
+    return time.perf_counter() - started
+
+
+async def benchmark(args, mode: str, texts: list[str]) -> None:
+    config = MQTTConfig()
+    other = MQTTConfig()
+    other.config["userid"] = 0x1234ABCD
+    parser = MeshtasticMessageParser(config)
+    codec = CodecService(mode, args.workers)
+    concurrency = 1 if mode == "inline" else codec.workers * 2
+
+    # Start the pool before timing, so worker start-up is not counted
+    await codec.run(len, texts)
+    payloads = [bytes(MeshtasticTextMessage(text, other)) for text in texts]
+
+    for name, calls in (
+        ("encode", [(codec.encode, MeshtasticTextMessage(t, config)) for t in texts]),
+        ("decode", [(codec.decode, parser, payload) for payload in payloads]),
+    ):
+        ticker = Ticker()
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(ticker.run)
+            elapsed = await burst(codec, calls, concurrency)
+            tg.cancel_scope.cancel()
+        print(
+            f"  {mode:<8} {name}  {len(calls) / elapsed:9.0f} messages/s  "
+            f"worst stall {ticker.worst * 1000:7.1f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--message-spots", type=int, default=5)
+    args = parser.parse_args()
+
+    coalescer = SpotCoalescer(max_spots=args.message_spots)
+    spots = [Spot(record) for record in make_records(args.messages)]
+    texts = []
+    while spots and len(texts) < args.messages:
+        text, spots = coalescer.pack(spots)
+        texts.append(text)
+    texts = (texts * (args.messages // len(texts) + 1))[: args.messages]
+
+    print(f"{len(texts)} messages of up to {args.message_spots} spots")
+    for mode in CodecService.MODES:
+        anyio.run(benchmark, args, mode, texts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Run the whole application end to end against a local fake POTA API and an
+in-process MQTT broker, and report scrape-to-publish latency, throughput, CPU
+and memory. Linux only, since CPU and RSS are read from /proc.
+
+    python -m benchmarks.bench_pipeline --spots 2000 --churn 0.05 --duration 60
+
+The application runs in a child process exactly as main() builds it, so the
+stand-ins here do not count towards its CPU time or memory.
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+import anyio
+from anyio.abc import SocketStream
+from meshage.config import MQTTConfig
+from meshage.parser import MeshtasticMessageParser
+from meshtastic.protobuf import mqtt_pb2, portnums_pb2
+
+from .bench_spot import make_records
+from .mqtt_broker import MQTTBroker
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+class SpotAPI:
+    """Serves a spot feed that replaces a fraction of its spots every refresh."""
+
+    def __init__(self, spots: int, churn: float):
+        # Spotted just now, or the application drops them as past the TTL
+        spot_time = self.now()
+        self.records = [
+            dict(record, spotTime=spot_time) for record in make_records(spots)
+        ]
+        self.churn = churn
+        self.serial = 0
+        self.version = 0
+        self.body = b""
+        # When each activator was first served, for spots added after startup
+        self.first_served: dict[str, float] = {}
+        self.unserved: set[str] = set()
+        self.requests = 0
+        self.refresh()
+        self.unserved.clear()
+
+    def refresh(self) -> None:
+        if self.version:
+            spot_time = self.now()
+            step = max(int(1 / self.churn), 1)
+            for index in range(self.version % step, len(self.records), step):
+                self.serial += 1
+                callsign = f"N{self.serial:06d}"
+                self.records[index] = dict(
+                    self.records[index],
+                    activator=callsign,
+                    spotId=self.serial,
+                    spotTime=spot_time,
+                )
+                self.unserved.add(callsign)
+        self.version += 1
+        self.body = json.dumps(self.records).encode()
+
+    @staticmethod
+    def now() -> str:
+        # The POTA API reports naive UTC times
+        return datetime.now(timezone.utc).replace(tzinfo=None).isoformat("T", "seconds")
+
+    async def handle(self, client: SocketStream) -> None:
+        async with client:
+            request = b""
+            while b"\r\n\r\n" not in request:
+                request += await client.receive()
+            self.requests += 1
+            etag = f'"{self.version}"'
+            if f"if-none-match: {etag}".encode() in request.lower():
+                await client.send(
+                    f"HTTP/1.1 304 Not Modified\r\nETag: {etag}\r\n"
+                    "Connection: close\r\n\r\n".encode()
+                )
+                return
+            now = time.monotonic()
+            for callsign in self.unserved:
+                self.first_served[callsign] = now
+            self.unserved.clear()
+            head = (
+                f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nETag: {etag}\r\n"
+                f"Content-Length: {len(self.body)}\r\nConnection: close\r\n\r\n"
+            )
+            await client.send(head.encode() + self.body)
+
+
+class RecordingBroker(MQTTBroker):
+    """Decodes each published spot message and notes when it arrived."""
+
+    def __init__(self):
+        super().__init__()
+        self.parser = MeshtasticMessageParser(MQTTConfig())
+        self.arrivals: list[tuple[float, str]] = []
+        self.messages = 0
+
+    def deliver(self, topic: str, payload: bytes) -> None:
+        super().deliver(topic, payload)
+        self.published.clear()
+        # Decrypt directly: parse_message rejects envelopes over the LoRa
+        # payload size, which full coalesced messages plus headers exceed
+        envelope = mqtt_pb2.ServiceEnvelope()
+        envelope.ParseFromString(payload)
+        if not envelope.packet.HasField("encrypted"):
+            return
+        self.parser.decrypt_packet(envelope.packet)
+        if envelope.packet.decoded.portnum != portnums_pb2.TEXT_MESSAGE_APP:
+            return
+        text = envelope.packet.decoded.payload.decode()
+        now = time.monotonic()
+        self.messages += 1
+        lines = text.splitlines()
+        if " @ " in lines[0]:
+            lines = lines[:1]
+        self.arrivals.extend((now, line.split()[0]) for line in lines)
+
+
+def process_stats(pid: int) -> tuple[float, int]:
+    """CPU seconds used and peak RSS in bytes of a process."""
+    with open(f"/proc/{pid}/stat") as stat:
+        fields = stat.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    with open(f"/proc/{pid}/status") as status:
+        peak = next(line for line in status if line.startswith("VmHWM:"))
+    return cpu, int(peak.split()[1]) * 1024
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+async def benchmark(args) -> None:
+    api = SpotAPI(args.spots, args.churn)
+    broker = RecordingBroker()
+    await broker.start()
+    listener = await anyio.create_tcp_listener(local_host="127.0.0.1")
+    port = listener.extra(anyio.abc.SocketAttribute.local_port)
+
+    env = dict(
+        os.environ,
+        MQTT_HOST="127.0.0.1",
+        MQTT_PORT=str(broker.port),
+        LOG_LEVEL=args.log_level,
+    )
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.bench_pipeline",
+        "--app",
+        f"http://127.0.0.1:{port}/v1/spots",
+        "--fetch-period",
+        str(args.fetch_period),
+        "--publish-rate",
+        str(args.publish_rate),
+    ]
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(listener.serve, api.handle)
+        process = await anyio.open_process(command, env=env, stdout=None, stderr=None)
+        try:
+            # Let the initial load drain before measuring churn
+            await anyio.sleep(args.warmup)
+            broker.arrivals.clear()
+            broker.messages = 0
+            cpu_start, _ = process_stats(process.pid)
+            measure_start = time.monotonic()
+            deadline = measure_start + args.duration
+            while time.monotonic() < deadline:
+                await anyio.sleep(args.refresh)
+                api.refresh()
+            elapsed = time.monotonic() - measure_start
+            cpu_end, peak_rss = process_stats(process.pid)
+        finally:
+            process.terminate()
+            await process.wait()
+            tg.cancel_scope.cancel()
+    await broker.stop()
+
+    latencies = [
+        when - api.first_served[callsign]
+        for when, callsign in broker.arrivals
+        if callsign in api.first_served
+    ]
+    new_spots = len(api.first_served)
+
+    print(
+        f"{args.spots} spots, {args.churn:.0%} churn every {args.refresh:g}s, "
+        f"fetch period {args.fetch_period:g}s, {elapsed:.0f}s measured"
+    )
+    print(f"  API requests      {api.requests}")
+    print(
+        f"  published         {len(broker.arrivals)} spots in {broker.messages} "
+        f"messages, {len(broker.arrivals) / elapsed:.1f} spots/s"
+    )
+    print(f"  new spots served  {new_spots}")
+    if latencies:
+        print(
+            "  latency           "
+            f"p50 {percentile(latencies, 0.5):.2f}s  "
+            f"p90 {percentile(latencies, 0.9):.2f}s  "
+            f"p99 {percentile(latencies, 0.99):.2f}s  "
+            f"max {max(latencies):.2f}s  mean {statistics.mean(latencies):.2f}s"
+        )
+    print(
+        f"  CPU               {cpu_end - cpu_start:.2f}s "
+        f"({(cpu_end - cpu_start) / elapsed:.1%} of one core)"
+    )
+    print(f"  peak RSS          {peak_rss / 2**20:.1f} MiB")
+
+
+def run_app(args) -> None:
+    """The application as main() runs it, pointed at the stand-ins."""
+    from asphalt.core import run_application
+
+    from src.potatastic import create_container
+
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "WARNING"))
+    run_application(
+        create_container(
+            {
+                "scraper": {
+                    "spot_url": args.app,
+                    "fetch_period": args.fetch_period,
+                    "min_fetch_period": args.fetch_period,
+                    "max_fetch_period": args.fetch_period,
+                },
+                "mqtt": {
+                    "publish_rate": args.publish_rate,
+                    "publish_burst": 10,
+                    "queue_size": 1000,
+                    "coalesce_latency": 0.5,
+                },
+            }
+        ),
+        logging=None,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--spots", type=int, default=2000, help="spots in the feed")
+    parser.add_argument(
+        "--churn", type=float, default=0.02, help="fraction replaced per refresh"
+    )
+    parser.add_argument(
+        "--refresh", type=float, default=5.0, help="seconds between feed changes"
+    )
+    parser.add_argument("--fetch-period", type=float, default=2.0)
+    parser.add_argument(
+        "--publish-rate", type=float, default=600.0, help="messages per minute"
+    )
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument(
+        "--warmup", type=float, default=20.0, help="seconds to drain the initial load"
+    )
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--app", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.app:
+        run_app(args)
+    else:
+        anyio.run(benchmark, args)
+
+
+if __name__ == "__main__":
+    main()
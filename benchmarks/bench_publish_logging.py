@@ -0,0 +1,118 @@
+"""
+Push synthetic spots through the publish path (queue, coalescing, encryption
+and publish) with DEBUG logging suppressed and enabled, and compare the cost
+of the deferred log calls on that path with the eager f-strings they replaced.
+
+    python -m benchmarks.bench_publish_logging
+"""
+
+import argparse
+import io
+import logging
+import time
+import timeit
+
+import anyio
+from meshage.config import MQTTConfig
+
+from src.MeshtasticCommunicationComponent import MeshtasticCommunicationComponent
+from src.Spot import Spot
+
+from .bench_spot import make_records
+
+
+class NullConnection:
+    """Stands in for MQTTConnection and discards everything published."""
+
+    async def wait_connected(self) -> None:
+        pass
+
+    async def publish(self, topic: str, payload: bytes) -> None:
+        pass
+
+
+async def publish_path(spots: list[Spot], message_spots: int) -> int:
+    component = MeshtasticCommunicationComponent(
+        publish_rate=1e12,
+        publish_burst=len(spots),
+        queue_size=len(spots),
+        max_message_spots=message_spots,
+        coalesce_latency=0,
+    )
+    config = MQTTConfig()
+    for spot in spots:
+        logging.debug("New spot: %s", spot.key)
+        component.queue.put_nowait(spot)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(component.send_task, NullConnection(), config)
+        while component.spots_published.value < len(spots):
+            await anyio.sleep(0)
+        tg.cancel_scope.cancel()
+    return component.messages_published.value
+
+
+def eager_logging(spots: list[Spot], message_spots: int, queue) -> None:
+    """The hot-path log calls as they were, formatting even when suppressed."""
+    for spot in spots:
+        logging.debug(f"New spot: {spot.key}")
+    for start in range(0, len(spots), message_spots):
+        sent = spots[start : start + message_spots]
+        logging.debug(
+            f"Publishing {len(sent)} spots: {', '.join(s.key for s in sent)} "
+            f"(waited {queue.last_wait:.1f}s, {len(queue)} queued)"
+        )
+
+
+def deferred_logging(spots: list[Spot], message_spots: int, queue) -> None:
+    """The same log calls as they are now."""
+    for spot in spots:
+        logging.debug("New spot: %s", spot.key)
+    for start in range(0, len(spots), message_spots):
+        sent = spots[start : start + message_spots]
+        if logging.root.isEnabledFor(logging.DEBUG):
+            logging.debug(
+                "Publishing %d spots: %s (waited %.1fs, %d queued)",
+                len(sent),
+                ", ".join(spot.key for spot in sent),
+                queue.last_wait,
+                len(queue),
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--spots", type=int, default=100_000)
+    parser.add_argument("--message-spots", type=int, default=10)
+    args = parser.parse_args()
+
+    spots = [Spot(record) for record in make_records(args.spots)]
+    logging.basicConfig(stream=io.StringIO(), level=logging.INFO)
+    queue = MeshtasticCommunicationComponent().queue
+
+    print(f"{args.spots} spots, up to {args.message_spots} per message")
+    for level in (logging.INFO, logging.DEBUG):
+        logging.root.setLevel(level)
+        started = time.perf_counter()
+        messages = anyio.run(publish_path, spots, args.message_spots)
+        elapsed = time.perf_counter() - started
+        print(
+            f"  publish path, {logging.getLevelName(level):<5} "
+            f"{args.spots / elapsed:10.0f} spots/s ({messages} messages)"
+        )
+
+    logging.root.setLevel(logging.INFO)
+    print("  log calls alone with DEBUG suppressed:")
+    for name, func in (("eager", eager_logging), ("deferred", deferred_logging)):
+        best = min(
+            timeit.repeat(
+                lambda: func(spots, args.message_spots, queue), number=1, repeat=5
+            )
+        )
+        print(
+            f"    {name:<9} {best * 1000:8.1f} ms, {best * 1e9 / args.spots:6.0f} ns/spot"
+        )
+
+
+if __name__ == "__main__":
+    main()
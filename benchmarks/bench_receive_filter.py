@@ -0,0 +1,188 @@
+"""
+Replay a mix of mesh traffic through the receive path, decoding every message
+as before and with the pre-filter in front, and report the cost per message
+and what each filter stage dropped.
+
+    python -m benchmarks.bench_receive_filter --messages 20000
+
+The default mix is generated to resemble a busy public channel. A real one can
+be captured from the broker and replayed instead:
+
+    mosquitto_sub -h mqtt.meshtastic.org -u meshdev -P large4cats \\
+        -t 'msh/US/#' -F '%t %x' > capture.txt
+    python -m benchmarks.bench_receive_filter --capture capture.txt
+"""
+
+import argparse
+import io
+import logging
+import random
+import time
+from collections import Counter
+
+from meshage.config import MQTTConfig
+from meshage.messages import (
+    MeshtasticMessage,
+    MeshtasticNodeInfoMessage,
+    MeshtasticTextMessage,
+)
+from meshage.parser import MeshtasticMessageParser
+from meshtastic.protobuf import mesh_pb2, portnums_pb2, telemetry_pb2
+
+from src.ReceiveFilter import ReceiveFilter
+
+# Share of each kind of traffic in the generated mix
+MIX = {
+    "telemetry": 0.35,
+    "position": 0.25,
+    "nodeinfo": 0.15,
+    "text": 0.05,
+    "self": 0.05,
+    "other channel": 0.05,
+    "map report": 0.05,
+    "json": 0.05,
+}
+
+
+class PortMessage(MeshtasticMessage):
+    """An encrypted packet of any portnum, for traffic meshage cannot build."""
+
+    def __init__(self, portnum: int, payload: bytes, config: MQTTConfig):
+        self.type = portnum
+        super().__init__(payload, config)
+
+
+def telemetry() -> bytes:
+    message = telemetry_pb2.Telemetry()
+    message.time = int(time.time())
+    message.device_metrics.battery_level = random.randint(0, 100)
+    message.device_metrics.voltage = random.uniform(3.3, 4.2)
+    message.device_metrics.channel_utilization = random.uniform(0, 40)
+    message.device_metrics.air_util_tx = random.uniform(0, 5)
+    message.device_metrics.uptime_seconds = random.randint(0, 10**6)
+    return message.SerializeToString()
+
+
+def position() -> bytes:
+    message = mesh_pb2.Position()
+    message.latitude_i = random.randint(250000000, 490000000)
+    message.longitude_i = random.randint(-1240000000, -670000000)
+    message.altitude = random.randint(0, 2000)
+    message.time = int(time.time())
+    return message.SerializeToString()
+
+
+def make_traffic(count: int, config: MQTTConfig) -> list[tuple[str, bytes]]:
+    """Envelopes as a wildcard subscription on the region would see them."""
+    root = config.config["root_topic"]
+    other = MQTTConfig()
+    traffic = []
+    kinds = random.choices(list(MIX), weights=list(MIX.values()), k=count)
+    for kind in kinds:
+        node = random.getrandbits(32)
+        other.config["userid"] = node
+        other.config["channel"] = config.config["channel"]
+        if kind == "telemetry":
+            message = PortMessage(portnums_pb2.TELEMETRY_APP, telemetry(), other)
+        elif kind == "position":
+            message = PortMessage(portnums_pb2.POSITION_APP, position(), other)
+        elif kind == "nodeinfo":
+            message = MeshtasticNodeInfoMessage(other)
+        elif kind == "text":
+            message = MeshtasticTextMessage(random.choice(("subs", "help")), other)
+        elif kind == "self":
+            message = MeshtasticTextMessage("K-0001 W1ABC 14.230 CW", config)
+        elif kind == "other channel":
+            other.config["channel"] = "MediumFast"
+            message = MeshtasticTextMessage("hello", other)
+        elif kind == "map report":
+            traffic.append((f"{root}/2/map/", position()))
+            continue
+        else:
+            payload = b'{"from": %d, "type": "telemetry", "payload": {}}' % node
+            traffic.append((f"{root}/2/json/LongFast/!{node:08x}", payload))
+            continue
+        traffic.append((message.config.publish_topic, bytes(message)))
+    return traffic
+
+
+def read_capture(path: str) -> list[tuple[str, bytes]]:
+    """Lines of topic and hex payload, as mosquitto_sub -F '%t %x' writes."""
+    traffic = []
+    with open(path) as capture:
+        for line in capture:
+            topic, _, payload = line.strip().partition(" ")
+            if topic:
+                traffic.append((topic, bytes.fromhex(payload)))
+    return traffic
+
+
+def decode_all(traffic, parser: MeshtasticMessageParser) -> int:
+    texts = 0
+    for _, payload in traffic:
+        if isinstance(parser.parse_message(payload), MeshtasticTextMessage):
+            texts += 1
+    return texts
+
+
+def filter_then_decode(
+    traffic, receive_filter: ReceiveFilter, parser: MeshtasticMessageParser
+) -> tuple[int, Counter]:
+    texts = 0
+    dropped: Counter = Counter()
+    for topic, payload in traffic:
+        stage = receive_filter.check(topic, payload)
+        if stage:
+            dropped[stage] += 1
+            continue
+        if isinstance(parser.parse_message(payload), MeshtasticTextMessage):
+            texts += 1
+    return texts, dropped
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--capture", help="replay a mosquitto_sub capture instead")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    config = MQTTConfig()
+    if args.capture:
+        traffic = read_capture(args.capture)
+        print(f"{len(traffic)} messages from {args.capture}")
+    else:
+        traffic = make_traffic(args.messages, config)
+        print(f"{len(traffic)} generated messages")
+
+    # Unknown portnums are logged as warnings, which is part of their cost
+    logging.basicConfig(stream=io.StringIO(), level=logging.WARNING)
+    message_parser = MeshtasticMessageParser(config)
+    receive_filter = ReceiveFilter(config)
+
+    baseline, texts = timed(decode_all, traffic, message_parser)
+    filtered, (filtered_texts, dropped) = timed(
+        filter_then_decode, traffic, receive_filter, message_parser
+    )
+
+    for name, elapsed in (("decode all", baseline), ("pre-filter", filtered)):
+        print(
+            f"  {name:<12} {elapsed * 1000:8.1f} ms, "
+            f"{elapsed * 1e6 / len(traffic):6.1f} us/message"
+        )
+    print(f"  speedup      {baseline / filtered:8.1f}x")
+    # Without the filter, text on another channel sharing our key gets through
+    print(f"  text decoded {texts:6d} without the filter, {filtered_texts} with it")
+    for stage in ReceiveFilter.STAGES:
+        print(f"  dropped {stage:<10} {dropped[stage]:6d}")
+
+
+if __name__ == "__main__":
+    main()
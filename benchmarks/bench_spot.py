@@ -0,0 +1,105 @@
+"""
+Compare the slotted Spot against the original dict-backed class: construction
+time, key access time and memory for 10k spots.
+
+    python -m benchmarks.bench_spot
+"""
+
+import argparse
+import gc
+import json
+import timeit
+import tracemalloc
+from datetime import datetime
+from typing import Any
+
+from src.Spot import Spot
+
+
+class LegacySpot:
+    """The Spot class as it was before slots and a precomputed key."""
+
+    def __init__(self, spot: dict[str, Any]):
+        self.callsign = spot["activator"]
+        self.frequency = float(spot["frequency"])
+        self.grid = spot["grid4"]
+        self.mode = spot["mode"]
+        self.name = spot["name"]
+        self.reference = spot["reference"]
+        self.id = spot["spotId"]
+        self.spotter = spot["spotter"]
+        self.timestamp = datetime.fromisoformat(spot["spotTime"])
+
+    @property
+    def key(self) -> str:
+        return f"{self.callsign}-{self.frequency}-{self.mode}"
+
+
+def make_records(count: int) -> list[dict]:
+    # Round-trip through JSON so strings are fresh objects, as they would be
+    # when decoded from the API response
+    return json.loads(
+        json.dumps(
+            [
+                {
+                    "activator": f"K{serial % 800:04d}",
+                    "frequency": f"{14000 + serial % 350}",
+                    "grid4": "FN42",
+                    "mode": ("CW", "SSB", "FT8")[serial % 3],
+                    "name": "Benchmark Park",
+                    "reference": f"US-{serial % 1500:04d}",
+                    "spotId": serial,
+                    "spotter": "W1AW",
+                    "spotTime": "2024-01-15T14:30:00",
+                }
+                for serial in range(count)
+            ]
+        )
+    )
+
+
+def measure(cls, records: list[dict], repeat: int) -> tuple[float, float, int]:
+    construct = min(
+        timeit.repeat(lambda: [cls(r) for r in records], number=1, repeat=repeat)
+    )
+
+    spots = [cls(r) for r in records]
+    key_access = min(
+        timeit.repeat(
+            lambda: [spot.key for spot in spots for _ in range(3)],
+            number=1,
+            repeat=repeat,
+        )
+    )
+    del spots
+
+    gc.collect()
+    tracemalloc.start()
+    spots = [cls(r) for r in make_records(len(records))]
+    # Keys are kept by the store, so they count towards the footprint
+    keys = [spot.key for spot in spots]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del spots, keys
+    return construct, key_access, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    records = make_records(args.count)
+    print(f"{'class':<12} {'construct ms':>13} {'3x key ms':>10} {'bytes/spot':>11}")
+    for cls in (LegacySpot, Spot):
+        construct, key_access, memory = measure(cls, records, args.repeat)
+        print(
+            f"{cls.__name__:<12} {construct * 1000:>13.2f} "
+            f"{key_access * 1000:>10.2f} {memory / args.count:>11.0f}"
+        )
+    print("Spot builds its key during construction; LegacySpot on every access.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compare the per-spot scrape loop with SpotDiff on contest-sized payloads.
+
+    python -m benchmarks.bench_spot_diff
+"""
+
+import argparse
+import json
+import timeit
+from datetime import timedelta
+
+from src.DedupePolicy import DedupePolicy
+from src.Spot import Spot
+from src.SpotDiff import SpotDiff
+from src.SpotStore import SpotStore
+
+from .bench_spot import make_records
+
+
+def legacy_scrape(spots: dict, records: list[dict]) -> list[Spot]:
+    """The scrape loop as it was: build every Spot, diff, then re-insert."""
+    scrape = [Spot(record) for record in records]
+    added = []
+    for new_spot in scrape:
+        if new_spot.key not in spots:
+            spots[new_spot.key] = new_spot
+            added.append(new_spot)
+    for spot in scrape:
+        spots[spot.key] = spot
+    return added
+
+
+def churned(records: list[dict], churn: float, offset: int) -> list[dict]:
+    """Replace a fraction of the records with new activators."""
+    changed = json.loads(json.dumps(records))
+    for index in range(0, len(changed), max(int(1 / churn), 1)):
+        changed[index]["activator"] = f"N{offset + index:06d}"
+        changed[index]["spotId"] = offset + index
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--spots", type=int, default=5000)
+    parser.add_argument("--churn", type=float, default=0.02)
+    parser.add_argument("--scrapes", type=int, default=20)
+    args = parser.parse_args()
+
+    base = make_records(args.spots)
+    payloads = [
+        churned(base, args.churn, scrape * args.spots) for scrape in range(args.scrapes)
+    ]
+
+    def run_legacy():
+        spots = {}
+        return sum(len(legacy_scrape(spots, payload)) for payload in payloads)
+
+    def run_diff(policy=None):
+        # The records are dated 2024, so keep them clear of the TTL
+        spots = SpotStore(max_size=args.spots * 4, ttl=timedelta(days=36500))
+        previous = set()
+        added = 0
+        for payload in payloads:
+            diff = SpotDiff.compute(spots, payload, previous, policy)
+            previous = diff.seen
+            added += len(diff.added)
+        return added
+
+    assert run_legacy() == run_diff()
+    print(
+        f"{args.scrapes} scrapes of {args.spots} spots, "
+        f"{args.churn:.0%} churn per scrape"
+    )
+    # Bucketed keys with a near-duplicate check on every new record
+    tolerance = DedupePolicy(tolerance=1.0, include_reference=True)
+    for name, func in (
+        ("legacy", run_legacy),
+        ("SpotDiff", run_diff),
+        ("tolerance", lambda: run_diff(tolerance)),
+    ):
+        best = min(timeit.repeat(func, number=1, repeat=5))
+        print(f"  {name:<9} {best * 1000 / args.scrapes:8.2f} ms/scrape")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Simulate a week of spot scrapes and compare the memory held by a plain dict
+against SpotStore.
+
+    python -m benchmarks.bench_spot_store
+"""
+
+import argparse
+import gc
+import random
+import tracemalloc
+from datetime import datetime, timedelta
+
+from src.Spot import Spot
+from src.SpotStore import SpotStore
+
+MODES = ("CW", "SSB", "FT8", "FT4")
+FREQUENCIES = ("3.530", "7.030", "7.074", "14.060", "14.074", "14.285", "21.074")
+
+
+def make_record(serial: int, when: datetime) -> dict:
+    return {
+        "activator": f"K{serial % 100000:05d}",
+        "frequency": FREQUENCIES[serial % len(FREQUENCIES)],
+        "grid4": "FN42",
+        "mode": MODES[serial % len(MODES)],
+        "name": "Benchmark Park",
+        "reference": f"US-{serial % 9999:04d}",
+        "spotId": serial,
+        "spotter": "W1AW",
+        "spotTime": when.isoformat(),
+    }
+
+
+def simulate(store, days: int, interval: int, active: int, churn: float) -> list:
+    rng = random.Random(1)
+    now = datetime(2024, 1, 1)
+    serial = 0
+    current = {}
+    samples = []
+
+    for scrape in range(days * 24 * 3600 // interval):
+        # Retire a fraction of the active activators and bring in new ones
+        for key in rng.sample(sorted(current), int(len(current) * churn)):
+            del current[key]
+        while len(current) < active:
+            serial += 1
+            current[serial] = make_record(serial, now)
+
+        if isinstance(store, SpotStore):
+            store.expire(now)
+        for record in current.values():
+            spot = Spot(record)
+            if spot.key not in store:
+                store[spot.key] = spot
+
+        if scrape % (24 * 3600 // interval) == 0:
+            gc.collect()
+            samples.append((now, len(store), tracemalloc.get_traced_memory()[0]))
+        now += timedelta(seconds=interval)
+
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--interval", type=int, default=300, help="seconds")
+    parser.add_argument("--active", type=int, default=300, help="spots per scrape")
+    parser.add_argument("--churn", type=float, default=0.1)
+    args = parser.parse_args()
+
+    for name, store in (
+        ("dict", {}),
+        ("SpotStore", SpotStore(max_size=10000, ttl=timedelta(hours=1))),
+    ):
+        tracemalloc.start()
+        samples = simulate(store, args.days, args.interval, args.active, args.churn)
+        tracemalloc.stop()
+
+        print(f"{name}:")
+        print(f"  {'day':>3} {'spots':>8} {'traced KiB':>12}")
+        for day, (_, size, traced) in enumerate(samples):
+            print(f"  {day:>3} {size:>8} {traced // 1024:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compare indexed subscription matching with a linear scan of every rule, for
+increasing numbers of subscribers.
+
+    python -m benchmarks.bench_subscriptions
+"""
+
+import argparse
+import random
+import timeit
+
+from src.Spot import BANDS, Spot
+from src.Subscription import Subscription
+from src.Subscriptions import Subscriptions
+
+from .bench_spot import make_records
+
+
+def make_subscriptions(users: int, seed: int = 1) -> Subscriptions:
+    """A mix of the filters users are likely to set, a few per user."""
+    rng = random.Random(seed)
+    bands = [band for band, _, _ in BANDS]
+    subscriptions = Subscriptions()
+    for user_id in range(users):
+        for _ in range(rng.randint(1, 3)):
+            kind = rng.random()
+            if kind < 0.3:
+                subscription = Subscription(
+                    user_id, callsign=f"K{rng.randrange(10000):04d}"
+                )
+            elif kind < 0.5:
+                subscription = Subscription(
+                    user_id, prefix=f"US-{rng.randrange(100):02d}"
+                )
+            elif kind < 0.8:
+                subscription = Subscription(
+                    user_id,
+                    band=rng.choice(bands),
+                    mode=rng.choice(("CW", "SSB", "FT8", "FT4")),
+                )
+            elif kind < 0.95:
+                subscription = Subscription(user_id, mode=rng.choice(("CW", "SSB")))
+            else:
+                subscription = Subscription(
+                    user_id, grid=rng.choice(("FN42", "EM12", "JO01")), radius=100
+                )
+            subscriptions.add(subscription)
+    return subscriptions
+
+
+def linear_match(subscriptions: Subscriptions, spot: Spot) -> set[int]:
+    return {s.user_id for s in subscriptions if s.matches(spot)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--spots", type=int, default=2000)
+    parser.add_argument("--users", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    args = parser.parse_args()
+
+    spots = [Spot(record) for record in make_records(args.spots)]
+    print(f"{args.spots} spots")
+    for users in args.users:
+        subscriptions = make_subscriptions(users)
+        assert all(
+            subscriptions.match(spot) == linear_match(subscriptions, spot)
+            for spot in spots
+        )
+        timings = {}
+        for name, func in (
+            ("indexed", subscriptions.match),
+            ("linear", lambda spot: linear_match(subscriptions, spot)),
+        ):
+            timings[name] = min(
+                timeit.repeat(
+                    lambda: [func(spot) for spot in spots], number=1, repeat=3
+                )
+            )
+        print(
+            f"  {users:5d} users, {len(subscriptions):5d} rules: "
+            + "  ".join(
+                f"{name} {elapsed * 1e6 / args.spots:8.1f} us/spot"
+                for name, elapsed in timings.items()
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import asyncio
+import struct
+
+
+class MQTTBroker:
+    """
+    A minimal in-process MQTT 3.1.1 broker for tests and benchmarks.
+
+    It handles CONNECT, SUBSCRIBE, PUBLISH at QoS 0 and 1, PINGREQ and
+    DISCONNECT, which is all aiomqtt needs. stop() drops every client like a
+    crashed broker would, and start() brings it back on the same port.
+    """
+
+    def __init__(self, port: int = 0):
+        self.port = port
+        self.server = None
+        self.subscriptions: dict[asyncio.StreamWriter, list[str]] = {}
+        self.published: list[tuple[str, bytes]] = []
+        self.connects = 0
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.server.close()
+        for writer in list(self.subscriptions):
+            writer.transport.abort()
+        self.subscriptions.clear()
+        await self.server.wait_closed()
+
+    @property
+    def config(self) -> dict:
+        return {"hostname": "127.0.0.1", "port": self.port, "keepalive": 10}
+
+    @staticmethod
+    def matches(pattern: str, topic: str) -> bool:
+        pattern_parts, topic_parts = pattern.split("/"), topic.split("/")
+        for index, part in enumerate(pattern_parts):
+            if part == "#":
+                return True
+            if index >= len(topic_parts):
+                return False
+            if part not in ("+", topic_parts[index]):
+                return False
+        return len(pattern_parts) == len(topic_parts)
+
+    @staticmethod
+    def packet(kind: int, body: bytes) -> bytes:
+        length, size = bytearray(), len(body)
+        while True:
+            byte, size = size % 128, size // 128
+            length.append(byte | (0x80 if size else 0))
+            if not size:
+                return bytes([kind]) + bytes(length) + body
+
+    @staticmethod
+    def string(data: bytes, offset: int) -> tuple[str, int]:
+        (size,) = struct.unpack_from("!H", data, offset)
+        offset += 2
+        return data[offset : offset + size].decode(), offset + size
+
+    async def read_packet(self, reader: asyncio.StreamReader) -> tuple[int, bytes]:
+        header = (await reader.readexactly(1))[0]
+        size, shift = 0, 0
+        while True:
+            byte = (await reader.readexactly(1))[0]
+            size |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        return header, await reader.readexactly(size)
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.subscriptions[writer] = []
+        try:
+            while True:
+                header, body = await self.read_packet(reader)
+                kind = header >> 4
+                if kind == 1:  # CONNECT
+                    self.connects += 1
+                    writer.write(self.packet(0x20, b"\x00\x00"))
+                elif kind == 3:  # PUBLISH
+                    qos = (header >> 1) & 0x03
+                    topic, offset = self.string(body, 0)
+                    if qos:
+                        writer.write(self.packet(0x40, body[offset : offset + 2]))
+                        offset += 2
+                    self.deliver(topic, body[offset:])
+                elif kind == 8:  # SUBSCRIBE
+                    offset, granted = 2, bytearray()
+                    while offset < len(body):
+                        topic, offset = self.string(body, offset)
+                        self.subscriptions[writer].append(topic)
+                        granted.append(0)
+                        offset += 1
+                    writer.write(self.packet(0x90, body[:2] + bytes(granted)))
+                elif kind == 12:  # PINGREQ
+                    writer.write(self.packet(0xD0, b""))
+                elif kind == 14:  # DISCONNECT
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.subscriptions.pop(writer, None)
+            writer.close()
+
+    def deliver(self, topic: str, payload: bytes) -> None:
+        self.published.append((topic, payload))
+        name = struct.pack("!H", len(topic.encode())) + topic.encode()
+        for writer, patterns in self.subscriptions.items():
+            if any(self.matches(pattern, topic) for pattern in patterns):
+                writer.write(self.packet(0x30, name + payload))
@@ -0,0 +1,58 @@
+import random
+
+import anyio
+
+
+class BeaconScheduler:
+    """
+    When to announce this node to the mesh again.
+
+    Nodes that join after we connect only learn who we are from a node info
+    beacon, so one goes out every interval. Each interval is stretched or
+    shrunk at random by up to jitter, so instances restarted together drift
+    apart instead of beaconing in step. The schedule always runs from the
+    last beacon sent, so a node info that goes out for any other reason
+    suppresses the beacon that was due next.
+    """
+
+    def __init__(
+        self,
+        interval: float = 3 * 60 * 60,
+        jitter: float = 0.1,
+        clock=anyio.current_time,
+        sleep=anyio.sleep,
+        random=random.random,
+    ):
+        assert interval > 0 and 0 <= jitter < 1
+        self.interval = interval
+        self.jitter = jitter
+        self.clock = clock
+        self.sleep = sleep
+        self.random = random
+        self.last: float | None = None
+        self.deadline: float | None = None
+        self.suppressed = 0
+
+    def schedule(self) -> None:
+        """Set the next beacon one jittered interval from now."""
+        factor = 1 + self.jitter * (2 * self.random() - 1)
+        self.deadline = self.clock() + self.interval * factor
+
+    def sent(self) -> None:
+        """Record a node info that went out, and start the interval again."""
+        self.last = self.clock()
+        self.schedule()
+
+    async def wait(self) -> None:
+        """Sleep until a beacon is due."""
+        if self.deadline is None:
+            self.schedule()
+        while True:
+            deadline = self.deadline
+            delay = deadline - self.clock()
+            if delay > 0:
+                await self.sleep(delay)
+            if self.deadline == deadline:
+                return
+            # A node info went out while we slept, which moved the deadline
+            self.suppressed += 1
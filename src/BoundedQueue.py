@@ -0,0 +1,122 @@
+import heapq
+from collections import deque
+from collections.abc import Callable
+from itertools import count
+from typing import Any, Generic, TypeVar
+
+import anyio
+
+T = TypeVar("T")
+
+
+class BoundedQueue(Generic[T]):
+    """
+    Bounded async queue with an optional priority order and a drop policy.
+
+    Items come out lowest priority key first, in insertion order for equal
+    keys (plain FIFO when no priority function is given). When the queue is
+    full, drop_policy decides what gives way: the "oldest" queued item, the
+    "newest" (incoming) item, or the "lowest" priority item.
+    """
+
+    DROP_POLICIES = ("oldest", "newest", "lowest")
+
+    def __init__(
+        self,
+        max_size: int,
+        priority: Callable[[T], Any] | None = None,
+        drop_policy: str = "oldest",
+        clock=anyio.current_time,
+    ):
+        assert max_size > 0
+        if drop_policy not in self.DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.max_size = max_size
+        self.priority = priority
+        self.drop_policy = drop_policy
+        self.clock = clock
+        # Entries are [priority key, sequence, enqueue time, item]
+        self.heap: list[list] = []
+        self.sequence = count()
+        self.waiters: deque[anyio.Event] = deque()
+
+        self.dropped = 0
+        self.max_depth = 0
+        self.delivered = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def put_nowait(self, item: T) -> T | None:
+        """Queue an item, returning whichever item was dropped to make room."""
+        sequence = next(self.sequence)
+        key = self.priority(item) if self.priority else sequence
+        entry = [key, sequence, self.clock(), item]
+
+        dropped = None
+        if len(self.heap) >= self.max_size:
+            self.dropped += 1
+            if self.drop_policy == "newest":
+                return item
+            if self.drop_policy == "oldest":
+                victim = min(self.heap, key=lambda entry: entry[1])
+            else:
+                victim = max(self.heap)
+                if entry > victim:
+                    return item
+            self.heap.remove(victim)
+            heapq.heapify(self.heap)
+            dropped = victim[3]
+
+        heapq.heappush(self.heap, entry)
+        self.max_depth = max(self.max_depth, len(self.heap))
+        # Wake every waiter; any that lose the race go back to waiting
+        while self.waiters:
+            self.waiters.popleft().set()
+        return dropped
+
+    def get_nowait(self) -> T:
+        if not self.heap:
+            raise anyio.WouldBlock
+        _, _, enqueued, item = heapq.heappop(self.heap)
+        self.last_wait = self.clock() - enqueued
+        self.delivered += 1
+        self.total_wait += self.last_wait
+        self.max_wait = max(self.max_wait, self.last_wait)
+        return item
+
+    def peek(self, count: int) -> list[T]:
+        """The next count items in the order they would be returned."""
+        # A best-first walk down from the root only visits about count
+        # entries, where nsmallest would scan the whole heap
+        items: list[T] = []
+        frontier = [(self.heap[0], 0)] if self.heap else []
+        while frontier and len(items) < count:
+            entry, index = heapq.heappop(frontier)
+            items.append(entry[3])
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(self.heap):
+                    heapq.heappush(frontier, (self.heap[child], child))
+        return items
+
+    async def wait(self, size: int = 1) -> None:
+        """Wait until the queue holds at least size items."""
+        while len(self.heap) < size:
+            waiter = anyio.Event()
+            self.waiters.append(waiter)
+            try:
+                await waiter.wait()
+            finally:
+                if not waiter.is_set():
+                    self.waiters.remove(waiter)
+
+    async def get(self) -> T:
+        await self.wait()
+        return self.get_nowait()
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.delivered if self.delivered else 0.0
@@ -0,0 +1,94 @@
+import logging
+import os
+from collections.abc import Callable
+from typing import Any
+
+import anyio
+import anyio.to_process
+import anyio.to_thread
+from meshage.messages import MeshtasticMessage
+from meshage.parser import MeshtasticMessageParser
+from meshtastic.protobuf import mesh_pb2, mqtt_pb2, portnums_pb2
+
+
+def decode_text(
+    parser: MeshtasticMessageParser, payload: bytes
+) -> tuple[str, int | None] | None:
+    """
+    The text a received envelope carries and the node that sent it.
+
+    This follows parser.parse_message, but reads the text straight from the
+    packet: MeshtasticTextMessage.decode stores it on the class, so it would
+    be lost on the way back from a worker process and shared between
+    threads decoding at once. Only plain values leave here.
+    """
+    if len(payload) > mesh_pb2.Constants.DATA_PAYLOAD_LEN:
+        logging.error(
+            "Message too long to be a Meshtastic message (%d bytes)", len(payload)
+        )
+        return None
+    try:
+        packet = mqtt_pb2.ServiceEnvelope.FromString(payload).packet
+    except Exception:
+        logging.exception("Failed to parse service envelope")
+        return None
+    node = getattr(packet, "from")
+    if node == parser.config.config["userid"]:
+        return None
+    if packet.HasField("encrypted") and not packet.HasField("decoded"):
+        try:
+            parser.decrypt_packet(packet)
+        except Exception:
+            logging.exception("Failed to decrypt packet")
+            return None
+    if packet.decoded.portnum != portnums_pb2.TEXT_MESSAGE_APP:
+        return None
+    try:
+        text = packet.decoded.payload.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    return text, node or None
+
+
+class CodecService:
+    """
+    Runs Meshtastic encoding and decoding inline or on a worker pool.
+
+    Building a message means serialising protobufs and encrypting them, and
+    parsing one means the reverse. "inline" does this on the event loop. A
+    single LoRa-sized packet takes only microseconds, and a hop to a worker
+    costs more than that. "thread" and "process" hand each call to a pool of
+    workers limited in number. That keeps large bursts off the event loop,
+    and with processes it spreads them over several cores. Whatever goes to a
+    process pool must pickle: the callables and messages passed here do.
+    """
+
+    MODES = ("inline", "thread", "process")
+
+    def __init__(self, mode: str = "inline", workers: int | None = None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown codec mode: {mode}")
+        assert workers is None or workers > 0
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        # Created on first use, since a limiter needs a running event loop
+        self.limiter: anyio.CapacityLimiter | None = None
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        if self.mode == "inline":
+            return func(*args)
+        if self.limiter is None:
+            self.limiter = anyio.CapacityLimiter(self.workers)
+        if self.mode == "thread":
+            return await anyio.to_thread.run_sync(func, *args, limiter=self.limiter)
+        return await anyio.to_process.run_sync(func, *args, limiter=self.limiter)
+
+    async def encode(self, message: MeshtasticMessage) -> bytes:
+        """The service envelope for a message, ready to publish."""
+        return await self.run(bytes, message)
+
+    async def decode(
+        self, parser: MeshtasticMessageParser, payload: bytes
+    ) -> tuple[str, int | None] | None:
+        """The text of a received envelope and its sender, if it carries text."""
+        return await self.run(decode_text, parser, payload)
@@ -4,16 +4,34 @@ import anyio
 from asphalt.core import Component, current_context
 
 from .CommandEventSource import CommandEventSource
+from .Metrics import Metrics
 from .State import State
+from .Subscription import Subscription
+from .Subscriptions import Subscriptions
 
 
 class CommandProcessorComponent(Component):
     def __init__(self):
         self.task_group = None
         self.running = False
+        self.subscriptions = Subscriptions()
+        self.metrics = Metrics()
+        self.commands = self.metrics.counter(
+            "potatastic_commands", "Commands received from the mesh"
+        )
+        self.unknown_commands = self.metrics.counter(
+            "potatastic_unknown_commands", "Commands that were not recognised"
+        )
+        self.metrics.gauge(
+            "potatastic_subscriptions",
+            "Spot filters registered by mesh users",
+            lambda: len(self.subscriptions),
+        )
 
     async def start(self, ctx) -> None:
         ctx.add_resource(State())
+        ctx.add_resource(self.subscriptions)
+        ctx.add_resource(self.metrics, name="commands")
         self.task_group = anyio.create_task_group()
         await self.task_group.__aenter__()
         self.running = True
@@ -33,19 +51,40 @@ class CommandProcessorComponent(Component):
 
         logging.debug("Waiting for command")
         async for event in event_source.signal.stream_events():
-            logging.info(f"Received command: {event.command} from {event.userId}")
-            await self.parse_command(event.command)
+            logging.info("Received command: %s from %s", event.command, event.userId)
+            self.commands.inc()
+            await self.parse_command(event.command, event.userId)
 
-    async def parse_command(self, command: str) -> None:
+    async def parse_command(self, command: str, user_id: int | None = None) -> None:
         state = await current_context().request_resource(State)
         assert state is not None
 
         parts = command.split()
-        if parts[0] == "enable":
+        if not parts:
+            logging.warning("Empty command from %s", user_id)
+            self.unknown_commands.inc()
+        elif parts[0] == "enable":
             state.enabled = True
             logging.info("Publishing enabled")
         elif parts[0] == "disable":
             state.enabled = False
             logging.info("Publishing disabled")
+        elif parts[0] in ("sub", "unsub", "subs") and user_id is None:
+            logging.warning("Ignoring %s from unknown sender", parts[0])
+        elif parts[0] == "sub":
+            try:
+                subscription = Subscription.parse(user_id, parts[1:])
+                self.subscriptions.add(subscription)
+            except ValueError as e:
+                logging.warning("Bad subscription from %s: %s", user_id, e)
+            else:
+                logging.info("Subscribed %s to %s", user_id, subscription)
+        elif parts[0] == "unsub":
+            removed = self.subscriptions.remove(user_id)
+            logging.info("Removed %d subscriptions for %s", removed, user_id)
+        elif parts[0] == "subs":
+            for subscription in self.subscriptions.get(user_id):
+                logging.info("Subscription for %s: %s", user_id, subscription)
         else:
-            logging.warning(f"Unknown command: {command}")
+            logging.warning("Unknown command: %s", command)
+            self.unknown_commands.inc()
@@ -0,0 +1,205 @@
+import logging
+import random
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import anyio
+from anyio.streams.buffered import BufferedByteReceiveStream
+from asphalt.core import Component, current_context
+
+from .DedupePolicy import DedupePolicy
+from .Metrics import Metrics
+from .NewSpotEventSource import NewSpotEventSource
+from .Spot import Spot
+from .SpotDiff import SpotDiff
+from .SpotStore import SpotStore
+
+# "DX de W2XYZ:     14062.0  W1ABC        CW POTA K-0001         1430Z FN42"
+SPOT_LINE = re.compile(
+    r"^DX de (?P<spotter>[^:\s]+):\s+(?P<frequency>\d+(?:\.\d+)?)\s+"
+    r"(?P<callsign>\S+)\s+(?P<comment>.*?)\s*(?P<time>\d{4})Z"
+    r"(?:\s+(?P<grid>[A-Ra-r]{2}\d{2}))?\s*$"
+)
+# Program references: POTA K-0001, WWFF KFF-0234, SOTA W1/NH-001
+REFERENCE = re.compile(r"\b([A-Z0-9]{1,4}/[A-Z]{2}-\d{3}|[A-Z0-9]{1,4}-\d{4,5})\b")
+MODES = {
+    "CW": "CW",
+    "SSB": "SSB",
+    "USB": "SSB",
+    "LSB": "SSB",
+    "FM": "FM",
+    "AM": "AM",
+    "FT8": "FT8",
+    "FT4": "FT4",
+    "RTTY": "RTTY",
+    "PSK31": "PSK31",
+}
+MAX_LINE = 1024
+
+
+class DXClusterComponent(Component):
+    """
+    Streams spots from a DX cluster over a long-lived telnet connection.
+
+    Polling puts a floor under latency; a cluster pushes each spot as it is
+    made. Lines are parsed as they arrive and spots that carry a program
+    reference go through the scraper's store and dedupe policy, so a spot
+    already seen on a polled feed is not announced twice, and new ones are
+    dispatched within moments of being spotted. The connection is re-made
+    with exponential backoff if the cluster drops it.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 7300,
+        callsign: str = "N0CALL",
+        require_reference: bool = True,
+        min_backoff: float = 1.0,
+        max_backoff: float = 300.0,
+        jitter: float = 0.1,
+    ):
+        self.task_group = None
+        self.running = False
+        self.host = host
+        self.port = port
+        self.callsign = callsign
+        self.require_reference = require_reference
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.connected = False
+
+        self.metrics = Metrics()
+        self.lines = self.metrics.counter(
+            "potatastic_dxcluster_lines", "Lines received from the DX cluster"
+        )
+        self.spots = self.metrics.counter(
+            "potatastic_dxcluster_spots", "Activation spots parsed from the DX cluster"
+        )
+        self.new_spots = self.metrics.counter(
+            "potatastic_dxcluster_new_spots", "DX cluster spots not already known"
+        )
+        self.connects = self.metrics.counter(
+            "potatastic_dxcluster_connects", "Connections made to the DX cluster"
+        )
+        self.metrics.gauge(
+            "potatastic_dxcluster_connected",
+            "Whether the DX cluster is connected",
+            lambda: int(self.connected),
+        )
+
+    async def start(self, ctx) -> None:
+        ctx.add_resource(self.metrics, name="dxcluster")
+        self.task_group = anyio.create_task_group()
+        await self.task_group.__aenter__()
+        self.running = True
+        self.task_group.start_soon(self.task)
+
+    async def stop(self) -> None:
+        self.running = False
+        if self.task_group:
+            self.task_group.cancel_scope.cancel()
+            await self.task_group.__aexit__(None, None, None)
+
+    @staticmethod
+    def parse_line(line: str, now: datetime) -> dict[str, Any] | None:
+        """Turn a cluster spot line into a POTA-style record, or None."""
+        match = SPOT_LINE.match(line.strip())
+        if match is None:
+            return None
+        comment = match["comment"].upper()
+        words = comment.split()
+        mode = next((MODES[word] for word in words if word in MODES), "")
+        reference = REFERENCE.search(comment)
+
+        # Only the time of day is sent; it is today unless that is in the future
+        timestamp = now.replace(
+            hour=int(match["time"][:2]),
+            minute=int(match["time"][2:]),
+            second=0,
+            microsecond=0,
+        )
+        if timestamp > now + timedelta(minutes=5):
+            timestamp -= timedelta(days=1)
+
+        spotter = match["spotter"].upper()
+        return {
+            "activator": match["callsign"].upper(),
+            "frequency": float(match["frequency"]),
+            "grid4": (match["grid"] or "").upper(),
+            "mode": mode,
+            "name": match["comment"].strip(),
+            "reference": reference[1] if reference else "",
+            "spotId": f"dx:{spotter}:{match['time']}",
+            "spotter": spotter,
+            "spotTime": timestamp.isoformat(),
+        }
+
+    @staticmethod
+    def feed(
+        record: dict[str, Any], spots: SpotStore, policy: DedupePolicy
+    ) -> Spot | None:
+        """Apply a cluster record to the store, returning the Spot if it is new."""
+        if not record["mode"]:
+            # Many cluster spots leave the mode out. Borrow it from a spot
+            # of the same activator on the same frequency, or the key would
+            # never match the one the polled feed stored.
+            for mode in dict.fromkeys(MODES.values()):
+                if policy.find(spots.spots, dict(record, mode=mode)) in spots:
+                    record["mode"] = mode
+                    break
+        return SpotDiff(spots, policy=policy).feed(record)
+
+    async def task(self) -> None:
+        logging.info("Starting DX cluster task")
+        new_spot_event_source = await current_context().request_resource(
+            NewSpotEventSource
+        )
+        assert new_spot_event_source is not None
+        spots = await current_context().request_resource(SpotStore, "spots")
+        assert spots is not None
+        policy = await current_context().request_resource(DedupePolicy)
+        assert policy is not None
+
+        backoff = self.min_backoff
+        while self.running:
+            try:
+                async with await anyio.connect_tcp(self.host, self.port) as stream:
+                    await stream.send(f"{self.callsign}\r\n".encode())
+                    self.connected = True
+                    self.connects.inc()
+                    backoff = self.min_backoff
+                    logging.info("Connected to DX cluster %s:%d", self.host, self.port)
+                    receiver = BufferedByteReceiveStream(stream)
+                    while True:
+                        line = await receiver.receive_until(b"\n", MAX_LINE)
+                        self.lines.inc()
+                        record = self.parse_line(
+                            line.decode(errors="replace"),
+                            datetime.now(timezone.utc).replace(tzinfo=None),
+                        )
+                        if record is None or (
+                            self.require_reference and not record["reference"]
+                        ):
+                            continue
+                        self.spots.inc()
+                        spot = self.feed(record, spots, policy)
+                        if spot is not None:
+                            self.new_spots.inc()
+                            logging.debug("New spot: %s", spot.key)
+                            await new_spot_event_source.signal.dispatch(spot)
+            except (OSError, anyio.EndOfStream, anyio.IncompleteRead) as e:
+                logging.warning("DX cluster connection lost: %s", e or type(e).__name__)
+            except anyio.DelimiterNotFound:
+                logging.warning("DX cluster sent an overlong line, reconnecting")
+            except Exception:
+                logging.exception("Error in DX cluster connection")
+            finally:
+                self.connected = False
+
+            delay = backoff * (1 - self.jitter * random.random())
+            logging.info("Reconnecting to DX cluster in %.1fs", delay)
+            await anyio.sleep(delay)
+            backoff = min(backoff * 2, self.max_backoff)
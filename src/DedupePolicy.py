@@ -0,0 +1,89 @@
+from collections.abc import Callable, Mapping
+from datetime import timedelta
+from functools import partial
+from typing import Any
+
+from .Spot import Spot
+
+
+class DedupePolicy:
+    """
+    Decides when a spot record is a repeat of one already known.
+
+    By default a spot is identified by callsign, exact frequency and mode.
+    With a tolerance, frequencies are grouped into buckets that many kHz wide,
+    and a record within tolerance of a known spot in a neighbouring bucket
+    counts as that spot too, so a small QSY is not announced as a new spot.
+    Checking the two neighbours is a pair of dict lookups, however large the
+    store grows. Including the reference makes a move to another park on the
+    same frequency a new spot, and a re-announce interval lets an activator
+    who is still being spotted go out again once that long has passed.
+    """
+
+    def __init__(
+        self,
+        tolerance: float = 0.0,
+        include_reference: bool = False,
+        reannounce_after: float | None = None,
+    ):
+        assert tolerance >= 0
+        self.tolerance = tolerance
+        self.include_reference = include_reference
+        self.reannounce_after = (
+            timedelta(seconds=reannounce_after)
+            if reannounce_after is not None
+            else None
+        )
+
+    def bucket_key(self, record: dict[str, Any], bucket: int) -> str:
+        # The bucket number itself, since scaling it back to kHz and
+        # formatting it can round neighbouring buckets to the same text
+        key = f"{record['activator']}-{bucket}~{self.tolerance:g}-{record['mode']}"
+        if self.include_reference:
+            key += f"-{record['reference']}"
+        return key
+
+    def key(self, record: dict[str, Any]) -> str:
+        """The key a spot record is stored under."""
+        if self.tolerance:
+            return self.bucket_key(
+                record, int(float(record["frequency"]) // self.tolerance)
+            )
+        key = Spot.record_key(record)
+        if self.include_reference:
+            key += f"-{record['reference']}"
+        return key
+
+    def find(self, spots: Mapping[str, Spot], record: dict[str, Any]) -> str:
+        """
+        The key of the known spot a record duplicates, or of its own bucket
+        if it is new.
+        """
+        key = self.key(record)
+        if not self.tolerance or key in spots:
+            return key
+        frequency = float(record["frequency"])
+        bucket = int(frequency // self.tolerance)
+        for neighbour in (bucket - 1, bucket + 1):
+            neighbour_key = self.bucket_key(record, neighbour)
+            spot = spots.get(neighbour_key)
+            if spot is not None and abs(spot.frequency - frequency) <= self.tolerance:
+                return neighbour_key
+        return key
+
+    def finder(self, spots: Mapping[str, Spot]) -> Callable[[dict[str, Any]], str]:
+        """
+        find() bound to a store. The default policy keys records exactly as
+        Spot does, so it gets Spot.record_key with no lookups in between.
+        """
+        if not self.tolerance and not self.include_reference:
+            return Spot.record_key
+        return partial(self.find, spots)
+
+    def reannounce(self, spot: Spot) -> bool:
+        """Whether an updated spot has been quiet long enough to go out again."""
+        return bool(
+            self.reannounce_after is not None
+            and spot.published
+            and spot.timestamp - spot.published >= self.reannounce_after
+        )
@@ -0,0 +1,73 @@
+import codecs
+import json
+import re
+from collections.abc import Iterator
+from typing import Any
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class JSONArrayParser:
+    """
+    Incremental parser for a top-level JSON array.
+
+    Bytes are fed in as they arrive and each element is yielded as soon as it
+    is complete, so only the element currently being received is buffered
+    rather than the whole document.
+    """
+
+    def __init__(self):
+        self.decoder = json.JSONDecoder()
+        self.text = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.size = 0
+        # What may come next: "[", a "value", a ",", or nothing once closed
+        self.expect = "["
+
+    def feed(self, chunk: bytes) -> Iterator[Any]:
+        text = self.text.decode(chunk)
+        self.size += len(chunk)
+        self.buffer += text
+        position = 0
+        try:
+            while True:
+                position = WHITESPACE.match(self.buffer, position).end()
+                if position == len(self.buffer):
+                    return
+                char = self.buffer[position]
+                if self.expect == "[":
+                    if char != "[":
+                        raise ValueError("Expected a JSON array")
+                    self.expect = "value or ]"
+                    position += 1
+                elif char == "]" and self.expect in ("value or ]", ", or ]"):
+                    self.expect = ""
+                    position += 1
+                elif char == "," and self.expect == ", or ]":
+                    self.expect = "value"
+                    position += 1
+                elif self.expect.startswith("value"):
+                    try:
+                        value, end = self.decoder.raw_decode(self.buffer, position)
+                    except json.JSONDecodeError:
+                        # Most likely an element split across chunks; close()
+                        # reports it if the data never completes.
+                        return
+                    if end == len(self.buffer) and type(value) in (int, float):
+                        # A number may continue in the next chunk
+                        return
+                    position = end
+                    self.expect = ", or ]"
+                    yield value
+                else:
+                    raise ValueError(
+                        f"Expected {self.expect or 'end of data'}, got {char!r}"
+                    )
+        finally:
+            self.buffer = self.buffer[position:]
+
+    def close(self) -> None:
+        """Check that the array was complete once all data has been fed."""
+        self.buffer += self.text.decode(b"", final=True)
+        if self.expect or self.buffer.strip():
+            raise ValueError("Incomplete or malformed JSON array")
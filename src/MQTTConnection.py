@@ -0,0 +1,106 @@
+import logging
+import math
+import random
+
+import aiomqtt
+import anyio
+from meshage.config import MQTTConfig
+
+
+class MQTTConnection:
+    """
+    The broker connection shared by the publish and receive tasks.
+
+    Both directions use the same aiomqtt client, so each instance holds one
+    TCP/TLS session and one keepalive against the broker instead of two. A
+    supervisor task keeps it up: when the broker goes away it reconnects with
+    exponential backoff and re-subscribes, and publishers wait for it to come
+    back rather than failing for good.
+    """
+
+    def __init__(
+        self,
+        config: MQTTConfig,
+        min_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        jitter: float = 0.1,
+    ):
+        self.config = config
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.task_group = None
+        self.client: aiomqtt.Client | None = None
+        self.connected = False
+        self.ready = anyio.Event()
+        self.connects = 0
+        # Topics to subscribe to on every (re)connect
+        self.topics: list[str] = []
+        # Messages from the current client, handed on across reconnects
+        self.send_stream, self.messages = anyio.create_memory_object_stream(math.inf)
+
+    async def start(self) -> None:
+        self.task_group = anyio.create_task_group()
+        await self.task_group.__aenter__()
+        self.task_group.start_soon(self.run)
+
+    async def stop(self) -> None:
+        if self.task_group:
+            self.task_group.cancel_scope.cancel()
+            await self.task_group.__aexit__(None, None, None)
+            self.task_group = None
+
+    async def run(self) -> None:
+        """Connect, pass on messages until the broker drops, and repeat."""
+        backoff = self.min_backoff
+        while True:
+            try:
+                logging.debug("Connecting to %s", self.config.config["host"])
+                async with aiomqtt.Client(**self.client_config()) as client:
+                    # Topics added while this runs are picked up by the loop
+                    for topic in self.topics:
+                        await client.subscribe(topic)
+                    self.client = client
+                    self.connected = True
+                    self.connects += 1
+                    self.ready.set()
+                    backoff = self.min_backoff
+                    logging.info("Connected to %s", self.config.config["host"])
+                    async for message in client.messages:
+                        await self.send_stream.send(message)
+            except aiomqtt.MqttError as e:
+                logging.warning("MQTT connection lost: %s", e)
+            except Exception:
+                logging.exception("Error in MQTT connection")
+            finally:
+                self.client = None
+                self.connected = False
+                if self.ready.is_set():
+                    self.ready = anyio.Event()
+
+            delay = backoff * (1 - self.jitter * random.random())
+            logging.info("Reconnecting to MQTT broker in %.1fs", delay)
+            await anyio.sleep(delay)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def client_config(self) -> dict:
+        config = dict(self.config.aiomqtt_config)
+        # MQTT_PORT set in the environment arrives as a string
+        if "port" in config:
+            config["port"] = int(config["port"])
+        return config
+
+    async def wait_connected(self) -> None:
+        while not self.connected:
+            await self.ready.wait()
+
+    async def publish(self, topic: str, payload: bytes) -> None:
+        """Publish once connected; raises MqttError if the connection drops."""
+        await self.wait_connected()
+        await self.client.publish(topic, payload=payload)
+
+    async def subscribe(self, topic: str) -> None:
+        """Subscribe now if connected, and again after every reconnect."""
+        self.topics.append(topic)
+        if self.connected:
+            await self.client.subscribe(topic)
@@ -7,85 +7,464 @@ from meshage.config import MQTTConfig
 from meshage.messages import MeshtasticNodeInfoMessage, MeshtasticTextMessage
 from meshage.parser import MeshtasticMessageParser
 
+from .BeaconScheduler import BeaconScheduler
+from .BoundedQueue import BoundedQueue
+from .CodecService import CodecService
 from .NewSpotEventSource import NewSpotEventSource
 from .CommandEventSource import CommandEventSource
+from .MeshtasticDirectTextMessage import MeshtasticDirectTextMessage
+from .MessageCache import MessageCache
+from .Metrics import Metrics
+from .MQTTConnection import MQTTConnection
+from .ReceiveFilter import ReceiveFilter
+from .Spot import Spot
+from .SpotCoalescer import SpotCoalescer
+from .State import State
+from .Subscriptions import Subscriptions
+from .TokenBucket import TokenBucket
 
 
 class MeshtasticCommunicationComponent(Component):
-    def __init__(self):
+    def __init__(
+        self,
+        publish_rate: float = 4.0,
+        publish_burst: int = 3,
+        queue_size: int = 100,
+        queue_priority: str = "fifo",
+        drop_policy: str = "oldest",
+        band_order: list[str] | None = None,
+        max_message_bytes: int = 200,
+        max_message_spots: int = 10,
+        coalesce_latency: float = 5.0,
+        reconnect_backoff: float = 1.0,
+        max_reconnect_backoff: float = 60.0,
+        broadcast_threshold: int | None = 3,
+        command_queue_size: int = 50,
+        command_workers: int = 1,
+        codec: str = "inline",
+        codec_workers: int | None = None,
+        message_cache_size: int = 256,
+        message_cache_age: float = 60.0,
+        beacon_interval: float = 3 * 60 * 60,
+        beacon_jitter: float = 0.1,
+    ):
         self.task_group = None
         self.running = False
+        self.connection = None
+        self.reconnect_backoff = reconnect_backoff
+        self.max_reconnect_backoff = max_reconnect_backoff
+        # publish_rate is in messages per minute, the natural unit for LoRa
+        self.bucket = TokenBucket(publish_rate / 60, publish_burst)
+        self.queue = BoundedQueue(
+            queue_size,
+            priority=self.spot_priority(queue_priority, band_order),
+            drop_policy=drop_policy,
+        )
+        self.coalescer = SpotCoalescer(
+            max_message_bytes, max_message_spots, coalesce_latency
+        )
+        # Spots taken from the queue that did not fit in the last message
+        self.pending: list[Spot] = []
+        # Messages built from the last batch, as (destination, spots) with
+        # None for the channel, waiting for airtime
+        self.outbox: list[tuple[int | None, list[Spot]]] = []
+        # While publishing is disabled, a spot for at least this many
+        # subscribers goes to the channel instead, since one broadcast costs
+        # less airtime than that many DMs. Disabling only stops unsolicited
+        # broadcasts; None keeps the channel quiet altogether.
+        assert broadcast_threshold is None or broadcast_threshold > 0
+        self.broadcast_threshold = broadcast_threshold
+        self.state: State | None = None
+        self.subscriptions: Subscriptions | None = None
+        # Received commands as (text, sender), so the receive loop never waits
+        # on command handling. One worker keeps commands in the order sent;
+        # more let slow commands overlap at the cost of that order.
+        assert command_workers > 0
+        self.commands: BoundedQueue[tuple[str, int | None]] = BoundedQueue(
+            command_queue_size, drop_policy="oldest"
+        )
+        self.command_workers = command_workers
+        # Where messages are encrypted and decoded: on the event loop, or in
+        # a thread or process pool for bursts too big to handle inline
+        self.codec = CodecService(codec, codec_workers)
+        self.message_cache = MessageCache(message_cache_size, message_cache_age)
+        # Node info is repeated for nodes that join later; 0 turns this off
+        self.beacon = (
+            BeaconScheduler(beacon_interval, beacon_jitter) if beacon_interval else None
+        )
+
+        self.metrics = Metrics()
+        self.metrics.gauge(
+            "potatastic_publish_queue_depth",
+            "Spots waiting to be published",
+            lambda: len(self.queue)
+            + len(self.pending)
+            + sum(len(spots) for _, spots in self.outbox),
+        )
+        self.metrics.counter(
+            "potatastic_publish_queue_dropped",
+            "Spots dropped because the publish queue was full",
+            lambda: self.queue.dropped,
+        )
+        self.publish_wait = self.metrics.histogram(
+            "potatastic_publish_queue_wait_seconds",
+            "Time spots wait in the publish queue before being sent",
+        )
+        self.publish_seconds = self.metrics.histogram(
+            "potatastic_publish_duration_seconds",
+            "Time taken to hand a message to the broker",
+        )
+        self.messages_published = self.metrics.counter(
+            "potatastic_messages_published", "Messages published to the mesh"
+        )
+        self.spots_published = self.metrics.counter(
+            "potatastic_spots_published", "Spots published to the mesh"
+        )
+        self.direct_messages_published = self.metrics.counter(
+            "potatastic_direct_messages_published",
+            "Messages sent to a single subscriber",
+        )
+        self.spots_unrouted = self.metrics.counter(
+            "potatastic_spots_unrouted",
+            "Spots not queued because nobody would receive them",
+        )
+        self.publish_errors = self.metrics.counter(
+            "potatastic_publish_errors", "Messages that failed to publish"
+        )
+        self.messages_received = self.metrics.counter(
+            "potatastic_messages_received", "Messages received from the mesh"
+        )
+        self.metrics.gauge(
+            "potatastic_command_queue_depth",
+            "Received commands waiting to be handled",
+            lambda: len(self.commands),
+        )
+        self.metrics.counter(
+            "potatastic_command_queue_dropped",
+            "Received commands dropped because the command queue was full",
+            lambda: self.commands.dropped,
+        )
+        self.command_wait = self.metrics.histogram(
+            "potatastic_command_queue_wait_seconds",
+            "Time received commands wait before being handled",
+        )
+        self.metrics.counter(
+            "potatastic_message_cache_hits",
+            "Messages published from an envelope already encoded",
+            lambda: self.message_cache.hits,
+        )
+        self.metrics.counter(
+            "potatastic_message_cache_misses",
+            "Messages that had to be encoded before publishing",
+            lambda: self.message_cache.misses,
+        )
+        self.metrics.counter(
+            "potatastic_message_cache_invalidations",
+            "Times the message cache was emptied by a change of MQTT config",
+            lambda: self.message_cache.invalidations,
+        )
+        self.beacons_published = self.metrics.counter(
+            "potatastic_beacons_published", "Periodic node info beacons published"
+        )
+        self.metrics.counter(
+            "potatastic_beacons_suppressed",
+            "Beacons skipped because node info had just gone out",
+            lambda: self.beacon.suppressed if self.beacon else 0,
+        )
+        self.messages_filtered = {
+            stage: self.metrics.counter(
+                f"potatastic_messages_filtered_{stage}",
+                f"Received messages dropped before decoding: {reason}",
+            )
+            for stage, reason in ReceiveFilter.STAGES.items()
+        }
+        self.metrics.counter(
+            "potatastic_mqtt_reconnects",
+            "Times the MQTT connection was re-established",
+            lambda: max(self.connection.connects - 1, 0) if self.connection else 0,
+        )
+        self.metrics.gauge(
+            "potatastic_mqtt_connected",
+            "Whether the MQTT broker is connected",
+            lambda: int(bool(self.connection and self.connection.connected)),
+        )
+
+    @staticmethod
+    def spot_priority(order: str, band_order: list[str] | None = None):
+        """Build the queue priority function for the configured publish order."""
+        if order == "fifo":
+            return None
+        if order == "newest":
+            return lambda spot: -spot.timestamp.timestamp()
+        if order == "band":
+            ranks = {band: rank for rank, band in enumerate(band_order or [])}
+            return lambda spot: ranks.get(spot.band, len(ranks))
+        raise ValueError(f"Unknown queue priority: {order}")
 
     async def start(self, ctx) -> None:
-        ctx.add_resource(MQTTConfig())
+        config = MQTTConfig()
+        ctx.add_resource(config)
         ctx.add_resource(CommandEventSource())
 
+        # One supervised connection, shared by both tasks
+        self.connection = MQTTConnection(
+            config, self.reconnect_backoff, self.max_reconnect_backoff
+        )
+        await self.connection.start()
+        ctx.add_resource(self.connection)
+        ctx.add_resource(self.metrics, name="mqtt")
+
         self.task_group = anyio.create_task_group()
         await self.task_group.__aenter__()
         self.running = True
         self.task_group.start_soon(self.publish_task)
         self.task_group.start_soon(self.receive_task)
+        self.task_group.start_soon(self.command_task)
 
     async def stop(self) -> None:
         self.running = False
         if self.task_group:
             await self.task_group.__aexit__(None, None, None)
+        if self.connection:
+            await self.connection.stop()
 
     async def publish_task(self) -> None:
         logging.info("Starting publish task")
         event_source = await current_context().request_resource(NewSpotEventSource)
         assert event_source is not None
-        logging.debug(f"Event source: {event_source}")
+        logging.debug("Event source: %s", event_source)
 
         config = await current_context().request_resource(MQTTConfig)
         assert config is not None
-        logging.debug(f"Config: {config.config}")
+        logging.debug("Config: %s", config.config)
 
-        logging.debug(f"Publish connecting to {config.config["host"]}")
-        async with aiomqtt.Client(**config.aiomqtt_config) as broker:
-            logging.debug(f"Publish connected to broker")
-            node_info = MeshtasticNodeInfoMessage(config)
-            try:
-                await broker.publish(config.publish_topic, payload=bytes(node_info))
-                logging.debug("Published node info")
-            except Exception:
-                logging.exception("Error publishing node info")
-            try:
-                logging.debug("Waiting for spot events")
+        connection = await current_context().request_resource(MQTTConnection)
+        assert connection is not None
+
+        # Provided by the command processor; without them every spot is
+        # broadcast on the channel
+        self.state = await current_context().request_resource(State)
+        self.subscriptions = await current_context().request_resource(Subscriptions)
 
+        try:
+            payload = await self.encode(config, "nodeinfo")
+            await connection.publish(config.publish_topic, payload=payload)
+            logging.debug("Published node info")
+            if self.beacon:
+                self.beacon.sent()
+        except Exception:
+            logging.exception("Error publishing node info")
+        try:
+            logging.debug("Waiting for spot events")
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(self.send_task, connection, config)
+                if self.beacon:
+                    tg.start_soon(self.beacon_task, connection, config)
                 async for event in event_source.signal.stream_events():
-                    logging.debug(f"Publishing new spot: {event.spot.key}")
-                    message = MeshtasticTextMessage(str(event.spot), config)
-                    await broker.publish(config.publish_topic, payload=bytes(message))
+                    if not self.wanted(event.spot):
+                        self.spots_unrouted.inc()
+                        continue
+                    dropped = self.queue.put_nowait(event.spot)
+                    if dropped is not None:
+                        logging.warning(
+                            "Publish queue full, dropped spot: %s", dropped.key
+                        )
+                tg.cancel_scope.cancel()
+        except Exception:
+            logging.exception("Error in publish task")
+
+    async def gather(self) -> None:
+        """Hold a message back for up to coalesce_latency while it can grow."""
+        with anyio.move_on_after(self.coalescer.max_latency):
+            while self.coalescer.has_room(
+                self.pending + self.queue.peek(self.coalescer.max_spots)
+            ):
+                await self.queue.wait(len(self.queue) + 1)
+
+    def broadcasting(self) -> bool:
+        return self.state is None or self.state.enabled
+
+    def wanted(self, spot: Spot) -> bool:
+        """Whether a spot would go anywhere if it were published now."""
+        if self.broadcasting():
+            return True
+        return bool(self.subscriptions and self.subscriptions.match(spot))
+
+    def route(self, spots: list[Spot]) -> list[tuple[int | None, list[Spot]]]:
+        """
+        Split a batch into messages: one for the channel and one per
+        subscriber, each carrying every spot in the batch for that
+        destination so nobody gets more than one message per batch.
+        """
+        if self.broadcasting():
+            return [(None, spots)]
+        threshold = self.broadcast_threshold
+        broadcast: list[Spot] = []
+        direct: dict[int, list[Spot]] = {}
+        for spot in spots:
+            recipients = self.subscriptions.match(spot) if self.subscriptions else ()
+            if threshold is not None and len(recipients) >= threshold:
+                broadcast.append(spot)
+                continue
+            for recipient in sorted(recipients):
+                direct.setdefault(recipient, []).append(spot)
+        messages: list[tuple[int | None, list[Spot]]] = []
+        if broadcast:
+            messages.append((None, broadcast))
+        messages.extend(direct.items())
+        return messages
+
+    def take(self) -> list[Spot]:
+        """Take the next batch of spots that fit in one message."""
+        spots = self.pending
+        while len(self.queue) and self.coalescer.has_room(spots):
+            spots.append(self.queue.get_nowait())
+            self.publish_wait.observe(self.queue.last_wait)
+
+        _, self.pending = self.coalescer.pack(spots)
+        sent = spots[: len(spots) - len(self.pending)]
+        if logging.root.isEnabledFor(logging.DEBUG):
+            # Joining the keys costs more than the check, so skip it
+            # entirely unless the message will be logged
+            logging.debug(
+                "Publishing %d spots: %s (waited %.1fs, %d queued)",
+                len(sent),
+                ", ".join(spot.key for spot in sent),
+                self.queue.last_wait,
+                len(self.queue),
+            )
+        return sent
+
+    async def encode(
+        self,
+        config: MQTTConfig,
+        kind: str,
+        text: str | None = None,
+        destination: int | None = None,
+    ) -> bytes:
+        """The envelope for a message, reusing it while it is cached."""
+        payload = self.message_cache.get(config, kind, text, destination)
+        if payload is not None:
+            return payload
+        if kind == "nodeinfo":
+            message = MeshtasticNodeInfoMessage(config)
+        elif destination is None:
+            message = MeshtasticTextMessage(text, config)
+        else:
+            message = MeshtasticDirectTextMessage(text, config, destination)
+        payload = await self.codec.encode(message)
+        self.message_cache.put(config, payload, kind, text, destination)
+        return payload
+
+    async def send_task(self, connection: MQTTConnection, config: MQTTConfig) -> None:
+        """Drain the publish queue as fast as the airtime budget allows."""
+        while True:
+            if not self.outbox:
+                if not self.pending:
+                    await self.queue.wait()
+                # While the broker is away spots wait in the bounded queue
+                await connection.wait_connected()
+                await self.gather()
+            await self.bucket.acquire()
+            if not self.outbox:
+                # Spots stay queued until airtime is available, so priority
+                # order and the drop policy still apply to them while they wait.
+                self.outbox = self.route(self.take())
+                if not self.outbox:
+                    continue
+
+            destination, spots = self.outbox[0]
+            text, rest = self.coalescer.pack(spots)
+            payload = await self.encode(config, "text", text, destination)
+            started = anyio.current_time()
+            try:
+                await connection.publish(config.publish_topic, payload=payload)
+            except aiomqtt.MqttError:
+                # The message stays at the head of the outbox for the retry
+                logging.warning("Publish failed, retrying after reconnect")
+                self.publish_errors.inc()
+                continue
+            self.publish_seconds.observe(anyio.current_time() - started)
+            self.messages_published.inc()
+            self.spots_published.inc(len(spots) - len(rest))
+            for spot in spots[: len(spots) - len(rest)]:
+                spot.published = spot.timestamp
+            if destination is not None:
+                self.direct_messages_published.inc()
+            if rest:
+                self.outbox[0] = (destination, rest)
+            else:
+                self.outbox.pop(0)
+
+    async def beacon_task(self, connection: MQTTConnection, config: MQTTConfig) -> None:
+        """Announce this node again every beacon interval."""
+        while True:
+            await self.beacon.wait()
+            await connection.wait_connected()
+            # Beacons share the airtime budget with spots
+            await self.bucket.acquire()
+            try:
+                payload = await self.encode(config, "nodeinfo")
+                await connection.publish(config.publish_topic, payload=payload)
+            except aiomqtt.MqttError:
+                # Still due, so it goes out once the broker is back
+                logging.warning("Beacon failed, retrying after reconnect")
+                self.publish_errors.inc()
+                continue
             except Exception:
-                logging.exception(f"Error in publish task")
+                logging.exception("Error publishing node info beacon")
+                # Try again after another interval rather than straight away
+                self.beacon.schedule()
+                continue
+            logging.debug("Published node info beacon")
+            self.beacons_published.inc()
+            self.beacon.sent()
 
     async def receive_task(self) -> None:
         logging.info("Starting receive task")
         config = await current_context().request_resource(MQTTConfig)
         assert config is not None
 
+        connection = await current_context().request_resource(MQTTConnection)
+        assert connection is not None
+
+        receive_filter = ReceiveFilter(config)
+        parser = MeshtasticMessageParser(config)
+        await connection.subscribe(config.receive_topic)
+        logging.debug("Subscribed to receive topic")
+        async for message in connection.messages:
+            self.messages_received.inc()
+            stage = receive_filter.check(message.topic.value, message.payload)
+            if stage:
+                self.messages_filtered[stage].inc()
+                continue
+            decoded = await self.codec.decode(parser, message.payload)
+            if not decoded:
+                continue
+            text, sender = decoded
+            logging.info("Received text message: %s from %s", text, sender)
+            dropped = self.commands.put_nowait((text, sender))
+            if dropped is not None:
+                logging.warning(
+                    "Command queue full, dropped command from %s", dropped[1]
+                )
+
+    async def command_task(self) -> None:
+        logging.info("Starting command task")
         command_event_source = await current_context().request_resource(
             CommandEventSource
         )
         assert command_event_source is not None
 
-        logging.debug(f"Receive connecting to {config.config["host"]}")
-        async with aiomqtt.Client(**config.aiomqtt_config) as broker:
-            parser = MeshtasticMessageParser(config)
-            logging.debug(f"Receive connected to broker")
-            await broker.subscribe(config.receive_topic)
-            logging.debug("Subscribed to receive topic")
-            async for message in broker.messages:
-                parsed_message = parser.parse_message(message.payload)
-                if not parsed_message:
-                    continue
-                if isinstance(parsed_message, MeshtasticTextMessage):
-                    logging.info(
-                        f"Received text message: {parsed_message.text} from {parsed_message.sender}"
-                    )
-                    await command_event_source.signal.dispatch(
-                        parsed_message.text, parsed_message.sender
-                    )
-                else:
-                    logging.warning(f"Received unknown message: {parsed_message.type}")
+        async with anyio.create_task_group() as tg:
+            for _ in range(self.command_workers):
+                tg.start_soon(self.command_worker, command_event_source)
+
+    async def command_worker(self, command_event_source: CommandEventSource) -> None:
+        while True:
+            text, sender = await self.commands.get()
+            self.command_wait.observe(self.commands.last_wait)
+            try:
+                await command_event_source.signal.dispatch(text, sender)
+            except Exception:
+                logging.exception("Error handling command from %s", sender)
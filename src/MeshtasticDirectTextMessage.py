@@ -0,0 +1,18 @@
+from meshage.config import MQTTConfig
+from meshage.messages import MeshtasticTextMessage
+from meshtastic.protobuf import mesh_pb2
+
+
+class MeshtasticDirectTextMessage(MeshtasticTextMessage):
+    """A text message addressed to one node instead of the whole channel."""
+
+    def __init__(self, payload: str, config: MQTTConfig, destination: int):
+        super().__init__(payload, config)
+        self.destination = destination
+
+    def packet(self) -> mesh_pb2.MeshPacket:
+        packet = super().packet()
+        # The destination is not part of the nonce, so the payload encrypted
+        # for the broadcast packet is still valid once it is readdressed
+        packet.to = self.destination
+        return packet
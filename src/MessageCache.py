@@ -0,0 +1,93 @@
+from collections import OrderedDict
+
+import anyio
+from meshage.config import MQTTConfig
+
+
+class MessageCache:
+    """
+    Encoded envelopes of recently sent messages, evicting the least recently
+    used.
+
+    A message whose publish failed is rebuilt from the same spots after the
+    broker comes back, and the same text may be sent again soon after. Reusing
+    the envelope saves the protobuf and AES work, and because the packet id is
+    reused with it, the mesh treats a repeat as the same packet rather than
+    airing it twice. Entries expire after max_age, so text deliberately sent
+    again later goes out as a new packet. Entries belong to the MQTTConfig
+    they were built with: a change of channel, key or node id drops them all.
+    """
+
+    def __init__(
+        self, max_size: int = 256, max_age: float = 60.0, clock=anyio.current_time
+    ):
+        assert max_size >= 0 and max_age >= 0
+        self.max_size = max_size
+        self.max_age = max_age
+        self.clock = clock
+        # (kind, text, destination) -> (time encoded, envelope)
+        self.entries: OrderedDict[tuple, tuple[float, bytes]] = OrderedDict()
+        self.config: tuple | None = None
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def fingerprint(config: MQTTConfig) -> tuple:
+        """Everything in the config that goes into an encoded envelope."""
+        return tuple(
+            config.config.get(name)
+            for name in ("root_topic", "channel", "key", "userid")
+        )
+
+    def check_config(self, config: MQTTConfig) -> None:
+        fingerprint = self.fingerprint(config)
+        if fingerprint != self.config:
+            if self.config is not None:
+                self.invalidate()
+            self.config = fingerprint
+
+    def get(
+        self,
+        config: MQTTConfig,
+        kind: str,
+        text: str | None = None,
+        destination: int | None = None,
+    ) -> bytes | None:
+        self.check_config(config)
+        key = (kind, text, destination)
+        entry = self.entries.get(key)
+        if entry is None or self.clock() - entry[0] > self.max_age:
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(
+        self,
+        config: MQTTConfig,
+        payload: bytes,
+        kind: str,
+        text: str | None = None,
+        destination: int | None = None,
+    ) -> None:
+        if not self.max_size:
+            return
+        self.check_config(config)
+        key = (kind, text, destination)
+        self.entries[key] = (self.clock(), payload)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Drop every entry, for when the envelopes they hold are stale."""
+        self.entries.clear()
+        self.invalidations += 1
@@ -0,0 +1,106 @@
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Counter:
+    def __init__(
+        self, name: str, help: str, function: Callable[[], float] | None = None
+    ):
+        self.name = name
+        self.help = help
+        self.function = function
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def samples(self) -> Iterable[str]:
+        value = self.function() if self.function else self.value
+        yield f"{self.name}_total {value}"
+
+
+class Gauge:
+    def __init__(
+        self, name: str, help: str, function: Callable[[], float] | None = None
+    ):
+        self.name = name
+        self.help = help
+        self.function = function
+        self.value = 0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def samples(self) -> Iterable[str]:
+        value = self.function() if self.function else self.value
+        yield f"{self.name} {value}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Iterable[float]):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        # One count per bucket plus the +Inf overflow, cumulated on render
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self) -> Iterable[str]:
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield f'{self.name}_bucket{{le="{bound:g}"}} {total}'
+        yield f'{self.name}_bucket{{le="+Inf"}} {self.count}'
+        yield f"{self.name}_sum {self.sum}"
+        yield f"{self.name}_count {self.count}"
+
+
+class Metrics:
+    """
+    A small registry of counters, gauges and histograms.
+
+    Each component keeps its own registry and adds it to the context, and
+    MetricsComponent renders all of them in the OpenMetrics text format.
+    Counters and gauges can take a function to read a value that is already
+    tracked elsewhere, such as a queue length, when the metrics are rendered.
+    """
+
+    def __init__(self):
+        self.metrics: dict[str, Counter | Gauge | Histogram] = {}
+
+    def add(self, metric):
+        assert metric.name not in self.metrics, f"Duplicate metric {metric.name}"
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, function=None) -> Counter:
+        return self.add(Counter(name, help, function))
+
+    def gauge(self, name: str, help: str, function=None) -> Gauge:
+        return self.add(Gauge(name, help, function))
+
+    def histogram(
+        self, name: str, help: str, buckets: Iterable[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.add(Histogram(name, help, buckets))
+
+    def render(self) -> Iterable[str]:
+        for metric in self.metrics.values():
+            yield f"# TYPE {metric.name} {type(metric).__name__.lower()}"
+            yield f"# HELP {metric.name} {metric.help}"
+            yield from metric.samples()
+
+    @staticmethod
+    def exposition(registries: Iterable["Metrics"]) -> str:
+        lines = [line for registry in registries for line in registry.render()]
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,99 @@
+import logging
+
+import anyio
+from anyio.abc import SocketStream
+from asphalt.core import Component
+
+from .Metrics import Metrics
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+class MetricsComponent(Component):
+    """
+    Serves the metrics of every component over HTTP for Prometheus to scrape.
+
+    Components add their own Metrics registry to the context; this renders all
+    of them on GET /metrics, and adds event loop lag measured by a task that
+    checks how late its sleeps wake up.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 9464,
+        lag_interval: float = 1.0,
+    ):
+        self.task_group = None
+        self.running = False
+        self.ctx = None
+        self.host = host
+        self.port = port
+        self.lag_interval = lag_interval
+        self.listener = None
+        self.metrics = Metrics()
+        self.loop_lag = self.metrics.histogram(
+            "potatastic_event_loop_lag_seconds",
+            "How late the event loop runs a task that is ready",
+            (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+        )
+
+    async def start(self, ctx) -> None:
+        self.ctx = ctx
+        ctx.add_resource(self.metrics, name="metrics")
+        self.listener = await anyio.create_tcp_listener(
+            local_host=self.host, local_port=self.port
+        )
+        self.port = self.listener.extra(anyio.abc.SocketAttribute.local_port)
+        logging.info("Serving metrics on http://%s:%d/metrics", self.host, self.port)
+
+        self.task_group = anyio.create_task_group()
+        await self.task_group.__aenter__()
+        self.running = True
+        self.task_group.start_soon(self.listener.serve, self.handle)
+        self.task_group.start_soon(self.lag_task)
+
+    async def stop(self) -> None:
+        self.running = False
+        if self.task_group:
+            self.task_group.cancel_scope.cancel()
+            await self.task_group.__aexit__(None, None, None)
+        if self.listener:
+            await self.listener.aclose()
+
+    def render(self) -> str:
+        registries = self.ctx.get_resources(Metrics)
+        return Metrics.exposition(
+            sorted(registries, key=lambda registry: list(registry.metrics))
+        )
+
+    async def handle(self, client: SocketStream) -> None:
+        async with client:
+            try:
+                with anyio.fail_after(5):
+                    request = b""
+                    while b"\r\n\r\n" not in request and len(request) < 8192:
+                        request += await client.receive()
+            except (TimeoutError, anyio.EndOfStream, anyio.BrokenResourceError):
+                return
+
+            method, _, target = request.partition(b"\r\n")[0].partition(b" ")
+            path = target.split(b" ")[0].split(b"?")[0]
+            if method == b"GET" and path == b"/metrics":
+                status, content_type = "200 OK", CONTENT_TYPE
+                body = self.render().encode()
+            else:
+                status, content_type = "404 Not Found", "text/plain"
+                body = b"Not found\n"
+            head = (
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+            )
+            await client.send(head.encode() + body)
+
+    async def lag_task(self) -> None:
+        while self.running:
+            started = anyio.current_time()
+            await anyio.sleep(self.lag_interval)
+            lag = anyio.current_time() - started - self.lag_interval
+            self.loop_lag.observe(max(lag, 0.0))
@@ -0,0 +1,111 @@
+import math
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import anyio
+
+
+class PollScheduler:
+    """
+    Fixed-rate poll timing that adapts to how busy the spot feed is.
+
+    Each poll is scheduled relative to when the previous one started, so the
+    time spent fetching does not stretch the interval. The period shrinks
+    towards min_period while many new spots are arriving, grows towards
+    max_period while the feed is quiet, and backs off exponentially after
+    errors or when the server asks for it with Retry-After.
+    """
+
+    def __init__(
+        self,
+        period: float = 30.0,
+        min_period: float = 10.0,
+        max_period: float = 300.0,
+        backoff: float = 2.0,
+        jitter: float = 0.1,
+        busy_threshold: int = 5,
+        clock=anyio.current_time,
+        sleep=anyio.sleep,
+    ):
+        assert 0 < min_period <= period <= max_period
+        assert backoff > 1
+        self.period = period
+        self.min_period = min_period
+        self.max_period = max_period
+        self.backoff = backoff
+        self.jitter = jitter
+        self.busy_threshold = busy_threshold
+        self.clock = clock
+        self.sleep = sleep
+        self.current_period = period
+        self.errors = 0
+        self.deadline: float | None = None
+
+    async def wait(self) -> None:
+        """Sleep until the next poll is due."""
+        now = self.clock()
+        if self.deadline is None or self.deadline < now:
+            # First poll, or the last one overran: start now rather than
+            # firing a burst of polls to catch up.
+            self.deadline = now
+        else:
+            await self.sleep(self.deadline - now)
+
+    def record_success(self, new_spots: int) -> float:
+        """Schedule the next poll after a successful one that found new_spots."""
+        self.errors = 0
+        if new_spots >= self.busy_threshold:
+            self.current_period = max(
+                self.min_period, self.current_period / self.backoff
+            )
+        elif new_spots > 0:
+            self.current_period = self.period
+        else:
+            self.current_period = min(
+                self.max_period, self.current_period * self.backoff
+            )
+        return self.schedule(self.jittered(self.current_period))
+
+    def record_error(self, retry_after: str | None = None) -> float:
+        """Schedule the next poll after a failed one, honouring Retry-After."""
+        self.errors += 1
+        # Past this many steps the delay is pinned at max_period anyway, and a
+        # long outage would otherwise overflow the float power
+        steps = math.ceil(math.log(self.max_period / self.current_period, self.backoff))
+        delay = self.jittered(
+            min(
+                self.max_period,
+                self.current_period * self.backoff ** min(self.errors, steps),
+            )
+        )
+        requested = self.parse_retry_after(retry_after)
+        if requested is not None:
+            delay = max(delay, requested)
+        return self.schedule(delay)
+
+    def schedule(self, delay: float) -> float:
+        if self.deadline is None:
+            self.deadline = self.clock()
+        self.deadline += delay
+        return delay
+
+    def jittered(self, delay: float) -> float:
+        # Only ever shorten the delay so max_period stays an upper bound
+        return delay * (1 - self.jitter * random.random())
+
+    @staticmethod
+    def parse_retry_after(value: str | None) -> float | None:
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
@@ -0,0 +1,73 @@
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from google.protobuf.message import DecodeError
+from meshage.config import MQTTConfig
+from meshtastic.protobuf import mesh_pb2, mqtt_pb2, portnums_pb2
+
+# A Data message starts with its portnum as field 1, a varint, so text
+# messages encrypt to a ciphertext whose first two bytes decrypt to this
+TEXT_MESSAGE_PREFIX = bytes((0x08, portnums_pb2.TEXT_MESSAGE_APP))
+
+
+class ReceiveFilter:
+    """
+    Cheap checks that drop received traffic before the full decode.
+
+    A wildcard subscription brings in telemetry, position and node info from
+    every node on the channel, and parsing, decrypting and decoding each of
+    them only to throw them away is most of the receive path's work. The
+    stages here run from cheapest to dearest: the topic, the payload size,
+    the envelope header, and finally the portnum, read by decrypting just the
+    first two bytes of the payload. check() names the stage that rejected a
+    message, or returns None for one worth handing to the parser.
+    """
+
+    STAGES = {
+        "topic": "not a protobuf message on our channel's topic",
+        "size": "too long to be a Meshtastic packet",
+        "malformed": "not a valid service envelope",
+        "self": "sent by this node",
+        "channel": "for another channel",
+        "portnum": "not a text message",
+    }
+
+    def __init__(self, config: MQTTConfig):
+        self.channel = config.config["channel"]
+        self.channel_hash = config.encoded_channel
+        self.userid = config.config["userid"]
+        self.algorithm = algorithms.AES(config.key)
+
+    def check(self, topic: str, payload: bytes) -> str | None:
+        # <root>/2/e/<channel>/<gateway>; the root may contain slashes
+        parts = topic.rsplit("/", 4)
+        if len(parts) < 5 or parts[1:4] != ["2", "e", self.channel]:
+            return "topic"
+        if len(payload) > mesh_pb2.Constants.DATA_PAYLOAD_LEN:
+            return "size"
+        try:
+            envelope = mqtt_pb2.ServiceEnvelope.FromString(payload)
+        except DecodeError:
+            return "malformed"
+        packet = envelope.packet
+        if getattr(packet, "from") == self.userid:
+            return "self"
+        if envelope.channel_id and envelope.channel_id != self.channel:
+            return "channel"
+        if packet.HasField("decoded"):
+            if packet.decoded.portnum != portnums_pb2.TEXT_MESSAGE_APP:
+                return "portnum"
+            return None
+        if not packet.encrypted:
+            return "malformed"
+        if packet.channel != self.channel_hash:
+            return "channel"
+        if self.peek(packet) != TEXT_MESSAGE_PREFIX:
+            return "portnum"
+        return None
+
+    def peek(self, packet: mesh_pb2.MeshPacket) -> bytes:
+        """Decrypt the first two bytes of a packet, as the parser would."""
+        nonce = packet.id.to_bytes(8, "little") + getattr(packet, "from").to_bytes(
+            8, "little"
+        )
+        decryptor = Cipher(self.algorithm, modes.CTR(nonce)).decryptor()
+        return decryptor.update(packet.encrypted[:2])
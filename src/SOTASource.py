@@ -0,0 +1,29 @@
+from typing import Any
+
+from .SpotSource import SpotSource
+
+
+class SOTASource(SpotSource):
+    """Summits on the Air spots, from the SOTAwatch API."""
+
+    name = "sota"
+    URL = "https://api2.sota.org.uk/api/spots/50/all"
+
+    @staticmethod
+    def normalise(record: dict[str, Any]) -> dict[str, Any] | None:
+        try:
+            return {
+                "activator": record["activatorCallsign"].upper(),
+                # SOTAwatch reports MHz; keys and bands expect kHz. Scaling
+                # is inexact in binary, so round back to the Hz it was given in
+                "frequency": round(float(record["frequency"]) * 1000, 3),
+                "grid4": "",
+                "mode": record["mode"].upper(),
+                "name": record.get("summitDetails") or "",
+                "reference": f"{record['associationCode']}/{record['summitCode']}",
+                "spotId": f"sota:{record['id']}",
+                "spotter": record.get("callsign", ""),
+                "spotTime": record["timeStamp"],
+            }
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return None
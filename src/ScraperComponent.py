@@ -1,25 +1,130 @@
 import logging
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+from typing import Any
 
 import anyio
-import requests
+import httpx
 from asphalt.core import Component, current_context
 
+from .DedupePolicy import DedupePolicy
+from .Metrics import COUNT_BUCKETS, Metrics
 from .NewSpotEventSource import NewSpotEventSource
+from .PollScheduler import PollScheduler
+from .SOTASource import SOTASource
 from .Spot import Spot
-from .State import State
+from .SpotDiff import SpotDiff
+from .SpotSource import SpotSource
+from .SpotStore import SpotStore
+from .WWFFSource import WWFFSource
+
+SOURCE_TYPES: dict[str, type[SpotSource]] = {
+    source.name: source for source in (SpotSource, SOTASource, WWFFSource)
+}
 
 
 class ScraperComponent(Component):
-    SPOT_URL = "https://api.pota.app/v1/spots"
+    """
+    Polls the spot feeds and dispatches spots that have not been seen before.
+
+    The POTA feed configured by spot_url is always polled; sources adds more
+    feeds, each a dict with a type from SOURCE_TYPES and SpotSource arguments.
+    Every source runs in its own task on its own schedule, with an optional
+    timeout for the whole scrape, so a slow feed never holds up the others.
+    They all diff into the one spot store under the same dedupe policy, so a
+    spot listed by several feeds is only announced once.
+    """
+
+    SPOT_URL = SpotSource.URL
     FETCH_PERIOD = 30
 
-    def __init__(self):
+    def __init__(
+        self,
+        spot_url: str = SPOT_URL,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 15.0,
+        max_connections: int = 4,
+        fetch_period: float = FETCH_PERIOD,
+        min_fetch_period: float = 10.0,
+        max_fetch_period: float = 300.0,
+        fetch_backoff: float = 2.0,
+        max_spots: int = 10000,
+        spot_ttl: float = 3600,
+        stream: bool = False,
+        dedupe_tolerance: float = 0.0,
+        dedupe_reference: bool = False,
+        reannounce_after: float | None = None,
+        sources: list[dict[str, Any]] | None = None,
+    ):
         self.task_group = None
         self.running = False
+        self.spot_url = spot_url
+        self.stream = stream
+        self.max_spots = max_spots
+        self.spot_ttl = timedelta(seconds=spot_ttl)
+        self.dedupe = DedupePolicy(dedupe_tolerance, dedupe_reference, reannounce_after)
+        self.sources = [
+            SpotSource(
+                spot_url,
+                fetch_period,
+                min_fetch_period,
+                max_fetch_period,
+                fetch_backoff,
+                stream=stream,
+            )
+        ]
+        for config in sources or ():
+            config = dict(config)
+            self.sources.append(SOURCE_TYPES[config.pop("type")](**config))
+        # A single pooled client keeps the TLS connections to the APIs alive
+        # between polls instead of reconnecting every FETCH_PERIOD.
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                read_timeout, connect=connect_timeout, pool=connect_timeout
+            ),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+        self.metrics = Metrics()
+        self.scrape_seconds = self.metrics.histogram(
+            "potatastic_scrape_duration_seconds",
+            "Time taken to fetch and diff the spot feed",
+        )
+        self.scrape_spots = self.metrics.histogram(
+            "potatastic_scrape_spots", "Spots in the feed at each scrape", COUNT_BUCKETS
+        )
+        self.scrape_new_spots = self.metrics.histogram(
+            "potatastic_scrape_new_spots",
+            "New spots found by each scrape",
+            COUNT_BUCKETS,
+        )
+        self.scrape_errors = self.metrics.counter(
+            "potatastic_scrape_errors", "Scrapes that failed"
+        )
+        self.metrics.counter(
+            "potatastic_scrape_bytes_saved",
+            "Bytes not downloaded thanks to compression and conditional requests",
+            lambda: self.bytes_saved,
+        )
 
     async def start(self, ctx) -> None:
+        spots = SpotStore(self.max_spots, self.spot_ttl)
         ctx.add_resource(NewSpotEventSource())
-        ctx.add_resource({}, name="spots", types=dict[str, Spot])
+        ctx.add_resource(spots, name="spots", types=SpotStore)
+        # Shared with streaming sources so they dedupe the same way
+        ctx.add_resource(self.dedupe)
+        self.metrics.gauge(
+            "potatastic_spot_store_size", "Spots held in the spot store", spots.__len__
+        )
+        self.metrics.counter(
+            "potatastic_spot_store_evicted",
+            "Spots evicted from the full spot store",
+            lambda: spots.evicted,
+        )
+        ctx.add_resource(self.metrics, name="scraper")
 
         self.task_group = anyio.create_task_group()
         await self.task_group.__aenter__()
@@ -30,19 +135,42 @@ class ScraperComponent(Component):
         self.running = False
         if self.task_group:
             await self.task_group.__aexit__(None, None, None)
+        await self.client.aclose()
+
+    # The POTA source configured directly on the component
+    @property
+    def scheduler(self) -> PollScheduler:
+        return self.sources[0].scheduler
+
+    @property
+    def etag(self) -> str | None:
+        return self.sources[0].etag
+
+    @etag.setter
+    def etag(self, etag: str | None) -> None:
+        self.sources[0].etag = etag
+
+    @property
+    def bytes_saved(self) -> int:
+        return sum(source.bytes_saved for source in self.sources)
 
-    def get_spot_reports(self) -> list[Spot]:
-        return [Spot(spot) for spot in requests.get(self.SPOT_URL).json()]
+    @property
+    def parses_skipped(self) -> int:
+        return sum(source.parses_skipped for source in self.sources)
 
-    def get_new_spots(self, spots: dict[str, Spot], scrape: list[Spot]) -> list[Spot]:
-        added = []
-        for new_spot in scrape:
-            if new_spot.key not in spots:
-                # Must be a new one
-                spots[new_spot.key] = new_spot
-                added.append(new_spot)
-                logging.debug(f"New spot: {new_spot.key}")
-        return added
+    async def get_spot_reports(self) -> list[dict[str, Any]] | None:
+        """Fetch the current POTA spot records, or None if unchanged."""
+        return await self.sources[0].get_spot_reports(self.client)
+
+    async def scrape(
+        self,
+        spots: SpotStore,
+        dispatch: Callable[[Spot], Awaitable[Any]],
+        source: SpotSource | None = None,
+    ) -> SpotDiff | None:
+        """Fetch and diff one scrape of a source, the POTA feed by default."""
+        source = source or self.sources[0]
+        return await source.scrape(self.client, spots, dispatch, self.dedupe)
 
     async def task(self) -> None:
         logging.info("Starting scraper task")
@@ -50,26 +178,58 @@ class ScraperComponent(Component):
             NewSpotEventSource
         )
         assert new_spot_event_source is not None
-        spots = await current_context().request_resource(dict[str, Spot], "spots")
+        spots = await current_context().request_resource(SpotStore, "spots")
         assert spots is not None
-        state = await current_context().request_resource(State)
-        assert state is not None
 
-        while self.running:
-            try:
-                logging.debug("Fetching spot reports...")
-                scrape = self.get_spot_reports()
-                added = self.get_new_spots(spots, scrape)
-                logging.info(f"Retrieved {len(scrape)} spot reports, {len(added)} new")
+        async def dispatch(spot: Spot) -> None:
+            logging.debug("New spot: %s", spot.key)
+            await new_spot_event_source.signal.dispatch(spot)
 
-                for spot in scrape:
-                    spots[spot.key] = spot
+        async with anyio.create_task_group() as tg:
+            for source in self.sources:
+                tg.start_soon(self.source_task, source, spots, dispatch)
 
-                if state.enabled:
-                    for spot in added:
-                        await new_spot_event_source.signal.dispatch(spot)
+    async def source_task(
+        self,
+        source: SpotSource,
+        spots: SpotStore,
+        dispatch: Callable[[Spot], Awaitable[Any]],
+    ) -> None:
+        while self.running:
+            await source.scheduler.wait()
+            started = anyio.current_time()
+            try:
+                expired = spots.expire()
+                if expired:
+                    logging.debug("Expired %d old spots", expired)
 
+                logging.debug("Fetching %s spot reports...", source.name)
+                with anyio.fail_after(source.timeout):
+                    diff = await self.scrape(spots, dispatch, source)
+                self.scrape_seconds.observe(anyio.current_time() - started)
+                if diff is None:
+                    logging.debug("%s spot reports unchanged", source.name)
+                    self.scrape_spots.observe(len(source.previous_keys))
+                    self.scrape_new_spots.observe(0)
+                    source.scheduler.record_success(0)
+                    continue
+                source.previous_keys = diff.seen
+                self.scrape_spots.observe(len(diff.seen))
+                self.scrape_new_spots.observe(len(diff.added))
+                logging.info(
+                    "Retrieved %d %s spot reports, %d new, %d updated, %d expired",
+                    len(diff.seen),
+                    source.name,
+                    len(diff.added),
+                    len(diff.updated),
+                    len(diff.expired),
+                )
+                source.scheduler.record_success(len(diff.added))
+            except httpx.HTTPStatusError as e:
+                logging.exception("Error fetching %s spot reports", source.name)
+                self.scrape_errors.inc()
+                source.scheduler.record_error(e.response.headers.get("Retry-After"))
             except Exception:
-                logging.exception("Error fetching spot reports")
-            finally:
-                await anyio.sleep(self.FETCH_PERIOD)
+                logging.exception("Error fetching %s spot reports", source.name)
+                self.scrape_errors.inc()
+                source.scheduler.record_error()
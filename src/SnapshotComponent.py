@@ -0,0 +1,151 @@
+import gzip
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timezone
+
+import anyio
+from asphalt.core import Component
+
+from .Metrics import Metrics
+from .Spot import Spot
+from .SpotStore import SpotStore
+from .State import State
+from .Subscription import Subscription
+from .Subscriptions import Subscriptions
+
+SNAPSHOT_VERSION = 2
+
+
+class SnapshotComponent(Component):
+    """
+    Keeps a snapshot of the application state on disk for warm restarts.
+
+    The snapshot holds the spots that have already been published, whether
+    channel publishing is enabled and every user's subscriptions, as gzipped
+    JSON. It is written every interval and on shutdown, to a temporary file
+    that then replaces the old snapshot, so a crash mid-write leaves the
+    previous one intact. Restoring the published spots into the store means
+    the first scrape after a restart finds them already known and does not
+    announce them again.
+    """
+
+    def __init__(self, path: str, interval: float = 60.0):
+        self.task_group = None
+        self.running = False
+        self.path = path
+        self.interval = interval
+        self.spots: SpotStore | None = None
+        self.state: State | None = None
+        self.subscriptions: Subscriptions | None = None
+
+        self.metrics = Metrics()
+        self.save_seconds = self.metrics.histogram(
+            "potatastic_snapshot_duration_seconds", "Time taken to save a snapshot"
+        )
+        self.save_errors = self.metrics.counter(
+            "potatastic_snapshot_errors", "Snapshots that failed to save"
+        )
+
+    async def start(self, ctx) -> None:
+        # The other components add these before their first await and start
+        # ahead of this one, so the restore is done before the first scrape
+        self.spots = await ctx.request_resource(SpotStore, "spots")
+        self.state = await ctx.request_resource(State)
+        self.subscriptions = await ctx.request_resource(Subscriptions)
+        self.restore()
+        ctx.add_resource(self.metrics, name="snapshot")
+        # Save once more as the application shuts down
+        ctx.add_teardown_callback(self.save)
+
+        self.task_group = anyio.create_task_group()
+        await self.task_group.__aenter__()
+        self.running = True
+        self.task_group.start_soon(self.task)
+
+    async def stop(self) -> None:
+        self.running = False
+        if self.task_group:
+            self.task_group.cancel_scope.cancel()
+            await self.task_group.__aexit__(None, None, None)
+
+    def snapshot(self) -> dict:
+        return {
+            "version": SNAPSHOT_VERSION,
+            "saved": datetime.now(timezone.utc).isoformat(),
+            "enabled": self.state.enabled,
+            "spots": [
+                dict(spot.record(), key=spot.key, published=spot.published.isoformat())
+                for spot in self.spots.values()
+                if spot.published
+            ],
+            "subscriptions": [
+                subscription.criteria() for subscription in self.subscriptions
+            ],
+        }
+
+    def restore(self) -> None:
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as file:
+                snapshot = json.load(file)
+        except FileNotFoundError:
+            logging.info("No snapshot at %s, starting cold", self.path)
+            return
+        except (OSError, ValueError) as e:
+            logging.warning("Ignoring unreadable snapshot %s: %s", self.path, e)
+            return
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            logging.warning("Ignoring snapshot version %s", snapshot.get("version"))
+            return
+
+        self.state.enabled = snapshot["enabled"]
+        for record in snapshot["spots"]:
+            spot = Spot(record, record["key"])
+            spot.published = datetime.fromisoformat(record["published"])
+            self.spots[spot.key] = spot
+        for criteria in snapshot["subscriptions"]:
+            try:
+                self.subscriptions.add(Subscription(**criteria))
+            except ValueError as e:
+                logging.warning("Dropping restored subscription: %s", e)
+        logging.info(
+            "Restored %d spots and %d subscriptions from snapshot saved %s",
+            len(snapshot["spots"]),
+            len(snapshot["subscriptions"]),
+            snapshot["saved"],
+        )
+
+    def write(self, data: bytes) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temporary = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    async def save(self) -> None:
+        started = anyio.current_time()
+        try:
+            # Serialise on the event loop so the snapshot is consistent, and
+            # leave the blocking write and fsync to a worker thread
+            data = gzip.compress(
+                json.dumps(self.snapshot(), separators=(",", ":")).encode()
+            )
+            await anyio.to_thread.run_sync(self.write, data)
+        except Exception:
+            logging.exception("Error saving snapshot to %s", self.path)
+            self.save_errors.inc()
+            return
+        self.save_seconds.observe(anyio.current_time() - started)
+        logging.debug("Saved %d byte snapshot to %s", len(data), self.path)
+
+    async def task(self) -> None:
+        while self.running:
+            await anyio.sleep(self.interval)
+            await self.save()
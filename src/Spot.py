@@ -1,22 +1,91 @@
 from datetime import datetime
+from sys import intern
 from typing import Any
 
+# Amateur band edges in kHz (ITU region 2)
+BANDS = (
+    ("2200m", 135.7, 137.8),
+    ("630m", 472, 479),
+    ("160m", 1800, 2000),
+    ("80m", 3500, 4000),
+    ("60m", 5330, 5410),
+    ("40m", 7000, 7300),
+    ("30m", 10100, 10150),
+    ("20m", 14000, 14350),
+    ("17m", 18068, 18168),
+    ("15m", 21000, 21450),
+    ("12m", 24890, 24990),
+    ("10m", 28000, 29700),
+    ("6m", 50000, 54000),
+    ("2m", 144000, 148000),
+    ("1.25m", 219000, 225000),
+    ("70cm", 420000, 450000),
+)
+
 
 class Spot:
-    def __init__(self, spot: dict[str, Any]):
-        self.callsign = spot["activator"]
+    # Spots are created by the thousand on every scrape, so skip the
+    # per-instance __dict__ and share the strings that repeat across spots.
+    __slots__ = (
+        "callsign",
+        "frequency",
+        "grid",
+        "mode",
+        "name",
+        "reference",
+        "id",
+        "spotter",
+        "timestamp",
+        "key",
+        "published",
+    )
+
+    def __init__(self, spot: dict[str, Any], key: str | None = None):
+        self.callsign = intern(spot["activator"])
         self.frequency = float(spot["frequency"])
         self.grid = spot["grid4"]
-        self.mode = spot["mode"]
+        self.mode = intern(spot["mode"])
         self.name = spot["name"]
-        self.reference = spot["reference"]
+        self.reference = intern(spot["reference"])
         self.id = spot["spotId"]
         self.spotter = spot["spotter"]
         self.timestamp = datetime.fromisoformat(spot["spotTime"])
+        self.key = key or f"{self.callsign}-{self.frequency}-{self.mode}"
+        # The spot time at which it went out, so that it is not announced
+        # again after a restart or before the re-announce interval
+        self.published: datetime | None = None
 
     def __str__(self):
         return f"{self.callsign} @ {self.frequency} {self.mode}\n{self.reference} ({self.name})"
 
+    def compact(self) -> str:
+        """Single-line form used when several spots share one message."""
+        return f"{self.callsign} {self.frequency:g} {self.mode} {self.reference}"
+
+    def record(self) -> dict[str, Any]:
+        """The API record for this spot, as accepted by the constructor."""
+        return {
+            "activator": self.callsign,
+            "frequency": self.frequency,
+            "grid4": self.grid,
+            "mode": self.mode,
+            "name": self.name,
+            "reference": self.reference,
+            "spotId": self.id,
+            "spotter": self.spotter,
+            "spotTime": self.timestamp.isoformat(),
+        }
+
+    @staticmethod
+    def record_key(spot: dict[str, Any]) -> str:
+        """Build the key for a raw spot record without constructing a Spot."""
+        return f"{spot['activator']}-{float(spot['frequency'])}-{spot['mode']}"
+
     @property
-    def key(self) -> str:
-        return f"{self.callsign}-{self.frequency}-{self.mode}"
+    def band(self) -> str | None:
+        # POTA reports kHz, but accept MHz as well
+        for frequency in (self.frequency, self.frequency * 1000):
+            for band, low, high in BANDS:
+                if low <= frequency <= high:
+                    return band
+        return None
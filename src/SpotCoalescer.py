@@ -0,0 +1,52 @@
+from .Spot import Spot
+
+
+class SpotCoalescer:
+    """
+    Packs several spots into one mesh text message.
+
+    Every message costs a packet header, encryption and a slice of airtime
+    regardless of its length, so spots waiting to go out are combined, one
+    compact line each, up to max_bytes of UTF-8 text. A lone spot keeps the
+    longer human-readable format.
+    """
+
+    def __init__(
+        self, max_bytes: int = 200, max_spots: int = 10, max_latency: float = 5.0
+    ):
+        assert max_bytes > 0 and max_spots > 0 and max_latency >= 0
+        self.max_bytes = max_bytes
+        self.max_spots = max_spots
+        self.max_latency = max_latency
+
+    @staticmethod
+    def line(spot: Spot) -> str:
+        return spot.compact()
+
+    def size(self, spots: list[Spot]) -> int:
+        return sum(len(self.line(spot).encode()) + 1 for spot in spots) - 1
+
+    def has_room(self, spots: list[Spot]) -> bool:
+        """Whether another spot could still be added to this batch."""
+        return len(spots) < self.max_spots and self.size(spots) < self.max_bytes
+
+    def pack(self, spots: list[Spot]) -> tuple[str, list[Spot]]:
+        """
+        Build one message from the front of spots, returning its text and the
+        spots that did not fit.
+        """
+        assert spots
+        lines = [self.line(spots[0])]
+        used = len(lines[0].encode())
+        count = 1
+        for spot in spots[1 : self.max_spots]:
+            line = self.line(spot)
+            if used + 1 + len(line.encode()) > self.max_bytes:
+                break
+            lines.append(line)
+            used += 1 + len(line.encode())
+            count += 1
+
+        if count == 1:
+            return str(spots[0]), spots[1:]
+        return "\n".join(lines), spots[count:]
@@ -0,0 +1,90 @@
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any
+
+from .DedupePolicy import DedupePolicy
+from .Spot import Spot
+from .SpotStore import SpotStore
+
+
+class SpotDiff:
+    """
+    Changes between the spot store and one scrape of raw spot records.
+
+    Records are compared by key first and only turned into Spot objects when
+    they are new or their spot ID changed, so an unchanged scrape costs one
+    key extraction per record. The store is updated as records are fed in.
+    What counts as the same spot is up to the dedupe policy.
+    """
+
+    def __init__(
+        self,
+        spots: SpotStore,
+        previous: set[str] | None = None,
+        policy: DedupePolicy | None = None,
+        now: datetime | None = None,
+    ):
+        self.spots = spots
+        self.previous = previous or set()
+        self.policy = policy or DedupePolicy()
+        self.find = self.policy.finder(spots.spots)
+        self.seen: set[str] = set()
+        self.added: list[Spot] = []
+        self.updated: list[Spot] = []
+        self.expired: set[str] = set()
+        # Records already past the TTL would be expired before the next
+        # scrape and announced again by it, so they are never added
+        self.cutoff = spots.cutoff(now)
+        self.stale = 0
+
+    @classmethod
+    def compute(
+        cls,
+        spots: SpotStore,
+        records: Iterable[dict[str, Any]],
+        previous: set[str] | None = None,
+        policy: DedupePolicy | None = None,
+        now: datetime | None = None,
+    ) -> "SpotDiff":
+        diff = cls(spots, previous, policy, now)
+        feed = diff.feed
+        for record in records:
+            feed(record)
+        return diff.finish()
+
+    def feed(self, record: dict[str, Any]) -> Spot | None:
+        """Apply one record to the store, returning the Spot if it is new."""
+        key = self.find(record)
+        if key in self.seen:
+            return None
+        self.seen.add(key)
+
+        # Go straight to the underlying OrderedDict on this hot path
+        existing = self.spots.spots.get(key)
+        if existing is None:
+            spot = Spot(record, key)
+            if self.spots.utc(spot.timestamp) < self.cutoff:
+                self.stale += 1
+                return None
+            self.spots[key] = spot
+            self.added.append(spot)
+            return spot
+
+        if existing.id != record["spotId"]:
+            spot = Spot(record, key)
+            spot.published = existing.published
+            self.spots[key] = spot
+            if self.policy.reannounce(spot):
+                # Not marked published again until it has actually gone out
+                spot.published = None
+                self.added.append(spot)
+                return spot
+            self.updated.append(spot)
+        else:
+            self.spots.spots.move_to_end(key)
+        return None
+
+    def finish(self) -> "SpotDiff":
+        """Work out which keys from the previous scrape have disappeared."""
+        self.expired = self.previous - self.seen
+        return self
@@ -0,0 +1,170 @@
+import hashlib
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import Any
+
+import httpx
+
+from .DedupePolicy import DedupePolicy
+from .JSONArrayParser import JSONArrayParser
+from .PollScheduler import PollScheduler
+from .Spot import Spot
+from .SpotDiff import SpotDiff
+from .SpotStore import SpotStore
+
+
+class SpotSource:
+    """
+    One spot feed, polled on its own schedule.
+
+    Each source keeps its own conditional request validators, body digest
+    and poll scheduler, so feeds that change at different rates or misbehave
+    do not affect each other. Records are handed on in the POTA API format;
+    sources with another format translate each record with normalise, which
+    returns None for records that cannot be used.
+    """
+
+    name = "pota"
+    URL = "https://api.pota.app/v1/spots"
+    # POTA records are already in the format Spot expects
+    normalise: Callable[[dict[str, Any]], dict[str, Any] | None] | None = None
+
+    def __init__(
+        self,
+        url: str | None = None,
+        fetch_period: float = 30.0,
+        min_fetch_period: float = 10.0,
+        max_fetch_period: float = 300.0,
+        fetch_backoff: float = 2.0,
+        timeout: float | None = None,
+        stream: bool = False,
+    ):
+        self.url = url or self.URL
+        self.timeout = timeout
+        self.stream = stream
+        self.scheduler = PollScheduler(
+            period=fetch_period,
+            min_period=min_fetch_period,
+            max_period=max_fetch_period,
+            backoff=fetch_backoff,
+        )
+        # Validators and digest of the last body that was parsed in full, so
+        # unchanged polls can be answered with a 304 or skipped before JSON
+        # decoding. A body that fails part-way leaves them as they were.
+        self.etag = None
+        self.last_modified = None
+        self.body_digest = None
+        self.body_size = 0
+        self.bytes_saved = 0
+        self.parses_skipped = 0
+        # Keys returned by the previous scrape, for reporting expired spots
+        self.previous_keys: set[str] = set()
+
+    def conditional_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def check_modified(self, response: httpx.Response) -> bool:
+        """Record the outcome of a conditional request; False on a 304."""
+        if response.status_code == httpx.codes.NOT_MODIFIED:
+            self.bytes_saved += self.body_size
+            self.parses_skipped += 1
+            return False
+        response.raise_for_status()
+        return True
+
+    def save_validators(self, response: httpx.Response) -> None:
+        """Remember a response's validators once its whole body has been used."""
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+
+    async def get_spot_reports(
+        self, client: httpx.AsyncClient
+    ) -> list[dict[str, Any]] | None:
+        """Fetch the current spot records, or None if they have not changed."""
+        # httpx advertises gzip/deflate, plus br when brotli is installed
+        response = await client.get(self.url, headers=self.conditional_headers())
+        if not self.check_modified(response):
+            return None
+
+        body = response.content
+        self.bytes_saved += max(len(body) - response.num_bytes_downloaded, 0)
+        self.body_size = len(body)
+
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        if digest == self.body_digest:
+            self.parses_skipped += 1
+            return None
+
+        records = response.json()
+        if self.normalise is not None:
+            records = [
+                record for record in map(self.normalise, records) if record is not None
+            ]
+        self.body_digest = digest
+        self.save_validators(response)
+        return records
+
+    @asynccontextmanager
+    async def stream_spot_reports(
+        self, client: httpx.AsyncClient
+    ) -> AsyncIterator[AsyncIterator[dict[str, Any]] | None]:
+        """
+        Open the spot feed and yield its records one at a time as they arrive,
+        or None if it has not changed. The body digest check does not apply
+        here since records are handed on before the body is complete.
+        """
+        async with client.stream(
+            "GET", self.url, headers=self.conditional_headers()
+        ) as response:
+            if not self.check_modified(response):
+                yield None
+                return
+
+            async def records() -> AsyncIterator[dict[str, Any]]:
+                parser = JSONArrayParser()
+                async for chunk in response.aiter_bytes():
+                    for record in parser.feed(chunk):
+                        if self.normalise is not None:
+                            record = self.normalise(record)
+                            if record is None:
+                                continue
+                        yield record
+                parser.close()
+                self.bytes_saved += max(parser.size - response.num_bytes_downloaded, 0)
+                self.body_size = parser.size
+                # Every record has been fed to the diff by the time we get here
+                self.save_validators(response)
+
+            yield records()
+
+    async def scrape(
+        self,
+        client: httpx.AsyncClient,
+        spots: SpotStore,
+        dispatch: Callable[[Spot], Awaitable[Any]],
+        policy: DedupePolicy | None = None,
+    ) -> SpotDiff | None:
+        """Fetch and diff one scrape, passing each new spot to dispatch."""
+        if self.stream:
+            async with self.stream_spot_reports(client) as records:
+                if records is None:
+                    return None
+                diff = SpotDiff(spots, self.previous_keys, policy)
+                async for record in records:
+                    spot = diff.feed(record)
+                    if spot is not None:
+                        await dispatch(spot)
+                return diff.finish()
+
+        records = await self.get_spot_reports(client)
+        if records is None:
+            return None
+        diff = SpotDiff.compute(spots, records, self.previous_keys, policy)
+        for spot in diff.added:
+            await dispatch(spot)
+        return diff
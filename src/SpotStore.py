@@ -0,0 +1,91 @@
+import heapq
+from collections import OrderedDict
+from collections.abc import Iterator, MutableMapping
+from datetime import datetime, timedelta, timezone
+
+from .Spot import Spot
+
+
+class SpotStore(MutableMapping[str, Spot]):
+    """
+    A dict-like store of known spots, bounded in both size and age.
+
+    Entries are kept in least-recently-seen order, so writing a spot moves it
+    to the back and the store evicts from the front in O(1) once it grows past
+    max_size. Spots whose timestamp is older than ttl are dropped by expire(),
+    which pops from a heap of timestamps and only touches expired entries.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: timedelta = timedelta(hours=1)):
+        assert max_size > 0
+        self.max_size = max_size
+        self.ttl = ttl
+        self.spots: OrderedDict[str, Spot] = OrderedDict()
+        # (timestamp, key) pairs; stale pairs are skipped lazily on expiry
+        self.expiry: list[tuple[datetime, str]] = []
+        self.evicted = 0
+        self.expired = 0
+
+    def __getitem__(self, key: str) -> Spot:
+        return self.spots[key]
+
+    def __setitem__(self, key: str, spot: Spot) -> None:
+        previous = self.spots.get(key)
+        self.spots[key] = spot
+        self.spots.move_to_end(key)
+        if previous is None or previous.timestamp != spot.timestamp:
+            heapq.heappush(self.expiry, (self.utc(spot.timestamp), key))
+        while len(self.spots) > self.max_size:
+            self.spots.popitem(last=False)
+            self.evicted += 1
+        if len(self.expiry) > 2 * len(self.spots) + 64:
+            self.compact()
+
+    def __delitem__(self, key: str) -> None:
+        del self.spots[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self.spots
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.spots)
+
+    def __len__(self) -> int:
+        return len(self.spots)
+
+    def touch(self, key: str) -> None:
+        """Mark a spot as seen without replacing it."""
+        self.spots.move_to_end(key)
+
+    def cutoff(self, now: datetime | None = None) -> datetime:
+        """The oldest spot time that is not yet expired, as naive UTC."""
+        if now is None:
+            now = datetime.now(timezone.utc)
+        return self.utc(now) - self.ttl
+
+    def expire(self, now: datetime | None = None) -> int:
+        """Drop spots older than the TTL, returning how many were removed."""
+        cutoff = self.cutoff(now)
+        removed = 0
+        while self.expiry and self.expiry[0][0] < cutoff:
+            timestamp, key = heapq.heappop(self.expiry)
+            spot = self.spots.get(key)
+            if spot is not None and self.utc(spot.timestamp) == timestamp:
+                del self.spots[key]
+                removed += 1
+        self.expired += removed
+        return removed
+
+    def compact(self) -> None:
+        """Rebuild the expiry heap without entries for replaced or evicted spots."""
+        self.expiry = [
+            (self.utc(spot.timestamp), key) for key, spot in self.spots.items()
+        ]
+        heapq.heapify(self.expiry)
+
+    @staticmethod
+    def utc(timestamp: datetime) -> datetime:
+        # The POTA API reports naive UTC times; normalise aware ones to match
+        if timestamp.tzinfo is not None:
+            return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        return timestamp
@@ -0,0 +1,158 @@
+import math
+from functools import cache
+
+from .Spot import BANDS, Spot
+
+EARTH_RADIUS_KM = 6371.0
+DEFAULT_RADIUS_KM = 500.0
+
+
+class Subscription:
+    """
+    A spot filter registered by one mesh user. Every criterion that is set
+    must match; a user with several subscriptions gets spots matching any.
+    """
+
+    __slots__ = (
+        "user_id",
+        "band",
+        "mode",
+        "prefix",
+        "callsign",
+        "grid",
+        "radius",
+        "position",
+    )
+
+    def __init__(
+        self,
+        user_id: int,
+        band: str | None = None,
+        mode: str | None = None,
+        prefix: str | None = None,
+        callsign: str | None = None,
+        grid: str | None = None,
+        radius: float = DEFAULT_RADIUS_KM,
+    ):
+        self.user_id = user_id
+        self.band = band.lower() if band else None
+        self.mode = mode.upper() if mode else None
+        self.prefix = prefix.upper() if prefix else None
+        self.callsign = callsign.upper() if callsign else None
+        self.grid = grid.upper() if grid else None
+        self.radius = radius
+        self.position = self.grid_location(self.grid) if self.grid else None
+
+    @classmethod
+    def parse(cls, user_id: int, args: list[str]) -> "Subscription":
+        """
+        Build a subscription from command arguments such as
+        "band 20m mode CW", "ref K-" or "grid FN42 300".
+        """
+        criteria: dict = {}
+        args = list(args)
+        while args:
+            name = args.pop(0).lower()
+            if not args:
+                raise ValueError(f"Missing value for {name}")
+            value = args.pop(0)
+            if name == "band":
+                if value.lower() not in {band for band, _, _ in BANDS}:
+                    raise ValueError(f"Unknown band: {value}")
+                criteria["band"] = value
+            elif name == "mode":
+                criteria["mode"] = value
+            elif name in ("ref", "prefix"):
+                criteria["prefix"] = value
+            elif name in ("call", "callsign"):
+                criteria["callsign"] = value
+            elif name == "grid":
+                cls.grid_location(value)
+                criteria["grid"] = value
+                if args and args[0].replace(".", "", 1).isdigit():
+                    criteria["radius"] = float(args.pop(0))
+            else:
+                raise ValueError(f"Unknown filter: {name}")
+        if not criteria:
+            raise ValueError("No filter given")
+        return cls(user_id, **criteria)
+
+    def criteria(self) -> dict:
+        """Constructor arguments that rebuild this subscription."""
+        return {
+            "user_id": self.user_id,
+            "band": self.band,
+            "mode": self.mode,
+            "prefix": self.prefix,
+            "callsign": self.callsign,
+            "grid": self.grid,
+            "radius": self.radius,
+        }
+
+    def matches(self, spot: Spot) -> bool:
+        if self.callsign and spot.callsign.upper() != self.callsign:
+            return False
+        if self.prefix and not spot.reference.upper().startswith(self.prefix):
+            return False
+        if self.band and spot.band != self.band:
+            return False
+        if self.mode and spot.mode.upper() != self.mode:
+            return False
+        if self.grid:
+            try:
+                position = self.grid_location(spot.grid)
+            except ValueError:
+                return False
+            if self.distance(self.position, position) > self.radius:
+                return False
+        return True
+
+    def __str__(self) -> str:
+        parts = []
+        for name, value in (
+            ("call", self.callsign),
+            ("ref", self.prefix),
+            ("band", self.band),
+            ("mode", self.mode),
+            ("grid", self.grid),
+        ):
+            if value:
+                parts.append(f"{name} {value}")
+        if self.grid:
+            parts.append(f"{self.radius:g}")
+        return " ".join(parts)
+
+    @staticmethod
+    @cache
+    def grid_location(grid: str) -> tuple[float, float]:
+        """Latitude and longitude of the centre of a 4 or 6 character grid."""
+        if not grid:
+            raise ValueError("No grid")
+        grid = grid.upper()
+        if len(grid) not in (4, 6) or not (
+            "A" <= grid[0] <= "R"
+            and "A" <= grid[1] <= "R"
+            and grid[2:4].isdigit()
+            and (len(grid) == 4 or ("A" <= grid[4] <= "X" and "A" <= grid[5] <= "X"))
+        ):
+            raise ValueError(f"Invalid grid: {grid}")
+        lon = (ord(grid[0]) - ord("A")) * 20 - 180 + int(grid[2]) * 2
+        lat = (ord(grid[1]) - ord("A")) * 10 - 90 + int(grid[3])
+        if len(grid) == 6:
+            lon += (ord(grid[4]) - ord("A")) * 5 / 60 + 2.5 / 60
+            lat += (ord(grid[5]) - ord("A")) * 2.5 / 60 + 1.25 / 60
+        else:
+            lon += 1
+            lat += 0.5
+        return lat, lon
+
+    @staticmethod
+    def distance(first: tuple[float, float], second: tuple[float, float]) -> float:
+        """Great-circle distance in km between two latitude/longitude pairs."""
+        lat1, lon1 = map(math.radians, first)
+        lat2, lon2 = map(math.radians, second)
+        a = (
+            math.sin((lat2 - lat1) / 2) ** 2
+            + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        )
+        return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
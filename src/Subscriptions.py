@@ -0,0 +1,135 @@
+import math
+from collections.abc import Iterator
+
+from .Spot import Spot
+from .Subscription import EARTH_RADIUS_KM, Subscription
+
+
+class Subscriptions:
+    """
+    Every user's spot filters, indexed for matching.
+
+    Each subscription is filed under its most selective criterion: callsign,
+    then reference prefix, then band and mode together, then band, then mode.
+    Subscriptions with only a grid filter are filed under every grid field
+    (the 20 by 10 degree "FN" of "FN42") their circle reaches. Matching a
+    spot looks up only the buckets for that spot's callsign, reference
+    prefixes, band, mode and grid field, so the work depends on how many
+    subscriptions could match rather than on how many there are.
+    """
+
+    def __init__(self, max_per_user: int = 10):
+        self.max_per_user = max_per_user
+        self.by_user: dict[int, list[Subscription]] = {}
+        self.by_callsign: dict[str, list[Subscription]] = {}
+        self.by_prefix: dict[str, list[Subscription]] = {}
+        self.by_band: dict[str, list[Subscription]] = {}
+        self.by_mode: dict[str, list[Subscription]] = {}
+        self.by_band_mode: dict[tuple[str, str], list[Subscription]] = {}
+        self.by_field: dict[str, list[Subscription]] = {}
+        self.unindexed: list[Subscription] = []
+        self.prefix_lengths: set[int] = set()
+
+    def __len__(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self.by_user.values())
+
+    def __iter__(self) -> Iterator[Subscription]:
+        for subscriptions in self.by_user.values():
+            yield from subscriptions
+
+    def index(self, subscription: Subscription) -> tuple[dict | None, list]:
+        """The index and keys a subscription is filed under."""
+        band_mode = (subscription.band, subscription.mode)
+        for index, key in (
+            (self.by_callsign, subscription.callsign),
+            (self.by_prefix, subscription.prefix),
+            (self.by_band_mode, band_mode if all(band_mode) else None),
+            (self.by_band, subscription.band),
+            (self.by_mode, subscription.mode),
+        ):
+            if key:
+                return index, [key]
+        if subscription.grid:
+            return self.by_field, self.grid_fields(subscription)
+        return None, []
+
+    @staticmethod
+    def grid_fields(subscription: Subscription) -> list[str]:
+        """The grid fields a grid filter's circle reaches, from its bounding box."""
+        lat, lon = subscription.position
+        angle = subscription.radius / EARTH_RADIUS_KM
+        south = lat - math.degrees(angle)
+        north = lat + math.degrees(angle)
+        if south <= -90 or north >= 90 or angle >= math.pi / 2:
+            # Over a pole, or so wide that every longitude is in reach
+            west, east = -180.0, 180.0
+        else:
+            width = math.degrees(
+                math.asin(math.sin(angle) / math.cos(math.radians(lat)))
+            )
+            west, east = lon - width, lon + width
+        columns = range(
+            math.floor((west + 180) / 20), math.floor((east + 180) / 20) + 1
+        )
+        rows = range(
+            math.floor((max(south, -90) + 90) / 10),
+            min(math.floor((min(north, 90) + 90) / 10), 17) + 1,
+        )
+        return [
+            chr(ord("A") + column) + chr(ord("A") + row)
+            for column in dict.fromkeys(column % 18 for column in columns)
+            for row in rows
+        ]
+
+    def add(self, subscription: Subscription) -> None:
+        subscriptions = self.by_user.setdefault(subscription.user_id, [])
+        if len(subscriptions) >= self.max_per_user:
+            raise ValueError(f"At most {self.max_per_user} subscriptions per user")
+        subscriptions.append(subscription)
+        index, keys = self.index(subscription)
+        if index is None:
+            self.unindexed.append(subscription)
+        for key in keys:
+            index.setdefault(key, []).append(subscription)
+        if index is self.by_prefix:
+            self.prefix_lengths.add(len(keys[0]))
+
+    def remove(self, user_id: int) -> int:
+        """Drop all of a user's subscriptions, returning how many there were."""
+        subscriptions = self.by_user.pop(user_id, [])
+        for subscription in subscriptions:
+            index, keys = self.index(subscription)
+            if index is None:
+                self.unindexed.remove(subscription)
+            for key in keys:
+                index[key].remove(subscription)
+                if not index[key]:
+                    del index[key]
+        self.prefix_lengths = {len(prefix) for prefix in self.by_prefix}
+        return len(subscriptions)
+
+    def get(self, user_id: int) -> list[Subscription]:
+        return list(self.by_user.get(user_id, ()))
+
+    def candidates(self, spot: Spot) -> Iterator[Subscription]:
+        yield from self.by_callsign.get(spot.callsign.upper(), ())
+        reference = spot.reference.upper()
+        for length in self.prefix_lengths:
+            yield from self.by_prefix.get(reference[:length], ())
+        band = spot.band
+        mode = spot.mode.upper()
+        if band:
+            yield from self.by_band_mode.get((band, mode), ())
+            yield from self.by_band.get(band, ())
+        yield from self.by_mode.get(mode, ())
+        if spot.grid:
+            yield from self.by_field.get(spot.grid[:2].upper(), ())
+        yield from self.unindexed
+
+    def match(self, spot: Spot) -> set[int]:
+        """The users with at least one subscription matching a spot."""
+        users: set[int] = set()
+        for subscription in self.candidates(spot):
+            if subscription.user_id not in users and subscription.matches(spot):
+                users.add(subscription.user_id)
+        return users
@@ -0,0 +1,51 @@
+import anyio
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter.
+
+    Tokens accumulate at rate per second up to capacity, which is the largest
+    burst that can go out back-to-back. The clock and sleep functions can be
+    replaced to drive the bucket from a fake clock in tests.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock=anyio.current_time,
+        sleep=anyio.sleep,
+    ):
+        assert rate > 0 and capacity >= 1
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = capacity
+        # Set on first use, since the default clock needs a running event loop
+        self.updated: float | None = None
+
+    def refill(self) -> None:
+        now = self.clock()
+        if self.updated is not None:
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+        self.updated = now
+
+    def delay(self, tokens: float = 1) -> float:
+        """Seconds until the given number of tokens will be available."""
+        self.refill()
+        return max(tokens - self.tokens, 0) / self.rate
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        self.refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    async def acquire(self, tokens: float = 1) -> None:
+        while not self.try_acquire(tokens):
+            await self.sleep(self.delay(tokens))
@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+from typing import Any
+
+from .SpotSource import SpotSource
+
+
+class WWFFSource(SpotSource):
+    """World Wide Flora and Fauna spots, from the WWFF spot feed."""
+
+    name = "wwff"
+    URL = "https://spots.wwff.co/static/spots.json"
+
+    @staticmethod
+    def normalise(record: dict[str, Any]) -> dict[str, Any] | None:
+        try:
+            # Spot times are Unix seconds; the POTA format is naive UTC
+            timestamp = datetime.fromtimestamp(record["spot_time"], timezone.utc)
+            return {
+                "activator": record["activator"].upper(),
+                "frequency": float(record["frequency_khz"]),
+                "grid4": "",
+                "mode": record["mode"].upper(),
+                "name": record.get("reference_name") or "",
+                "reference": record["reference"],
+                "spotId": f"wwff:{record['id']}",
+                "spotter": record.get("spotter", ""),
+                "spotTime": timestamp.replace(tzinfo=None).isoformat(),
+            }
+        except (KeyError, TypeError, ValueError, AttributeError, OverflowError):
+            return None
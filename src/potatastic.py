@@ -1,27 +1,70 @@
 #! /usr/bin/env python3
 import logging
+import os
 
 from asphalt.core import ContainerComponent, run_application
 
 from .CommandProcessorComponent import CommandProcessorComponent
+from .DXClusterComponent import DXClusterComponent
+from .JsonFormatter import JsonFormatter
 from .MeshtasticCommunicationComponent import MeshtasticCommunicationComponent
+from .MetricsComponent import MetricsComponent
 from .ScraperComponent import ScraperComponent
+from .SnapshotComponent import SnapshotComponent
+
+
+def create_container(overrides: dict[str, dict] | None = None) -> ContainerComponent:
+    """Build the application, with optional constructor arguments per component."""
+    scraper = {"type": ScraperComponent}
+    # Extra spot feeds polled alongside POTA, e.g. SPOT_SOURCES=sota,wwff
+    if os.environ.get("SPOT_SOURCES"):
+        scraper["sources"] = [
+            {"type": name.strip().lower()}
+            for name in os.environ["SPOT_SOURCES"].split(",")
+            if name.strip()
+        ]
+    components = {
+        "scraper": scraper,
+        "mqtt": {"type": MeshtasticCommunicationComponent},
+        "commands": {"type": CommandProcessorComponent},
+    }
+    # The metrics endpoint is only served when a port is configured
+    if "METRICS_PORT" in os.environ:
+        components["metrics"] = {
+            "type": MetricsComponent,
+            "host": os.environ.get("METRICS_HOST", "127.0.0.1"),
+            "port": int(os.environ["METRICS_PORT"]),
+        }
+    # Spots pushed from a DX cluster, alongside the polled feeds
+    if "DXCLUSTER_HOST" in os.environ:
+        components["dxcluster"] = {
+            "type": DXClusterComponent,
+            "host": os.environ["DXCLUSTER_HOST"],
+            "port": int(os.environ.get("DXCLUSTER_PORT", 7300)),
+            "callsign": os.environ.get("DXCLUSTER_CALLSIGN", "N0CALL"),
+        }
+    # Snapshots for warm restarts are only kept when given somewhere to go
+    if "SNAPSHOT_PATH" in os.environ:
+        components["snapshot"] = {
+            "type": SnapshotComponent,
+            "path": os.environ["SNAPSHOT_PATH"],
+        }
+    for alias, config in (overrides or {}).items():
+        components.setdefault(alias, {}).update(config)
+    return ContainerComponent(components)
 
 
 def main():
+    handler = logging.StreamHandler()
+    if os.environ.get("LOG_FORMAT", "text").lower() == "json":
+        handler.setFormatter(JsonFormatter())
     logging.basicConfig(
-        format="%(asctime)s %(levelname)s:%(message)s", level=logging.DEBUG
+        format="%(asctime)s %(levelname)s:%(message)s",
+        level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+        handlers=[handler],
     )
     # Start all components using ContainerComponent
-    run_application(
-        ContainerComponent(
-            {
-                "scraper": {"type": ScraperComponent},
-                "mqtt": {"type": MeshtasticCommunicationComponent},
-                "commands": {"type": CommandProcessorComponent},
-            }
-        )
-    )
+    run_application(create_container())
 
 
 if __name__ == "__main__":
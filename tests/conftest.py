@@ -7,6 +7,8 @@ from unittest.mock import Mock
 
 import pytest
 
+from benchmarks.mqtt_broker import MQTTBroker
+
 
 @pytest.fixture
 def sample_spot_data():
@@ -93,6 +95,37 @@ def event_loop():
     loop.close()
 
 
+class FakeClock:
+    """Manually advanced clock whose sleep moves time forward instantly."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+@pytest.fixture
+def fake_clock():
+    """Fake clock for testing timing logic without waiting."""
+    return FakeClock()
+
+
+@pytest.fixture
+async def mqtt_broker():
+    """In-process MQTT broker that tests can stop and restart."""
+    broker = MQTTBroker()
+    await broker.start()
+    yield broker
+    if broker.server.is_serving():
+        await broker.stop()
+
+
 @pytest.fixture
 def mock_requests_response():
     """Mock requests response for API testing."""
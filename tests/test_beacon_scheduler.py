@@ -0,0 +1,66 @@
+import pytest
+
+from src.BeaconScheduler import BeaconScheduler
+
+
+class TestBeaconScheduler:
+    def make_scheduler(self, fake_clock, random=0.5, **kwargs):
+        return BeaconScheduler(
+            clock=fake_clock, sleep=fake_clock.sleep, random=lambda: random, **kwargs
+        )
+
+    @pytest.mark.asyncio
+    async def test_waits_one_interval(self, fake_clock):
+        """Test that the first beacon is due one interval after the last send."""
+        scheduler = self.make_scheduler(fake_clock, interval=600)
+        scheduler.sent()
+
+        await scheduler.wait()
+
+        assert fake_clock.now == 1600
+        assert scheduler.last == 1000
+
+    @pytest.mark.parametrize("random, delay", [(0.0, 540), (1.0, 660)])
+    @pytest.mark.asyncio
+    async def test_jitter_spreads_beacons(self, fake_clock, random, delay):
+        """Test that the interval is moved by up to the jitter either way."""
+        scheduler = self.make_scheduler(
+            fake_clock, random=random, interval=600, jitter=0.1
+        )
+
+        await scheduler.wait()
+
+        assert fake_clock.sleeps == [pytest.approx(delay)]
+
+    @pytest.mark.asyncio
+    async def test_recent_node_info_suppresses_beacon(self, fake_clock):
+        """Test that node info sent while waiting pushes the beacon back."""
+        scheduler = self.make_scheduler(fake_clock, interval=600)
+        scheduler.sent()
+        sleep = fake_clock.sleep
+
+        async def sleep_and_send_midway(delay):
+            # Node info goes out 300s into the first wait
+            fake_clock.now += 300
+            scheduler.sent()
+            fake_clock.now += delay - 300
+            scheduler.sleep = sleep
+
+        scheduler.sleep = sleep_and_send_midway
+
+        await scheduler.wait()
+
+        assert fake_clock.now == 1900
+        assert scheduler.last == 1300
+        assert scheduler.suppressed == 1
+
+    @pytest.mark.asyncio
+    async def test_overdue_beacon_goes_straight_away(self, fake_clock):
+        """Test that a beacon already overdue does not wait another interval."""
+        scheduler = self.make_scheduler(fake_clock, interval=600)
+        scheduler.sent()
+        fake_clock.now += 1000
+
+        await scheduler.wait()
+
+        assert fake_clock.sleeps == []
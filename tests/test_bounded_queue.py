@@ -0,0 +1,147 @@
+import random
+
+import anyio
+import pytest
+
+from src.BoundedQueue import BoundedQueue
+
+
+class TestBoundedQueue:
+    def test_fifo_order(self, fake_clock):
+        """Test that items come out in insertion order without a priority."""
+        queue = BoundedQueue(5, clock=fake_clock)
+        for item in "abc":
+            queue.put_nowait(item)
+        assert [queue.get_nowait() for _ in range(3)] == ["a", "b", "c"]
+
+    def test_priority_order(self, fake_clock):
+        """Test that the lowest priority key comes out first, FIFO on ties."""
+        queue = BoundedQueue(5, priority=len, clock=fake_clock)
+        for item in ("ccc", "a", "bb", "b"):
+            queue.put_nowait(item)
+        assert [queue.get_nowait() for _ in range(4)] == ["a", "b", "bb", "ccc"]
+
+    def test_drop_oldest(self, fake_clock):
+        """Test that the oldest item is dropped when full."""
+        queue = BoundedQueue(2, drop_policy="oldest", clock=fake_clock)
+        queue.put_nowait("a")
+        queue.put_nowait("b")
+        assert queue.put_nowait("c") == "a"
+        assert [queue.get_nowait() for _ in range(2)] == ["b", "c"]
+        assert queue.dropped == 1
+
+    def test_drop_newest(self, fake_clock):
+        """Test that the incoming item is rejected when full."""
+        queue = BoundedQueue(2, drop_policy="newest", clock=fake_clock)
+        queue.put_nowait("a")
+        queue.put_nowait("b")
+        assert queue.put_nowait("c") == "c"
+        assert [queue.get_nowait() for _ in range(2)] == ["a", "b"]
+
+    def test_drop_lowest_priority(self, fake_clock):
+        """Test that the least important item gives way when full."""
+        queue = BoundedQueue(2, priority=len, drop_policy="lowest", clock=fake_clock)
+        queue.put_nowait("ccc")
+        queue.put_nowait("a")
+        assert queue.put_nowait("bb") == "ccc"
+        assert queue.put_nowait("dddd") == "dddd"
+        assert [queue.get_nowait() for _ in range(2)] == ["a", "bb"]
+        assert queue.dropped == 2
+
+    def test_unknown_drop_policy(self):
+        """Test that an invalid drop policy is rejected."""
+        with pytest.raises(ValueError):
+            BoundedQueue(2, drop_policy="random")
+
+    def test_depth_and_wait_metrics(self, fake_clock):
+        """Test queue depth and per-item wait tracking."""
+        queue = BoundedQueue(5, clock=fake_clock)
+        queue.put_nowait("a")
+        fake_clock.now += 2
+        queue.put_nowait("b")
+        assert len(queue) == 2
+        fake_clock.now += 3
+
+        queue.get_nowait()
+        assert queue.last_wait == 5
+        queue.get_nowait()
+        assert queue.last_wait == 3
+        assert queue.max_wait == 5
+        assert queue.mean_wait == 4
+        assert queue.max_depth == 2
+
+    def test_peek(self, fake_clock):
+        """Test that peek shows upcoming items without removing them."""
+        queue = BoundedQueue(5, priority=len, clock=fake_clock)
+        for item in ("ccc", "a", "bb"):
+            queue.put_nowait(item)
+        assert queue.peek(2) == ["a", "bb"]
+        assert len(queue) == 3
+
+    def test_peek_matches_get_order(self, fake_clock):
+        """Test that peek agrees with the order items are taken out."""
+        values = [random.randrange(50) for _ in range(200)]
+        queue = BoundedQueue(len(values), priority=lambda item: item, clock=fake_clock)
+        for value in values:
+            queue.put_nowait(value)
+
+        peeked = queue.peek(20)
+        assert peeked == [queue.get_nowait() for _ in range(20)]
+        assert queue.peek(500) == sorted(values)[20:]
+
+    @pytest.mark.asyncio
+    async def test_wait_for_size(self):
+        """Test waiting until several items are queued."""
+        queue = BoundedQueue(5)
+        queue.put_nowait("a")
+
+        async def producer():
+            await anyio.sleep(0.01)
+            queue.put_nowait("b")
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(producer)
+            with anyio.fail_after(1):
+                await queue.wait(2)
+        assert len(queue) == 2
+
+    def test_get_nowait_empty(self):
+        """Test that an empty queue raises instead of blocking."""
+        with pytest.raises(anyio.WouldBlock):
+            BoundedQueue(1).get_nowait()
+
+    @pytest.mark.asyncio
+    async def test_get_waits_for_put(self):
+        """Test that get blocks until an item is queued."""
+        queue = BoundedQueue(1)
+        received = []
+
+        async def consumer():
+            received.append(await queue.get())
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(consumer)
+            await anyio.sleep(0.01)
+            assert received == []
+            queue.put_nowait("a")
+
+        assert received == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_multiple_waiters(self):
+        """Test that several consumers each receive one item."""
+        queue = BoundedQueue(5)
+        received = []
+
+        async def consumer():
+            received.append(await queue.get())
+
+        async with anyio.create_task_group() as tg:
+            for _ in range(3):
+                tg.start_soon(consumer)
+            await anyio.sleep(0.01)
+            for item in "abc":
+                queue.put_nowait(item)
+                await anyio.sleep(0)
+
+        assert sorted(received) == ["a", "b", "c"]
@@ -0,0 +1,98 @@
+import threading
+
+import anyio
+import pytest
+from meshage.config import MQTTConfig
+from meshage.messages import MeshtasticTextMessage
+from meshage.parser import MeshtasticMessageParser
+
+from src.CodecService import CodecService
+
+
+class TestCodecService:
+    def test_unknown_mode(self):
+        """Test that an unknown mode is rejected."""
+        with pytest.raises(ValueError):
+            CodecService("gpu")
+
+    @pytest.mark.parametrize("mode", CodecService.MODES)
+    @pytest.mark.asyncio
+    async def test_round_trip(self, mode):
+        """Test that a message encoded in any mode decodes back to its text."""
+        config = MQTTConfig()
+        other = MQTTConfig()
+        other.config["userid"] = 0x1234ABCD
+        codec = CodecService(mode, workers=2)
+
+        payload = await codec.encode(MeshtasticTextMessage("K-0001 W1ABC", other))
+        decoded = await codec.decode(MeshtasticMessageParser(config), payload)
+
+        assert decoded == ("K-0001 W1ABC", 0x1234ABCD)
+
+    @pytest.mark.asyncio
+    async def test_decode_skips_own_messages(self):
+        """Test that an envelope with no text for us decodes to nothing."""
+        config = MQTTConfig()
+        codec = CodecService()
+
+        payload = await codec.encode(MeshtasticTextMessage("K-0001 W1ABC", config))
+
+        assert await codec.decode(MeshtasticMessageParser(config), payload) is None
+
+    @pytest.mark.asyncio
+    async def test_concurrent_thread_decodes_keep_their_text(self):
+        """Test that threads decoding at once each get their own message's text."""
+        config = MQTTConfig()
+        other = MQTTConfig()
+        other.config["userid"] = 0x1234ABCD
+        codec = CodecService("thread", workers=4)
+        parser = MeshtasticMessageParser(config)
+        texts = [f"K-{serial:04d} W1ABC" for serial in range(200)]
+        payloads = [bytes(MeshtasticTextMessage(text, other)) for text in texts]
+        decoded = [None] * len(payloads)
+
+        async def decode(index):
+            decoded[index] = await codec.decode(parser, payloads[index])
+
+        async with anyio.create_task_group() as tg:
+            for index in range(len(payloads)):
+                tg.start_soon(decode, index)
+
+        assert decoded == [(text, 0x1234ABCD) for text in texts]
+
+    @pytest.mark.asyncio
+    async def test_thread_mode_leaves_the_event_loop(self):
+        """Test that thread mode runs calls off the event loop thread."""
+        codec = CodecService("thread")
+
+        assert await codec.run(threading.get_ident) != threading.get_ident()
+        assert await CodecService().run(threading.get_ident) == threading.get_ident()
+
+    @pytest.mark.asyncio
+    async def test_workers_limit_concurrency(self):
+        """Test that no more calls run at once than there are workers."""
+        codec = CodecService("thread", workers=2)
+        lock = threading.Lock()
+        running = 0
+        most = 0
+        release = threading.Event()
+
+        def work():
+            nonlocal running, most
+            with lock:
+                running += 1
+                most = max(most, running)
+            release.wait(5)
+            with lock:
+                running -= 1
+
+        async with anyio.create_task_group() as tg:
+            for _ in range(5):
+                tg.start_soon(codec.run, work)
+            with anyio.fail_after(5):
+                while most < 2:
+                    await anyio.sleep(0.01)
+            await anyio.sleep(0.05)
+            release.set()
+
+        assert most == 2
@@ -0,0 +1,62 @@
+import pytest
+from asphalt.core import Context
+
+from src.CommandProcessorComponent import CommandProcessorComponent
+from src.Spot import Spot
+from src.State import State
+
+
+class TestCommandProcessorComponent:
+    @pytest.fixture
+    def processor(self):
+        return CommandProcessorComponent()
+
+    async def run_commands(self, processor, *commands) -> State:
+        async with Context() as ctx:
+            state = State()
+            ctx.add_resource(state)
+            for user_id, command in commands:
+                await processor.parse_command(command, user_id)
+        return state
+
+    async def test_enable_disable(self, processor):
+        """Test that enable and disable switch channel publishing."""
+        state = await self.run_commands(processor, (1, "disable"))
+        assert not state.enabled
+
+        state = await self.run_commands(processor, (1, "disable"), (1, "enable"))
+        assert state.enabled
+
+    async def test_subscribe(self, processor, sample_spot_data):
+        """Test that users register and drop their own spot filters."""
+        await self.run_commands(
+            processor,
+            (1, "sub band 20m mode CW"),
+            (2, "sub ref K-"),
+            (2, "sub call W9XYZ"),
+            (3, "sub band 40m"),
+            (3, "subs"),
+        )
+        spot = Spot(sample_spot_data)
+
+        assert len(processor.subscriptions) == 4
+        assert processor.subscriptions.match(spot) == {1, 2}
+
+        await self.run_commands(processor, (2, "unsub"))
+        assert len(processor.subscriptions) == 2
+        assert processor.subscriptions.match(spot) == {1}
+
+    @pytest.mark.parametrize(
+        "user_id, command", [(1, "sub band 11m"), (1, "sub"), (None, "sub band 20m")]
+    )
+    async def test_bad_subscription_is_ignored(self, processor, user_id, command):
+        """Test that malformed or anonymous subscriptions are not registered."""
+        await self.run_commands(processor, (user_id, command))
+
+        assert len(processor.subscriptions) == 0
+
+    async def test_unknown_commands_are_counted(self, processor):
+        """Test that unrecognised and empty commands are counted."""
+        await self.run_commands(processor, (1, "bogus"), (1, "  "))
+
+        assert processor.unknown_commands.value == 2
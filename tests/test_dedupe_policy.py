@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.DedupePolicy import DedupePolicy
+from src.Spot import Spot
+from src.SpotDiff import SpotDiff
+from src.SpotStore import SpotStore
+
+NOW = datetime(2024, 1, 15, 14, 45)
+
+
+class TestDedupePolicy:
+    @pytest.fixture
+    def record(self, sample_spot_data):
+        return dict(sample_spot_data, frequency="14230.0")
+
+    def test_default_key(self, record):
+        """Test that the default policy keeps the existing spot key."""
+        assert DedupePolicy().key(record) == Spot.record_key(record)
+        assert DedupePolicy(include_reference=True).key(record) == (
+            f"{Spot.record_key(record)}-K-0001"
+        )
+
+    def test_frequency_formatting_does_not_matter(self, record):
+        """Test that equal frequencies written differently share a key."""
+        policy = DedupePolicy(tolerance=1)
+        assert policy.key(record) == policy.key(dict(record, frequency="14230"))
+        assert policy.key(record) == "W1ABC-14230~1-CW"
+
+    def test_uhf_buckets_do_not_collide(self, record):
+        """Test that neighbouring buckets keep distinct keys at high frequencies."""
+        policy = DedupePolicy(tolerance=0.5)
+        keys = {
+            policy.key(dict(record, frequency=frequency))
+            for frequency in ("146520.0", "146520.5")
+        }
+
+        assert len(keys) == 2
+
+    def test_default_policy_skips_lookups(self):
+        """Test that the default policy keys records with Spot.record_key."""
+        assert DedupePolicy().finder({}) is Spot.record_key
+        assert DedupePolicy(tolerance=1).finder({}) is not Spot.record_key
+
+    @pytest.mark.parametrize(
+        "frequency, duplicate",
+        [("14230.4", True), ("14229.9", True), ("14231.0", True), ("14231.6", False)],
+    )
+    def test_small_qsy_is_a_duplicate(self, record, frequency, duplicate):
+        """Test that a move within tolerance finds the known spot, across buckets."""
+        policy = DedupePolicy(tolerance=1)
+        spots = SpotStore()
+        spot = Spot(record, policy.key(record))
+        spots[spot.key] = spot
+
+        key = policy.find(spots.spots, dict(record, frequency=frequency))
+
+        assert (key == spot.key) is duplicate
+
+    def test_park_change_is_new_with_reference(self, record):
+        """Test that including the reference makes a park change a new spot."""
+        moved = dict(record, reference="K-0002", spotId=record["spotId"] + 1)
+        for policy, added in (
+            (DedupePolicy(), 0),
+            (DedupePolicy(include_reference=True), 1),
+        ):
+            spots = SpotStore()
+            SpotDiff.compute(spots, [record], policy=policy, now=NOW)
+            diff = SpotDiff.compute(spots, [moved], policy=policy, now=NOW)
+            assert len(diff.added) == added
+
+    def test_reannounce_after_interval(self, record):
+        """Test that a published spot goes out again once the interval passes."""
+        policy = DedupePolicy(reannounce_after=1800)
+        spots = SpotStore()
+        (spot,) = SpotDiff.compute(spots, [record], policy=policy, now=NOW).added
+        spot.published = spot.timestamp
+
+        def respot(minutes: int, serial: int) -> SpotDiff:
+            time = spot.timestamp + timedelta(minutes=minutes)
+            return SpotDiff.compute(
+                spots,
+                [dict(record, spotId=serial, spotTime=time.isoformat())],
+                policy=policy,
+                now=NOW,
+            )
+
+        diff = respot(10, 2)
+        assert diff.added == [] and len(diff.updated) == 1
+        assert spots[spot.key].published == spot.timestamp
+
+        diff = respot(30, 3)
+        assert [s.id for s in diff.added] == [3]
+        assert spots[spot.key].published is None
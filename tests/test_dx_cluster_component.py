@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, Mock
+
+import anyio
+import pytest
+from anyio.abc import SocketStream
+from asphalt.core import Context
+
+from src.DedupePolicy import DedupePolicy
+from src.DXClusterComponent import DXClusterComponent
+from src.NewSpotEventSource import NewSpotEventSource
+from src.SpotDiff import SpotDiff
+from src.SpotStore import SpotStore
+
+NOW = datetime(2024, 1, 15, 14, 40)
+POTA_LINE = (
+    "DX de W2XYZ:     14062.0  W1ABC        CW POTA K-0001 599     1430Z FN42\r\n"
+)
+
+
+class TestDXClusterComponent:
+    def test_parse_line(self):
+        """Test that a cluster spot line becomes a POTA-style record."""
+        record = DXClusterComponent.parse_line(POTA_LINE, NOW)
+
+        assert record == {
+            "activator": "W1ABC",
+            "frequency": 14062.0,
+            "grid4": "FN42",
+            "mode": "CW",
+            "name": "CW POTA K-0001 599",
+            "reference": "K-0001",
+            "spotId": "dx:W2XYZ:1430",
+            "spotter": "W2XYZ",
+            "spotTime": "2024-01-15T14:30:00",
+        }
+
+    @pytest.mark.parametrize(
+        "line, field, expected",
+        [
+            ("DX de VE3AB-#:  7185.0 ve3jkl usb sota VE3/ON-001 2359Z", "mode", "SSB"),
+            (
+                "DX de VE3AB-#:  7185.0 VE3JKL usb sota VE3/ON-001 2359Z",
+                "reference",
+                "VE3/ON-001",
+            ),
+            (
+                "DX de VE3AB-#:  7185.0 VE3JKL usb sota VE3/ON-001 2359Z",
+                "spotTime",
+                "2024-01-14T23:59:00",
+            ),
+            ("DX de K1TTT: 3573.0 W1ABC FT8 wwff KFF-1234 0000Z", "grid4", ""),
+            ("DX de K1TTT: 3573.0 W1ABC  1430Z", "reference", ""),
+        ],
+    )
+    def test_parse_line_fields(self, line, field, expected):
+        """Test mode aliases, SOTA references, day rollover and missing fields."""
+        assert DXClusterComponent.parse_line(line, NOW)[field] == expected
+
+    @pytest.mark.parametrize(
+        "line",
+        ["", "Please enter your call:", "WWV de W0MU <18>:   SFI=150, A=5, K=1"],
+    )
+    def test_other_lines_are_ignored(self, line):
+        """Test that prompts and announcements are not spots."""
+        assert DXClusterComponent.parse_line(line, NOW) is None
+
+    @pytest.mark.parametrize("tolerance", [0, 1])
+    def test_missing_mode_matches_known_spot(self, sample_spot_data, tolerance):
+        """Test that a mode-less cluster spot of a known activation is not new."""
+        policy = DedupePolicy(tolerance=tolerance)
+        spots = SpotStore(ttl=timedelta(days=36500))
+        record = dict(sample_spot_data, frequency="14062")
+        SpotDiff.compute(spots, [record], policy=policy)
+
+        line = "DX de K1TTT: 14062.0 W1ABC POTA K-0001 tnx 1432Z FN42"
+        cluster = DXClusterComponent.parse_line(line, NOW)
+        assert cluster["mode"] == ""
+
+        assert DXClusterComponent.feed(cluster, spots, policy) is None
+        assert cluster["mode"] == "CW"
+        assert len(spots) == 1
+
+    def test_missing_mode_on_unknown_spot_is_new(self):
+        """Test that a mode-less spot nobody else has seen is still announced."""
+        spots = SpotStore(ttl=timedelta(days=36500))
+        line = "DX de K1TTT: 14062.0 W1ABC POTA K-0001 1432Z FN42"
+        record = DXClusterComponent.parse_line(line, NOW)
+
+        spot = DXClusterComponent.feed(record, spots, DedupePolicy())
+
+        assert spot.key == "W1ABC-14062.0-"
+
+    @pytest.mark.asyncio
+    async def test_streams_spots_from_cluster(self):
+        """Test that spots are dispatched as they arrive, across a reconnect."""
+        now = datetime.now(timezone.utc).strftime("%H%M")
+        sessions = [
+            [
+                "Please enter your call:\r\n",
+                "Hello N0CALL, this is a test cluster\r\n",
+                f"DX de W2XYZ: 14025.0 W9XYZ CW CQ DX {now}Z\r\n",
+                f"DX de W2XYZ: 14062.0 W1ABC CW POTA K-0001 {now}Z FN42\r\n",
+                f"DX de K1TTT: 14062.0 W1ABC CW POTA K-0001 {now}Z FN42\r\n",
+            ],
+            [f"DX de K1TTT: 7074.0 W3DEF FT8 POTA K-0234 {now}Z FM19\r\n"],
+        ]
+        logins = []
+
+        async def handle(client: SocketStream) -> None:
+            async with client:
+                lines = sessions.pop(0)
+                await client.send(lines[0].encode())
+                logins.append(await client.receive())
+                for line in lines[1:]:
+                    await client.send(line.encode())
+
+        dispatched = []
+        events = Mock()
+        events.signal.dispatch = AsyncMock(side_effect=dispatched.append)
+        listener = await anyio.create_tcp_listener(local_host="127.0.0.1")
+        port = listener.extra(anyio.abc.SocketAttribute.local_port)
+        component = DXClusterComponent(
+            "127.0.0.1", port, callsign="N0CALL", min_backoff=0.01
+        )
+
+        async with Context() as ctx, anyio.create_task_group() as tg:
+            tg.start_soon(listener.serve, handle)
+            ctx.add_resource(events, types=NewSpotEventSource)
+            ctx.add_resource(
+                SpotStore(ttl=timedelta(days=1)), name="spots", types=SpotStore
+            )
+            ctx.add_resource(DedupePolicy())
+            await component.start(ctx)
+            try:
+                with anyio.fail_after(5):
+                    while len(dispatched) < 2:
+                        await anyio.sleep(0.01)
+            finally:
+                await component.stop()
+                tg.cancel_scope.cancel()
+
+        assert logins == [b"N0CALL\r\n", b"N0CALL\r\n"]
+        assert [spot.key for spot in dispatched] == [
+            "W1ABC-14062.0-CW",
+            "W3DEF-7074.0-FT8",
+        ]
+        assert component.connects.value == 2
+        assert component.spots.value == 3
+        assert component.new_spots.value == 2
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from src.JSONArrayParser import JSONArrayParser
+
+
+def parse_in_chunks(data: bytes, size: int) -> list:
+    parser = JSONArrayParser()
+    values = []
+    for start in range(0, len(data), size):
+        values.extend(parser.feed(data[start : start + size]))
+    parser.close()
+    return values
+
+
+class TestJSONArrayParser:
+    @pytest.fixture
+    def document(self, multiple_spot_data):
+        return json.dumps(multiple_spot_data, indent=2).encode()
+
+    @pytest.mark.parametrize("size", [1, 7, 64, 100000])
+    def test_matches_json_loads(self, document, multiple_spot_data, size):
+        """Test that any chunking yields the same records as json.loads."""
+        assert parse_in_chunks(document, size) == multiple_spot_data
+
+    def test_yields_records_as_they_complete(self, multiple_spot_data):
+        """Test that a record is yielded before the array is finished."""
+        first = json.dumps(multiple_spot_data[0]).encode()
+        parser = JSONArrayParser()
+
+        assert list(parser.feed(b"[" + first[:10])) == []
+        assert list(parser.feed(first[10:] + b", {")) == [multiple_spot_data[0]]
+
+    def test_buffer_holds_only_partial_record(self, multiple_spot_data):
+        """Test that completed records are dropped from the buffer."""
+        parser = JSONArrayParser()
+        data = b"[" + json.dumps(multiple_spot_data[0]).encode() + b', {"partial"'
+        list(parser.feed(data))
+
+        assert parser.buffer == '{"partial"'
+
+    def test_multibyte_characters_split_across_chunks(self):
+        """Test that UTF-8 sequences split between chunks are decoded."""
+        data = json.dumps([{"name": "Parc national du Mont-Mégantic"}]).encode()
+        data = data.replace(b"\\u00e9", "é".encode())
+        assert parse_in_chunks(data, 1) == [{"name": "Parc national du Mont-Mégantic"}]
+
+    def test_numbers_split_across_chunks(self):
+        """Test that a number is not yielded until it is complete."""
+        assert parse_in_chunks(b"[12, 345]", 2) == [12, 345]
+
+    def test_empty_array(self):
+        """Test that an empty array yields nothing."""
+        assert parse_in_chunks(b" [ ] ", 1) == []
+
+    def test_size_counts_fed_bytes(self, document):
+        """Test that the number of bytes fed is tracked."""
+        parser = JSONArrayParser()
+        list(parser.feed(document))
+        assert parser.size == len(document)
+
+    def test_rejects_non_array(self):
+        """Test that a document that is not an array is rejected."""
+        with pytest.raises(ValueError):
+            list(JSONArrayParser().feed(b'{"a": 1}'))
+
+    def test_rejects_truncated_array(self, document):
+        """Test that close reports a document that ended early."""
+        parser = JSONArrayParser()
+        list(parser.feed(document[:-5]))
+        with pytest.raises(ValueError):
+            parser.close()
+
+    def test_rejects_trailing_data(self):
+        """Test that data after the closing bracket is rejected."""
+        with pytest.raises(ValueError):
+            list(JSONArrayParser().feed(b"[1] 2"))
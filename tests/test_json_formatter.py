@@ -0,0 +1,43 @@
+import json
+import logging
+import sys
+
+from src.JsonFormatter import JsonFormatter
+
+
+class TestJsonFormatter:
+    def make_record(self, msg, args=(), exc_info=None):
+        return logging.LogRecord(
+            name="test",
+            level=logging.WARNING,
+            pathname="",
+            lineno=0,
+            msg=msg,
+            args=args,
+            exc_info=exc_info,
+        )
+
+    def test_record_is_one_json_line(self):
+        """Test that a record is formatted as a single JSON object."""
+        record = self.make_record("Dropped spot: %s", ("W1ABC-14230-CW",))
+        record.created = 0
+
+        line = JsonFormatter().format(record)
+
+        assert "\n" not in line
+        assert json.loads(line) == {
+            "time": "1970-01-01T00:00:00+00:00",
+            "level": "WARNING",
+            "logger": "test",
+            "message": "Dropped spot: W1ABC-14230-CW",
+        }
+
+    def test_exception_is_included(self):
+        """Test that exception details are kept in the JSON entry."""
+        try:
+            raise ValueError("bad spot")
+        except ValueError:
+            record = self.make_record("Error", exc_info=sys.exc_info())
+
+        entry = json.loads(JsonFormatter().format(record))
+        assert "ValueError: bad spot" in entry["exception"]
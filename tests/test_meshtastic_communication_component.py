@@ -1,15 +1,27 @@
 from contextlib import suppress
 from unittest.mock import AsyncMock, Mock, patch
 
+import aiomqtt
+import anyio
 import pytest
 from meshage.config import MQTTConfig
+from meshage.messages import MeshtasticNodeInfoMessage, MeshtasticTextMessage
+from meshage.parser import MeshtasticMessageParser
+from meshtastic.protobuf import mqtt_pb2
 
 from src.MeshtasticCommunicationComponent import (
     MeshtasticCommunicationComponent,
 )
+from src.MQTTConnection import MQTTConnection
+from src.MeshtasticDirectTextMessage import MeshtasticDirectTextMessage
 from src.NewSpotEventSource import NewSpotEventSource
+from src.CodecService import decode_text
 from src.CommandEventSource import CommandEventSource
 from src.Spot import Spot
+from src.State import State
+from src.Subscription import Subscription
+from src.Subscriptions import Subscriptions
+from src.TokenBucket import TokenBucket
 
 
 class TestMeshtasticCommunicationComponent:
@@ -25,9 +37,15 @@ class TestMeshtasticCommunicationComponent:
         consumer = MeshtasticCommunicationComponent()
         mock_ctx = Mock()
 
-        with patch(
-            "src.MeshtasticCommunicationComponent.anyio.create_task_group"
-        ) as mock_task_group_factory:
+        with (
+            patch(
+                "src.MeshtasticCommunicationComponent.anyio.create_task_group"
+            ) as mock_task_group_factory,
+            patch(
+                "src.MeshtasticCommunicationComponent.MQTTConnection"
+            ) as mock_connection_class,
+        ):
+            mock_connection_class.return_value.start = AsyncMock()
             mock_task_group = AsyncMock()
             # Make start_soon a regular mock to avoid coroutine warnings
             mock_task_group.start_soon = Mock()
@@ -49,13 +67,20 @@ class TestMeshtasticCommunicationComponent:
                 if hasattr(rt, "__name__") and rt.__name__ == "MQTTConfig"
             ]
 
+            # Verify a single connection is made and shared as a resource
+            mock_connection_class.assert_called_once()
+            mock_connection_class.return_value.start.assert_awaited_once()
+            resources = [call[0][0] for call in args]
+            assert mock_connection_class.return_value in resources
+
             # Verify task group is created and both tasks are scheduled
             mock_task_group_factory.assert_called_once()
-            assert mock_task_group.start_soon.call_count == 2
-            # Check that both publish_task and receive_task methods are called
+            assert mock_task_group.start_soon.call_count == 3
+            # Check that the publish, receive and command tasks are started
             calls = mock_task_group.start_soon.call_args_list
             assert any("publish_task" in str(call[0][0]) for call in calls)
             assert any("receive_task" in str(call[0][0]) for call in calls)
+            assert any("command_task" in str(call[0][0]) for call in calls)
 
     @pytest.mark.asyncio
     async def test_stop_method(self):
@@ -145,13 +170,11 @@ class TestPublishTask:
             patch(
                 "src.MeshtasticCommunicationComponent.current_context"
             ) as mock_context,
-            patch(
-                "src.MeshtasticCommunicationComponent.aiomqtt.Client"
-            ) as mock_client_class,
         ):
 
             # Setup mocks
             mock_ctx = AsyncMock()
+            mock_connection = AsyncMock()
             mock_config = Mock()
             mock_config.aiomqtt_config = {}
             mock_config.publish_topic = "test/topic"
@@ -161,15 +184,14 @@ class TestPublishTask:
                     return NewSpotEventSource()
                 elif resource_type == MQTTConfig:
                     return mock_config
+                elif resource_type == MQTTConnection:
+                    return mock_connection
                 return None
 
             mock_ctx.request_resource.side_effect = mock_request_resource
             mock_context.return_value = mock_ctx
 
-            # Setup MQTT client mock
-            mock_client = AsyncMock()
-            mock_client.publish.side_effect = Exception("MQTT Error")
-            mock_client_class.return_value.__aenter__.return_value = mock_client
+            mock_connection.publish.side_effect = Exception("MQTT Error")
 
             # Mock the message classes
             with patch(
@@ -191,14 +213,18 @@ class TestPublishTask:
                         mock_ctx.request_resource.side_effect = lambda rt, name=None: (
                             event_source
                             if rt == NewSpotEventSource
-                            else mock_config if rt == MQTTConfig else None
+                            else (
+                                mock_config
+                                if rt == MQTTConfig
+                                else mock_connection if rt == MQTTConnection else None
+                            )
                         )
 
                         with pytest.raises(Exception, match="Test stop"):
                             await consumer.publish_task()
 
                         # Verify node info was attempted to be published
-                        mock_client.publish.assert_called()
+                        mock_connection.publish.assert_called()
 
     @pytest.mark.asyncio
     async def test_publish_task_successful_flow(self, sample_spots):
@@ -209,13 +235,11 @@ class TestPublishTask:
             patch(
                 "src.MeshtasticCommunicationComponent.current_context"
             ) as mock_context,
-            patch(
-                "src.MeshtasticCommunicationComponent.aiomqtt.Client"
-            ) as mock_client_class,
         ):
 
             # Setup mocks
             mock_ctx = AsyncMock()
+            mock_connection = AsyncMock()
             mock_config = Mock()
             mock_config.aiomqtt_config = {}
             mock_config.publish_topic = "test/topic"
@@ -231,15 +255,13 @@ class TestPublishTask:
                     return mock_event_source
                 elif resource_type == MQTTConfig:
                     return mock_config
+                elif resource_type == MQTTConnection:
+                    return mock_connection
                 return None
 
             mock_ctx.request_resource.side_effect = mock_request_resource
             mock_context.return_value = mock_ctx
 
-            # Setup MQTT client mock
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
-
             # Mock stream_events to yield once then raise exception to exit
             class MockEvent:
                 def __init__(self, spot):
@@ -278,11 +300,430 @@ class TestPublishTask:
                         raise
 
                 # Verify node info was published
-                assert mock_client.publish.call_count >= 1
+                assert mock_connection.publish.call_count >= 1
                 # Ensure stream_events was iterated
                 # Can't directly assert called once on a generator, but reaching here implies it was consumed
 
 
+class TestPublishQueue:
+    @pytest.fixture
+    def spots(self, sample_spot_data):
+        frequencies = ["7.074", "14.074", "21.074", "14.230", "3.573"]
+        return [
+            Spot(
+                dict(
+                    sample_spot_data,
+                    activator=f"W{index}ABC",
+                    frequency=frequency,
+                    spotTime=f"2024-01-15T14:{index:02d}:00",
+                )
+            )
+            for index, frequency in enumerate(frequencies)
+        ]
+
+    @pytest.fixture
+    def mock_config(self):
+        config = Mock()
+        config.publish_topic = "test/topic"
+        config.config = {}
+        return config
+
+    async def run_send_task(self, consumer, count, fake_clock, config, failures=0):
+        published = []
+
+        async def publish(topic, payload):
+            nonlocal failures
+            if failures:
+                failures -= 1
+                raise aiomqtt.MqttError("Connection lost")
+            published.append((fake_clock.now, payload.decode()))
+
+        broker = AsyncMock()
+        broker.publish.side_effect = publish
+
+        with (
+            patch(
+                "src.MeshtasticCommunicationComponent.MeshtasticTextMessage"
+            ) as mock_text_msg,
+            patch(
+                "src.MeshtasticCommunicationComponent.MeshtasticDirectTextMessage"
+            ) as mock_direct_msg,
+        ):
+            mock_text_msg.side_effect = lambda text, config: text.encode()
+            mock_direct_msg.side_effect = lambda text, config, destination: (
+                f"@{destination} {text}".encode()
+            )
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(consumer.send_task, broker, config)
+                with anyio.fail_after(1):
+                    while len(published) < count:
+                        await anyio.sleep(0)
+                tg.cancel_scope.cancel()
+        return published
+
+    def make_consumer(self, fake_clock, **kwargs):
+        kwargs.setdefault("max_message_spots", 1)
+        consumer = MeshtasticCommunicationComponent(**kwargs)
+        consumer.bucket = TokenBucket(
+            consumer.bucket.rate,
+            consumer.bucket.capacity,
+            clock=fake_clock,
+            sleep=fake_clock.sleep,
+        )
+        consumer.queue.clock = fake_clock
+        return consumer
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_publishing(self, spots, fake_clock, mock_config):
+        """Test that a burst of spots is paced by the token bucket."""
+        consumer = self.make_consumer(fake_clock, publish_rate=6, publish_burst=2)
+        for spot in spots:
+            consumer.queue.put_nowait(spot)
+
+        published = await self.run_send_task(consumer, 5, fake_clock, mock_config)
+
+        times = [when - 1000 for when, _ in published]
+        assert times == [0, 0, 10, 20, 30]
+        assert consumer.queue.max_wait == 30
+
+    @pytest.mark.asyncio
+    async def test_encoding_offloaded_to_threads(self, spots, fake_clock):
+        """Test that spots encrypted on the thread pool still decrypt."""
+        consumer = self.make_consumer(fake_clock, codec="thread")
+        config = MQTTConfig()
+        for spot in spots[:2]:
+            consumer.queue.put_nowait(spot)
+        published = []
+        broker = AsyncMock()
+        broker.publish.side_effect = lambda topic, payload: published.append(payload)
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(consumer.send_task, broker, config)
+            with anyio.fail_after(5):
+                while len(published) < 2:
+                    await anyio.sleep(0.01)
+            tg.cancel_scope.cancel()
+
+        parser = MeshtasticMessageParser(config)
+        texts = []
+        for payload in published:
+            envelope = mqtt_pb2.ServiceEnvelope.FromString(payload)
+            parser.decrypt_packet(envelope.packet)
+            texts.append(envelope.packet.decoded.payload.decode())
+        assert [text.split()[0] for text in texts] == ["W0ABC", "W1ABC"]
+
+    @pytest.mark.asyncio
+    async def test_newest_first(self, spots, fake_clock, mock_config):
+        """Test that the newest spots are published first when configured."""
+        consumer = self.make_consumer(fake_clock, queue_priority="newest")
+        for spot in spots:
+            consumer.queue.put_nowait(spot)
+
+        published = await self.run_send_task(consumer, 5, fake_clock, mock_config)
+
+        assert [text.split()[0] for _, text in published] == [
+            "W4ABC",
+            "W3ABC",
+            "W2ABC",
+            "W1ABC",
+            "W0ABC",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_band_order(self, spots, fake_clock, mock_config):
+        """Test that preferred bands are published first."""
+        consumer = self.make_consumer(
+            fake_clock, queue_priority="band", band_order=["20m", "15m"]
+        )
+        for spot in spots:
+            consumer.queue.put_nowait(spot)
+
+        published = await self.run_send_task(consumer, 5, fake_clock, mock_config)
+
+        assert [text.split()[0] for _, text in published] == [
+            "W1ABC",
+            "W3ABC",
+            "W2ABC",
+            "W0ABC",
+            "W4ABC",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_queued_spots_are_coalesced(self, spots, fake_clock, mock_config):
+        """Test that spots waiting together go out as one message."""
+        consumer = self.make_consumer(
+            fake_clock, max_message_spots=10, coalesce_latency=0.01
+        )
+        for spot in spots:
+            consumer.queue.put_nowait(spot)
+
+        published = await self.run_send_task(consumer, 1, fake_clock, mock_config)
+
+        assert published[0][1].splitlines() == [spot.compact() for spot in spots]
+
+    @pytest.mark.asyncio
+    async def test_coalescing_waits_for_late_spots(
+        self, spots, fake_clock, mock_config
+    ):
+        """Test that a spot arriving within the latency deadline joins the batch."""
+        consumer = self.make_consumer(
+            fake_clock, max_message_spots=10, coalesce_latency=0.5
+        )
+        consumer.queue.put_nowait(spots[0])
+
+        async def late_spot():
+            await anyio.sleep(0.05)
+            consumer.queue.put_nowait(spots[1])
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(late_spot)
+            published = await self.run_send_task(consumer, 1, fake_clock, mock_config)
+
+        assert published[0][1].splitlines() == [spots[0].compact(), spots[1].compact()]
+
+    @pytest.mark.asyncio
+    async def test_overflow_is_carried_to_next_message(
+        self, spots, fake_clock, mock_config
+    ):
+        """Test that spots that do not fit are sent in the following message."""
+        consumer = self.make_consumer(
+            fake_clock,
+            max_message_spots=10,
+            max_message_bytes=50,
+            coalesce_latency=0,
+        )
+        for spot in spots:
+            consumer.queue.put_nowait(spot)
+
+        published = await self.run_send_task(consumer, 3, fake_clock, mock_config)
+
+        texts = [text for _, text in published]
+        assert texts[0].splitlines() == [spots[0].compact(), spots[1].compact()]
+        assert texts[1].splitlines() == [spots[2].compact(), spots[3].compact()]
+        assert texts[2] == str(spots[4])
+        assert all(len(text.encode()) <= 50 for text in texts[:2])
+
+    @pytest.mark.asyncio
+    async def test_failed_publish_is_retried(self, spots, fake_clock, mock_config):
+        """Test that spots in a message that failed to publish are not lost."""
+        consumer = self.make_consumer(fake_clock)
+        for spot in spots[:2]:
+            consumer.queue.put_nowait(spot)
+
+        published = await self.run_send_task(
+            consumer, 2, fake_clock, mock_config, failures=1
+        )
+
+        assert [text for _, text in published] == [str(spot) for spot in spots[:2]]
+
+    @pytest.mark.asyncio
+    async def test_retry_reuses_the_encoded_message(self, spots, fake_clock):
+        """Test that a retried message goes out as the same packet."""
+        consumer = self.make_consumer(fake_clock)
+        consumer.message_cache.clock = fake_clock
+        config = MQTTConfig()
+        consumer.queue.put_nowait(spots[0])
+        attempts = []
+
+        async def publish(topic, payload):
+            attempts.append(payload)
+            if len(attempts) == 1:
+                raise aiomqtt.MqttError("Connection lost")
+
+        broker = AsyncMock()
+        broker.publish.side_effect = publish
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(consumer.send_task, broker, config)
+            with anyio.fail_after(5):
+                while len(attempts) < 2:
+                    await anyio.sleep(0)
+            tg.cancel_scope.cancel()
+
+        assert attempts[0] == attempts[1]
+        assert (consumer.message_cache.hits, consumer.message_cache.misses) == (1, 1)
+        assert "potatastic_message_cache_hits_total 1" in consumer.metrics.exposition(
+            [consumer.metrics]
+        )
+
+    @pytest.mark.asyncio
+    async def test_node_info_beacons(self, fake_clock, mock_config):
+        """Test that node info is repeated every interval, using up airtime."""
+        consumer = self.make_consumer(
+            fake_clock,
+            publish_rate=6,
+            publish_burst=1,
+            beacon_interval=600,
+            beacon_jitter=0,
+        )
+        consumer.message_cache.clock = fake_clock
+        consumer.beacon.clock = fake_clock
+
+        async def sleep(delay):
+            await fake_clock.sleep(delay)
+            await anyio.sleep(0)
+
+        consumer.beacon.sleep = sleep
+        # The node info published on connect
+        consumer.beacon.sent()
+        published = []
+        tokens = []
+
+        async def publish(topic, payload):
+            published.append((fake_clock.now, payload))
+            tokens.append(consumer.bucket.tokens)
+
+        broker = AsyncMock()
+        broker.publish.side_effect = publish
+
+        with patch(
+            "src.MeshtasticCommunicationComponent.MeshtasticNodeInfoMessage"
+        ) as mock_node_info:
+            mock_node_info.side_effect = lambda config: b"node info"
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(consumer.beacon_task, broker, mock_config)
+                with anyio.fail_after(5):
+                    while len(published) < 3:
+                        await anyio.sleep(0)
+                tg.cancel_scope.cancel()
+
+        assert published == [
+            (1600, b"node info"),
+            (2200, b"node info"),
+            (2800, b"node info"),
+        ]
+        assert tokens == [0, 0, 0]
+        assert consumer.beacons_published.value == 3
+
+    def test_beacons_disabled(self):
+        """Test that a zero interval turns the beacon off."""
+        assert MeshtasticCommunicationComponent(beacon_interval=0).beacon is None
+
+    @pytest.mark.asyncio
+    async def test_spots_are_flushed_on_reconnect(
+        self, spots, fake_clock, mock_config, mqtt_broker
+    ):
+        """Test that spots queued while the broker is down go out once it is back."""
+        consumer = self.make_consumer(fake_clock, publish_rate=600, publish_burst=10)
+        mock_config.aiomqtt_config = mqtt_broker.config
+        mock_config.config = {"host": "127.0.0.1"}
+        connection = MQTTConnection(mock_config, min_backoff=0.05, max_backoff=0.1)
+        await mqtt_broker.stop()
+        for spot in spots:
+            consumer.queue.put_nowait(spot)
+
+        with patch(
+            "src.MeshtasticCommunicationComponent.MeshtasticTextMessage"
+        ) as mock_text_msg:
+            mock_text_msg.side_effect = lambda text, config: text.encode()
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(connection.run)
+                tg.start_soon(consumer.send_task, connection, mock_config)
+                await anyio.sleep(0.2)
+                assert mqtt_broker.published == []
+                assert len(consumer.queue) == len(spots)
+
+                await mqtt_broker.start()
+                with anyio.fail_after(5):
+                    while len(mqtt_broker.published) < len(spots):
+                        await anyio.sleep(0.01)
+                tg.cancel_scope.cancel()
+
+        assert [payload.decode() for _, payload in mqtt_broker.published] == [
+            str(spot) for spot in spots
+        ]
+
+    def subscribe(self, consumer, *subscriptions):
+        consumer.state = State()
+        consumer.state.enabled = False
+        consumer.subscriptions = Subscriptions()
+        for subscription in subscriptions:
+            consumer.subscriptions.add(subscription)
+
+    def test_route(self, spots):
+        """Test that spots are grouped per subscriber unless many want them."""
+        consumer = MeshtasticCommunicationComponent(broadcast_threshold=2)
+        assert consumer.route(spots) == [(None, spots)]
+
+        self.subscribe(
+            consumer,
+            Subscription(1, band="20m"),
+            Subscription(2, band="40m"),
+            Subscription(2, callsign="W2ABC"),
+            Subscription(3, band="40m"),
+        )
+        assert consumer.route(spots) == [
+            (None, [spots[0]]),
+            (1, [spots[1], spots[3]]),
+            (2, [spots[2]]),
+        ]
+        assert not consumer.wanted(spots[4])
+
+        consumer.state.enabled = True
+        assert consumer.route(spots) == [(None, spots)]
+        assert consumer.wanted(spots[4])
+
+    def test_route_without_broadcast_fallback(self, spots):
+        """Test that no threshold keeps every spot off a disabled channel."""
+        consumer = MeshtasticCommunicationComponent(broadcast_threshold=None)
+        self.subscribe(
+            consumer,
+            Subscription(1, band="20m"),
+            Subscription(2, band="40m"),
+            Subscription(2, callsign="W2ABC"),
+            Subscription(3, band="40m"),
+        )
+
+        assert consumer.route(spots) == [
+            (2, [spots[0], spots[2]]),
+            (3, [spots[0]]),
+            (1, [spots[1], spots[3]]),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_direct_messages(self, spots, fake_clock, mock_config):
+        """Test that subscribers get one message each for the spots they want."""
+        consumer = self.make_consumer(
+            fake_clock, max_message_spots=10, coalesce_latency=0.01
+        )
+        self.subscribe(
+            consumer, Subscription(1, band="20m"), Subscription(2, callsign="W0ABC")
+        )
+        for spot in spots:
+            consumer.queue.put_nowait(spot)
+
+        published = await self.run_send_task(consumer, 2, fake_clock, mock_config)
+
+        assert [text for _, text in published] == [
+            f"@2 {spots[0]}",
+            f"@1 {spots[1].compact()}\n{spots[3].compact()}",
+        ]
+        assert consumer.direct_messages_published.value == 2
+        assert [bool(spot.published) for spot in spots] == [
+            True,
+            True,
+            False,
+            True,
+            False,
+        ]
+        assert consumer.spots_published.value == 3
+        assert len(consumer.queue) == 0 and not consumer.outbox
+
+    def test_queue_drop_policy_is_configurable(self, spots):
+        """Test that a full queue applies the configured drop policy."""
+        consumer = MeshtasticCommunicationComponent(queue_size=2, drop_policy="newest")
+        consumer.queue.clock = lambda: 0
+        for spot in spots[:2]:
+            consumer.queue.put_nowait(spot)
+        assert consumer.queue.put_nowait(spots[2]) is spots[2]
+        assert consumer.queue.dropped == 1
+
+    def test_unknown_priority(self):
+        """Test that an invalid publish order is rejected."""
+        with pytest.raises(ValueError):
+            MeshtasticCommunicationComponent(queue_priority="random")
+
+
 class TestReceiveTask:
     @pytest.mark.asyncio
     async def test_receive_task_initialization_error(self):
@@ -334,13 +775,11 @@ class TestReceiveTask:
             patch(
                 "src.MeshtasticCommunicationComponent.current_context"
             ) as mock_context,
-            patch(
-                "src.MeshtasticCommunicationComponent.aiomqtt.Client"
-            ) as mock_client_class,
         ):
 
             # Setup mocks
             mock_ctx = AsyncMock()
+            mock_connection = AsyncMock()
             mock_config = Mock()
             mock_config.aiomqtt_config = {}
             mock_config.receive_topic = "test/receive"
@@ -356,15 +795,13 @@ class TestReceiveTask:
                     return CommandEventSource()
                 elif resource_type == MQTTConfig:
                     return mock_config
+                elif resource_type == MQTTConnection:
+                    return mock_connection
                 return None
 
             mock_ctx.request_resource.side_effect = mock_request_resource
             mock_context.return_value = mock_ctx
 
-            # Setup MQTT client mock
-            mock_client = AsyncMock()
-            mock_client_class.return_value.__aenter__.return_value = mock_client
-
             # Mock messages to only trigger once then raise exception to exit
             async def mock_messages():
                 # Simulate one message then exit
@@ -373,15 +810,21 @@ class TestReceiveTask:
                 yield mock_message
                 raise Exception("Test stop")
 
-            mock_client.messages = mock_messages()
+            mock_connection.messages = mock_messages()
 
-            # Mock the parser
-            with patch(
-                "src.MeshtasticCommunicationComponent.MeshtasticMessageParser"
-            ) as mock_parser_class:
+            # Mock the parser, and let the junk payload past the pre-filter
+            with (
+                patch(
+                    "src.MeshtasticCommunicationComponent.MeshtasticMessageParser"
+                ) as mock_parser_class,
+                patch(
+                    "src.MeshtasticCommunicationComponent.ReceiveFilter"
+                ) as mock_filter_class,
+                patch("src.CodecService.decode_text", return_value=None) as mock_decode,
+            ):
+                mock_filter_class.return_value.check.return_value = None
                 mock_parser = Mock()
                 mock_parser_class.return_value = mock_parser
-                mock_parser.parse_message.return_value = Mock()
 
                 try:
                     await consumer.receive_task()
@@ -390,6 +833,189 @@ class TestReceiveTask:
                         raise
 
                 # Verify subscription was made
-                mock_client.subscribe.assert_called_once_with("test/receive")
-                # Verify parser was used
-                mock_parser.parse_message.assert_called_once()
+                mock_connection.subscribe.assert_called_once_with("test/receive")
+                # Verify the payload was decoded with the parser
+                mock_decode.assert_called_once_with(mock_parser, b"test_message")
+
+    @pytest.mark.asyncio
+    async def test_receive_task_filters_before_decoding(self):
+        """Test that only text for us reaches the parser, counting the rest."""
+        consumer = MeshtasticCommunicationComponent()
+        config = MQTTConfig()
+        other = MQTTConfig()
+        other.config["userid"] = 0x1234ABCD
+        command_event_source = CommandEventSource()
+        received = []
+        command_event_source.signal.connect(received.append)
+
+        def message(topic, payload):
+            message = Mock()
+            message.topic.value = topic
+            message.payload = payload
+            return message
+
+        async def mock_messages():
+            yield message(other.publish_topic, bytes(MeshtasticNodeInfoMessage(other)))
+            yield message(
+                config.publish_topic, bytes(MeshtasticTextMessage("x", config))
+            )
+            yield message("msh/US/2/map/", b"{}")
+            yield message(
+                other.publish_topic, bytes(MeshtasticTextMessage("subs", other))
+            )
+
+        mock_connection = AsyncMock()
+        mock_connection.messages = mock_messages()
+
+        def mock_request_resource(resource_type, name=None):
+            if resource_type == CommandEventSource:
+                return command_event_source
+            elif resource_type == MQTTConfig:
+                return config
+            elif resource_type == MQTTConnection:
+                return mock_connection
+            return None
+
+        with (
+            patch(
+                "src.MeshtasticCommunicationComponent.current_context"
+            ) as mock_context,
+            patch("src.CodecService.decode_text", wraps=decode_text) as mock_decode,
+        ):
+            mock_ctx = AsyncMock()
+            mock_ctx.request_resource.side_effect = mock_request_resource
+            mock_context.return_value = mock_ctx
+
+            await consumer.receive_task()
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(consumer.command_task)
+                with anyio.fail_after(5):
+                    while not received:
+                        await anyio.sleep(0.01)
+                tg.cancel_scope.cancel()
+
+        assert mock_decode.call_count == 1
+        assert [(event.command, event.userId) for event in received] == [
+            ("subs", 0x1234ABCD)
+        ]
+        assert consumer.messages_received.value == 4
+        assert {
+            stage: counter.value
+            for stage, counter in consumer.messages_filtered.items()
+            if counter.value
+        } == {"portnum": 1, "self": 1, "topic": 1}
+
+
+class TestCommandQueue:
+    @pytest.fixture
+    def context(self):
+        """Resources for the receive and command tasks, with a mocked parser."""
+        command_event_source = CommandEventSource()
+        connection = AsyncMock()
+        config = Mock()
+        config.receive_topic = "test/receive"
+
+        def request_resource(resource_type, name=None):
+            if resource_type == CommandEventSource:
+                return command_event_source
+            elif resource_type == MQTTConfig:
+                return config
+            elif resource_type == MQTTConnection:
+                return connection
+            return None
+
+        with (
+            patch(
+                "src.MeshtasticCommunicationComponent.current_context"
+            ) as mock_context,
+            patch("src.MeshtasticCommunicationComponent.MeshtasticMessageParser"),
+            patch(
+                "src.MeshtasticCommunicationComponent.ReceiveFilter"
+            ) as mock_filter_class,
+            patch(
+                "src.CodecService.decode_text",
+                side_effect=lambda parser, payload: (payload.decode(), None),
+            ),
+        ):
+            mock_context.return_value.request_resource = AsyncMock(
+                side_effect=request_resource
+            )
+            mock_filter_class.return_value.check.return_value = None
+            yield connection, command_event_source
+
+    @staticmethod
+    def messages(*texts):
+        async def messages():
+            for text in texts:
+                message = Mock()
+                message.payload = text.encode()
+                yield message
+
+        return messages()
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_oldest(self, context, caplog):
+        """Test that a burst of commands drops the oldest and reports it."""
+        connection, _ = context
+        consumer = MeshtasticCommunicationComponent(command_queue_size=2)
+        connection.messages = self.messages("subs", "enable", "disable")
+
+        await consumer.receive_task()
+
+        assert [consumer.commands.get_nowait()[0] for _ in range(2)] == [
+            "enable",
+            "disable",
+        ]
+        assert consumer.commands.dropped == 1
+        assert "potatastic_command_queue_dropped_total 1" in (
+            consumer.metrics.exposition([consumer.metrics])
+        )
+        assert "Command queue full" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_slow_command_does_not_block_receive(self, context):
+        """Test that the receive loop keeps draining while commands are handled."""
+        connection, command_event_source = context
+        consumer = MeshtasticCommunicationComponent(command_workers=2)
+        connection.messages = self.messages("one", "two", "three")
+        release = anyio.Event()
+        handling = []
+
+        async def slow_handler(event):
+            handling.append(event.command)
+            await release.wait()
+
+        command_event_source.signal.connect(slow_handler)
+        try:
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(consumer.command_task)
+                with anyio.fail_after(5):
+                    await consumer.receive_task()
+                    while len(handling) < 2:
+                        await anyio.sleep(0.01)
+
+                # Two workers are busy and the third command waits its turn
+                assert consumer.messages_received.value == 3
+                assert handling == ["one", "two"]
+                assert len(consumer.commands) == 1
+
+                release.set()
+                with anyio.fail_after(5):
+                    while len(handling) < 3:
+                        await anyio.sleep(0.01)
+                tg.cancel_scope.cancel()
+        finally:
+            command_event_source.signal.disconnect(slow_handler)
+        assert consumer.command_wait.count == 3
+
+
+class TestMeshtasticDirectTextMessage:
+    def test_addressed_to_destination(self):
+        """Test that a direct message is addressed to one node and still decrypts."""
+        config = MQTTConfig()
+        message = MeshtasticDirectTextMessage("hello", config, 0x1234ABCD)
+
+        envelope = mqtt_pb2.ServiceEnvelope.FromString(bytes(message))
+        assert envelope.packet.to == 0x1234ABCD
+        MeshtasticMessageParser(config).decrypt_packet(envelope.packet)
+        assert envelope.packet.decoded.payload == b"hello"
@@ -0,0 +1,72 @@
+import pytest
+from meshage.config import MQTTConfig
+
+from src.MessageCache import MessageCache
+
+
+@pytest.fixture
+def config():
+    return MQTTConfig()
+
+
+class TestMessageCache:
+    def test_hit_and_miss(self, config, fake_clock):
+        """Test that a stored envelope is returned for the same message only."""
+        cache = MessageCache(clock=fake_clock)
+
+        assert cache.get(config, "text", "hello") is None
+        cache.put(config, b"envelope", "text", "hello")
+        assert cache.get(config, "text", "hello") == b"envelope"
+        assert cache.get(config, "text", "hello", 0x1234ABCD) is None
+        assert cache.get(config, "nodeinfo") is None
+        assert (cache.hits, cache.misses) == (1, 3)
+
+    def test_least_recently_used_is_evicted(self, config, fake_clock):
+        """Test that a full cache drops the entry used longest ago."""
+        cache = MessageCache(max_size=2, clock=fake_clock)
+        cache.put(config, b"one", "text", "one")
+        cache.put(config, b"two", "text", "two")
+        cache.get(config, "text", "one")
+        cache.put(config, b"three", "text", "three")
+
+        assert len(cache) == 2
+        assert cache.get(config, "text", "one") == b"one"
+        assert cache.get(config, "text", "two") is None
+
+    def test_entries_expire(self, config, fake_clock):
+        """Test that text sent again after max_age is encoded afresh."""
+        cache = MessageCache(max_age=60, clock=fake_clock)
+        cache.put(config, b"envelope", "text", "hello")
+
+        fake_clock.now += 60
+        assert cache.get(config, "text", "hello") == b"envelope"
+        fake_clock.now += 1
+        assert cache.get(config, "text", "hello") is None
+        assert len(cache) == 0
+
+    @pytest.mark.parametrize(
+        "name, value", [("channel", "MediumFast"), ("key", "AAAA"), ("userid", 1)]
+    )
+    def test_config_change_invalidates(self, config, fake_clock, name, value):
+        """Test that envelopes built for another channel, key or node are dropped."""
+        cache = MessageCache(clock=fake_clock)
+        cache.put(config, b"envelope", "text", "hello")
+
+        config.config[name] = value
+        assert cache.get(config, "text", "hello") is None
+        assert cache.invalidations == 1
+        assert len(cache) == 0
+
+    def test_explicit_invalidation(self, config, fake_clock):
+        cache = MessageCache(clock=fake_clock)
+        cache.put(config, b"envelope", "text", "hello")
+
+        cache.invalidate()
+        assert cache.get(config, "text", "hello") is None
+
+    def test_disabled(self, config, fake_clock):
+        """Test that a cache of size zero never stores anything."""
+        cache = MessageCache(max_size=0, clock=fake_clock)
+        cache.put(config, b"envelope", "text", "hello")
+
+        assert cache.get(config, "text", "hello") is None
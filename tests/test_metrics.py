@@ -0,0 +1,65 @@
+import pytest
+
+from src.Metrics import Metrics
+
+
+class TestMetrics:
+    def test_counter_and_gauge(self):
+        """Test that counters and gauges render in OpenMetrics format."""
+        metrics = Metrics()
+        counter = metrics.counter("test_events", "Events seen")
+        gauge = metrics.gauge("test_depth", "Queue depth")
+        counter.inc()
+        counter.inc(2)
+        gauge.set(7)
+
+        assert list(metrics.render()) == [
+            "# TYPE test_events counter",
+            "# HELP test_events Events seen",
+            "test_events_total 3",
+            "# TYPE test_depth gauge",
+            "# HELP test_depth Queue depth",
+            "test_depth 7",
+        ]
+
+    def test_function_values_are_read_on_render(self):
+        """Test that a metric backed by a function reports its current value."""
+        metrics = Metrics()
+        queue = [1, 2]
+        metrics.gauge("test_depth", "Queue depth", lambda: len(queue))
+        queue.append(3)
+
+        assert "test_depth 3" in metrics.render()
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that histogram buckets count every observation up to their bound."""
+        metrics = Metrics()
+        histogram = metrics.histogram("test_seconds", "Latency", (0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+
+        samples = list(metrics.render())[2:]
+        assert samples == [
+            'test_seconds_bucket{le="0.1"} 2',
+            'test_seconds_bucket{le="1"} 3',
+            'test_seconds_bucket{le="+Inf"} 4',
+            "test_seconds_sum 3.65",
+            "test_seconds_count 4",
+        ]
+
+    def test_exposition_joins_registries(self):
+        """Test that several registries render as one document ending in EOF."""
+        first, second = Metrics(), Metrics()
+        first.counter("test_first", "First")
+        second.counter("test_second", "Second")
+
+        text = Metrics.exposition([first, second])
+        assert text.endswith("# EOF\n")
+        assert text.index("test_first_total") < text.index("test_second_total")
+
+    def test_duplicate_names_are_rejected(self):
+        """Test that registering the same metric twice is an error."""
+        metrics = Metrics()
+        metrics.counter("test_events", "Events seen")
+        with pytest.raises(AssertionError):
+            metrics.gauge("test_events", "Events seen")
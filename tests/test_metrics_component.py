@@ -0,0 +1,69 @@
+import anyio
+import httpx
+import pytest
+from asphalt.core import Context
+
+from src.Metrics import Metrics
+from src.MetricsComponent import CONTENT_TYPE, MetricsComponent
+
+
+class TestMetricsComponent:
+    @pytest.mark.asyncio
+    async def test_serves_all_registries(self):
+        """Test that GET /metrics renders every registry in the context."""
+        component = MetricsComponent(port=0)
+        scraper = Metrics()
+        scraper.counter("potatastic_scrape_errors", "Scrapes that failed").inc()
+
+        async with Context() as ctx:
+            ctx.add_resource(scraper, name="scraper")
+            await component.start(ctx)
+            try:
+                async with httpx.AsyncClient() as client:
+                    response = await client.get(
+                        f"http://127.0.0.1:{component.port}/metrics"
+                    )
+            finally:
+                await component.stop()
+
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == CONTENT_TYPE
+        assert "potatastic_scrape_errors_total 1" in response.text
+        assert "# TYPE potatastic_event_loop_lag_seconds histogram" in response.text
+        assert response.text.endswith("# EOF\n")
+
+    @pytest.mark.asyncio
+    async def test_unknown_path(self):
+        """Test that other paths are not found."""
+        component = MetricsComponent(port=0)
+
+        async with Context() as ctx:
+            await component.start(ctx)
+            try:
+                async with httpx.AsyncClient() as client:
+                    response = await client.get(f"http://127.0.0.1:{component.port}/")
+            finally:
+                await component.stop()
+
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_event_loop_lag(self):
+        """Test that a blocked event loop shows up as lag."""
+        component = MetricsComponent(port=0, lag_interval=0.01)
+
+        async with Context() as ctx:
+            await component.start(ctx)
+            try:
+                await anyio.sleep(0.005)
+                # Hold the event loop without yielding to it
+                deadline = anyio.current_time() + 0.05
+                while anyio.current_time() < deadline:
+                    pass
+                with anyio.fail_after(1):
+                    while component.loop_lag.count == 0:
+                        await anyio.sleep(0.01)
+            finally:
+                await component.stop()
+
+        assert component.loop_lag.sum >= 0.03
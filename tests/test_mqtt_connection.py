@@ -0,0 +1,128 @@
+from contextlib import asynccontextmanager
+from unittest.mock import Mock
+
+import aiomqtt
+import anyio
+import pytest
+
+from src.MQTTConnection import MQTTConnection
+
+
+class TestMQTTConnection:
+    @pytest.fixture
+    def config(self, mqtt_broker):
+        config = Mock()
+        config.aiomqtt_config = mqtt_broker.config
+        config.config = {"host": "127.0.0.1"}
+        return config
+
+    @pytest.fixture
+    def connection(self, config):
+        return MQTTConnection(config, min_backoff=0.05, max_backoff=0.2)
+
+    @staticmethod
+    @asynccontextmanager
+    async def running(connection):
+        await connection.start()
+        try:
+            yield connection
+        finally:
+            await connection.stop()
+
+    @staticmethod
+    async def receive(connection, count=1):
+        with anyio.fail_after(5):
+            return [await connection.messages.receive() for _ in range(count)]
+
+    @pytest.mark.asyncio
+    async def test_publish_and_receive_share_one_client(self, connection, mqtt_broker):
+        """Test that both directions go over a single broker connection."""
+        async with self.running(connection):
+            await connection.subscribe("test/#")
+            with anyio.fail_after(5):
+                await connection.publish("test/spot", b"W1ABC 14230")
+
+            (message,) = await self.receive(connection)
+            assert message.topic.value == "test/spot"
+            assert message.payload == b"W1ABC 14230"
+            assert mqtt_broker.connects == 1
+            assert len(mqtt_broker.subscriptions) == 1
+
+    @pytest.mark.asyncio
+    async def test_reconnects_and_resubscribes(self, connection, mqtt_broker):
+        """Test that a restarted broker is reconnected and re-subscribed."""
+        async with self.running(connection):
+            await connection.subscribe("test/#")
+            with anyio.fail_after(5):
+                await connection.wait_connected()
+
+            await mqtt_broker.stop()
+            with anyio.fail_after(5):
+                while connection.connected:
+                    await anyio.sleep(0.01)
+            await mqtt_broker.start()
+
+            with anyio.fail_after(5):
+                await connection.publish("test/after", b"back")
+            (message,) = await self.receive(connection)
+            assert message.payload == b"back"
+            assert connection.connects == 2
+            assert mqtt_broker.subscriptions.popitem()[1] == ["test/#"]
+
+    @pytest.mark.asyncio
+    async def test_publish_waits_for_connection(self, connection, mqtt_broker):
+        """Test that publishing while the broker is down waits for it."""
+        async with self.running(connection):
+            with anyio.fail_after(5):
+                await connection.wait_connected()
+            await mqtt_broker.stop()
+            with anyio.fail_after(5):
+                while connection.connected:
+                    await anyio.sleep(0.01)
+
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(connection.publish, "test/queued", b"later")
+                await anyio.sleep(0.3)
+                assert mqtt_broker.published == []
+                await mqtt_broker.start()
+
+            assert mqtt_broker.published == [("test/queued", b"later")]
+
+    @pytest.mark.asyncio
+    async def test_backoff_grows_while_broker_is_down(self, config, mqtt_broker):
+        """Test that failed connects back off exponentially up to the limit."""
+        await mqtt_broker.stop()
+        connection = MQTTConnection(config, min_backoff=1, max_backoff=4, jitter=0)
+        delays = []
+
+        async def sleep(delay):
+            delays.append(delay)
+            if len(delays) == 5:
+                raise anyio.get_cancelled_exc_class()
+
+        with pytest.MonkeyPatch.context() as monkeypatch:
+            monkeypatch.setattr("src.MQTTConnection.anyio.sleep", sleep)
+            with pytest.raises(anyio.get_cancelled_exc_class()):
+                await connection.run()
+
+        assert delays == [1, 2, 4, 4, 4]
+        assert connection.connected is False
+
+    def test_port_from_environment_is_an_integer(self, config):
+        """Test that a port given as a string, as MQTT_PORT is, is converted."""
+        config.aiomqtt_config = {"hostname": "127.0.0.1", "port": "1883"}
+        connection = MQTTConnection(config)
+
+        assert connection.client_config() == {"hostname": "127.0.0.1", "port": 1883}
+
+    @pytest.mark.asyncio
+    async def test_publish_error_propagates(self, connection):
+        """Test that a publish failing mid-flight raises for the caller to retry."""
+        async with self.running(connection):
+            with anyio.fail_after(5):
+                await connection.wait_connected()
+            connection.client = Mock()
+            connection.client.publish.side_effect = aiomqtt.MqttError("lost")
+
+            with pytest.raises(aiomqtt.MqttError):
+                await connection.publish("test/topic", b"payload")
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest.mock import patch
+
+import pytest
+
+from src.PollScheduler import PollScheduler
+
+
+class TestPollScheduler:
+    @pytest.fixture
+    def clock(self, fake_clock):
+        return fake_clock
+
+    @pytest.fixture
+    def scheduler(self, clock):
+        with patch("src.PollScheduler.random.random", return_value=0.0):
+            yield PollScheduler(
+                period=30,
+                min_period=10,
+                max_period=300,
+                backoff=2,
+                clock=clock,
+                sleep=clock.sleep,
+            )
+
+    @pytest.mark.asyncio
+    async def test_first_poll_is_immediate(self, scheduler, clock):
+        """Test that the first wait does not sleep."""
+        await scheduler.wait()
+        assert clock.sleeps == []
+        assert scheduler.deadline == clock.now
+
+    @pytest.mark.asyncio
+    async def test_fixed_rate_without_drift(self, scheduler, clock):
+        """Test that time spent polling is not added to the interval."""
+        start = clock.now
+        for _ in range(5):
+            await scheduler.wait()
+            clock.now += 4  # time spent fetching
+            scheduler.record_success(1)
+
+        await scheduler.wait()
+        assert clock.now == start + 5 * 30
+        assert clock.sleeps == [26] * 5
+
+    @pytest.mark.asyncio
+    async def test_overrun_starts_next_poll_immediately(self, scheduler, clock):
+        """Test that an overrunning poll does not cause a catch-up burst."""
+        await scheduler.wait()
+        scheduler.record_success(1)
+        clock.now += 100
+
+        await scheduler.wait()
+        await scheduler.wait()
+        assert clock.sleeps == [0]
+
+    def test_busy_feed_polls_faster(self, scheduler):
+        """Test that a high rate of new spots shortens the period."""
+        assert scheduler.record_success(10) == 15
+        assert scheduler.record_success(10) == 10
+        assert scheduler.record_success(10) == 10
+
+    def test_quiet_feed_backs_off(self, scheduler):
+        """Test that quiet polls grow the period up to the maximum."""
+        delays = [scheduler.record_success(0) for _ in range(6)]
+        assert delays == [60, 120, 240, 300, 300, 300]
+
+    def test_activity_returns_to_base_period(self, scheduler):
+        """Test that new spots after a quiet period restore the base period."""
+        for _ in range(4):
+            scheduler.record_success(0)
+        assert scheduler.record_success(1) == 30
+        assert scheduler.record_success(1) == 30
+
+    def test_errors_back_off_exponentially(self, scheduler):
+        """Test exponential backoff after errors, reset by a success."""
+        delays = [scheduler.record_error() for _ in range(5)]
+        assert delays == [60, 120, 240, 300, 300]
+        assert scheduler.record_success(1) == 30
+        assert scheduler.record_error() == 60
+
+    def test_long_outage_stays_at_max_period(self, clock):
+        """Test that thousands of errors in a row do not overflow the backoff."""
+        scheduler = PollScheduler(jitter=0, clock=clock)
+        delays = [scheduler.record_error() for _ in range(5000)]
+        assert delays[-1] == scheduler.max_period
+
+    def test_jitter_shortens_delay(self, clock):
+        """Test that jitter never exceeds the computed delay."""
+        scheduler = PollScheduler(period=30, jitter=0.5, clock=clock)
+        with patch("src.PollScheduler.random.random", return_value=1.0):
+            assert scheduler.record_error() == 30
+        with patch("src.PollScheduler.random.random", return_value=0.5):
+            assert scheduler.record_error() == 90
+
+    def test_retry_after_seconds(self, scheduler):
+        """Test that Retry-After in seconds extends the backoff."""
+        assert scheduler.record_error("600") == 600
+        assert scheduler.record_error("5") == 120
+
+    def test_retry_after_http_date(self, scheduler):
+        """Test that Retry-After given as an HTTP date is honoured."""
+        when = datetime.now(timezone.utc) + timedelta(seconds=900)
+        delay = scheduler.record_error(format_datetime(when, usegmt=True))
+        assert 890 < delay <= 900
+
+    def test_parse_retry_after_invalid(self):
+        """Test that unparseable Retry-After values are ignored."""
+        assert PollScheduler.parse_retry_after(None) is None
+        assert PollScheduler.parse_retry_after("soon") is None
+        assert PollScheduler.parse_retry_after("-5") == 0.0
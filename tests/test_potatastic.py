@@ -1,12 +1,16 @@
 import logging
+import os
 from contextlib import suppress
 from unittest.mock import patch
 
 import pytest
 
+from src.JsonFormatter import JsonFormatter
 from src.MeshtasticCommunicationComponent import MeshtasticCommunicationComponent
-from src.potatastic import main
+from src.MetricsComponent import MetricsComponent
+from src.potatastic import create_container, main
 from src.ScraperComponent import ScraperComponent
+from src.SnapshotComponent import SnapshotComponent
 
 
 class TestPotatastic:
@@ -52,6 +56,83 @@ class TestPotatastic:
             # The component should be properly instantiated
             assert container_component is not None
 
+    def test_logging_is_configured_from_environment(self):
+        """Test that LOG_LEVEL and LOG_FORMAT control the logging setup."""
+        with (
+            patch("src.potatastic.run_application"),
+            patch("src.potatastic.logging.basicConfig") as mock_basic_config,
+            patch.dict("os.environ", {"LOG_LEVEL": "debug", "LOG_FORMAT": "json"}),
+        ):
+            main()
+
+        kwargs = mock_basic_config.call_args[1]
+        assert kwargs["level"] == "DEBUG"
+        assert isinstance(kwargs["handlers"][0].formatter, JsonFormatter)
+
+    def test_logging_defaults_to_info(self):
+        """Test that logging defaults to INFO in plain text."""
+        with (
+            patch("src.potatastic.run_application"),
+            patch("src.potatastic.logging.basicConfig") as mock_basic_config,
+            patch.dict("os.environ"),
+        ):
+            os.environ.pop("LOG_LEVEL", None)
+            os.environ.pop("LOG_FORMAT", None)
+            main()
+
+        kwargs = mock_basic_config.call_args[1]
+        assert kwargs["level"] == "INFO"
+        assert kwargs["handlers"][0].formatter is None
+
+    def test_metrics_component_is_optional(self):
+        """Test that the metrics endpoint is only added when a port is set."""
+        with (
+            patch("src.potatastic.run_application") as mock_run_app,
+            patch("src.potatastic.logging.basicConfig"),
+            patch.dict("os.environ", {"METRICS_PORT": "9464"}),
+        ):
+            main()
+            configs = mock_run_app.call_args[0][0].component_configs
+            assert configs["metrics"]["type"] is MetricsComponent
+            assert configs["metrics"]["port"] == 9464
+
+            del os.environ["METRICS_PORT"]
+            main()
+            configs = mock_run_app.call_args[0][0].component_configs
+            assert "metrics" not in configs
+
+    def test_snapshot_component_is_optional(self):
+        """Test that snapshots are only kept when a path is set."""
+        with patch.dict("os.environ", {"SNAPSHOT_PATH": "/data/snapshot.json.gz"}):
+            configs = create_container().component_configs
+        assert configs["snapshot"] == {
+            "type": SnapshotComponent,
+            "path": "/data/snapshot.json.gz",
+        }
+
+        with patch.dict("os.environ"):
+            os.environ.pop("SNAPSHOT_PATH", None)
+            assert "snapshot" not in create_container().component_configs
+
+    def test_spot_sources_from_environment(self):
+        """Test that SPOT_SOURCES adds feeds to the scraper."""
+        with patch.dict("os.environ", {"SPOT_SOURCES": "SOTA, wwff"}):
+            configs = create_container().component_configs
+        assert configs["scraper"]["sources"] == [{"type": "sota"}, {"type": "wwff"}]
+
+    def test_create_container_overrides(self):
+        """Test that component arguments can be overridden per alias."""
+        container = create_container(
+            {"scraper": {"spot_url": "http://127.0.0.1:8080/spots"}}
+        )
+
+        configs = container.component_configs
+        assert configs["scraper"] == {
+            "type": ScraperComponent,
+            "spot_url": "http://127.0.0.1:8080/spots",
+        }
+        assert configs["mqtt"] == {"type": MeshtasticCommunicationComponent}
+
     def test_main_function_exception_handling(self):
         """Test that main function handles exceptions appropriately."""
         with (
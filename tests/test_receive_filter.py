@@ -0,0 +1,111 @@
+import pytest
+from meshage.config import MQTTConfig
+from meshage.messages import MeshtasticNodeInfoMessage, MeshtasticTextMessage
+from meshage.parser import MeshtasticMessageParser
+from meshtastic.protobuf import mesh_pb2, mqtt_pb2, portnums_pb2
+
+from src.ReceiveFilter import ReceiveFilter
+
+OTHER_NODE = 0x1234ABCD
+
+
+@pytest.fixture
+def config():
+    return MQTTConfig()
+
+
+@pytest.fixture
+def other(config):
+    """The same channel as seen by another node."""
+    other = MQTTConfig()
+    other.config["userid"] = OTHER_NODE
+    return other
+
+
+@pytest.fixture
+def topic(other):
+    return other.publish_topic
+
+
+class TestReceiveFilter:
+    def test_text_from_another_node_passes(self, config, other, topic):
+        """Test that a text message gets through and still parses."""
+        payload = bytes(MeshtasticTextMessage("enable", other))
+
+        assert ReceiveFilter(config).check(topic, payload) is None
+        parsed = MeshtasticMessageParser(config).parse_message(payload)
+        assert parsed.text == "enable"
+
+    def test_other_portnums_are_dropped(self, config, other, topic):
+        """Test that node info is dropped from the first decrypted bytes."""
+        payload = bytes(MeshtasticNodeInfoMessage(other))
+
+        assert ReceiveFilter(config).check(topic, payload) == "portnum"
+
+    def test_own_messages_are_dropped(self, config):
+        """Test that our own messages echoed back by the broker are dropped."""
+        payload = bytes(MeshtasticTextMessage("enable", config))
+
+        assert ReceiveFilter(config).check(config.publish_topic, payload) == "self"
+
+    @pytest.mark.parametrize(
+        "topic",
+        [
+            "msh/US/2/e/Other/!1234abcd",
+            "msh/US/2/json/LongFast/!1234abcd",
+            "msh/US/2/map/",
+            "msh/US/2/stat/!1234abcd",
+            "LongFast",
+        ],
+    )
+    def test_other_topics_are_dropped(self, config, other, topic):
+        """Test that JSON, map, status and other channel topics are dropped."""
+        payload = bytes(MeshtasticTextMessage("enable", other))
+
+        assert ReceiveFilter(config).check(topic, payload) == "topic"
+
+    def test_root_topic_with_several_levels(self, config, other):
+        """Test that the channel is found however deep the root topic is."""
+        payload = bytes(MeshtasticTextMessage("enable", other))
+
+        topic = "msh/EU_868/DE/2/e/LongFast/!1234abcd"
+        assert ReceiveFilter(config).check(topic, payload) is None
+
+    def test_oversize_and_malformed(self, config, topic):
+        """Test that payloads which cannot be a packet are dropped unparsed."""
+        receive_filter = ReceiveFilter(config)
+
+        assert receive_filter.check(topic, b"\x00" * 300) == "size"
+        assert receive_filter.check(topic, b"\xff\xff") == "malformed"
+        assert receive_filter.check(topic, b"") == "malformed"
+
+    def test_other_channels_are_dropped(self, config, other, topic):
+        """Test that packets for another channel are dropped before decrypting."""
+        other.config["channel"] = "MediumSlow"
+        envelope = mqtt_pb2.ServiceEnvelope.FromString(
+            bytes(MeshtasticTextMessage("enable", other))
+        )
+        receive_filter = ReceiveFilter(config)
+
+        assert receive_filter.check(topic, envelope.SerializeToString()) == "channel"
+        envelope.channel_id = ""
+        assert receive_filter.check(topic, envelope.SerializeToString()) == "channel"
+
+    @pytest.mark.parametrize(
+        "portnum, stage",
+        [
+            (portnums_pb2.TEXT_MESSAGE_APP, None),
+            (portnums_pb2.POSITION_APP, "portnum"),
+        ],
+    )
+    def test_unencrypted_packets(self, config, topic, portnum, stage):
+        """Test that a packet already decoded is checked by its portnum."""
+        envelope = mqtt_pb2.ServiceEnvelope()
+        envelope.channel_id = "LongFast"
+        packet = mesh_pb2.MeshPacket()
+        setattr(packet, "from", OTHER_NODE)
+        packet.decoded.portnum = portnum
+        packet.decoded.payload = b"enable"
+        envelope.packet.CopyFrom(packet)
+
+        assert ReceiveFilter(config).check(topic, envelope.SerializeToString()) == stage
@@ -1,11 +1,22 @@
+import gzip
+import json
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import AsyncMock, Mock, patch
 
+import anyio
+import httpx
 import pytest
-import requests
+from meshage.config import MQTTConfig
 
+from src.CommandEventSource import CommandEventSource
+from src.MeshtasticCommunicationComponent import MeshtasticCommunicationComponent
+from src.MQTTConnection import MQTTConnection
 from src.NewSpotEventSource import NewSpotEventSource
 from src.ScraperComponent import ScraperComponent
-from src.Spot import Spot
+from src.SpotStore import SpotStore
 
 
 class TestScraperComponent:
@@ -44,62 +55,25 @@ class TestScraperComponent:
         assert scraper.SPOT_URL == "https://api.pota.app/v1/spots"
         assert scraper.FETCH_PERIOD == 30
 
-    @patch("src.ScraperComponent.requests.get")
-    def test_get_spot_reports(self, mock_get, sample_api_response):
-        """Test that get_spot_reports fetches and parses API data correctly."""
-        mock_response = Mock()
-        mock_response.json.return_value = sample_api_response
-        mock_get.return_value = mock_response
-
-        spots = ScraperComponent().get_spot_reports()
-
-        mock_get.assert_called_once_with("https://api.pota.app/v1/spots")
-        assert len(spots) == 2
-        assert all(isinstance(spot, Spot) for spot in spots)
-        assert spots[0].callsign == "W1ABC"
-        assert spots[1].callsign == "W3DEF"
-
-    def test_get_new_spots_with_empty_existing(self, sample_api_response):
-        """Test get_new_spots when no existing spots are present."""
-        scraper = ScraperComponent()
-        existing_spots = {}
-        new_scrape = [Spot(spot_data) for spot_data in sample_api_response]
-
-        added = scraper.get_new_spots(existing_spots, new_scrape)
+    @staticmethod
+    def mock_client(handler):
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
 
-        assert len(added) == 2
-        assert len(existing_spots) == 2
-        assert "W1ABC-14.23-CW" in existing_spots
-        assert "W3DEF-7.074-FT8" in existing_spots
-
-    def test_get_new_spots_with_existing_spots(self, sample_api_response):
-        """Test get_new_spots when some spots already exist."""
-        scraper = ScraperComponent()
-        first_spot = Spot(sample_api_response[0])
-        existing_spots = {first_spot.key: first_spot}
-        new_scrape = [Spot(spot_data) for spot_data in sample_api_response]
-
-        added = scraper.get_new_spots(existing_spots, new_scrape)
+    @pytest.mark.asyncio
+    async def test_get_spot_reports(self, sample_api_response):
+        """Test that get_spot_reports fetches and parses API data correctly."""
+        requested = []
 
-        # Only the second spot should be added as new
-        assert len(added) == 1
-        assert added[0].callsign == "W3DEF"
-        assert len(existing_spots) == 2
+        def handler(request):
+            requested.append(str(request.url))
+            return httpx.Response(200, json=sample_api_response)
 
-    def test_get_new_spots_no_new_spots(self, sample_api_response):
-        """Test get_new_spots when all spots already exist."""
         scraper = ScraperComponent()
-        existing_spots = {}
-        initial_scrape = [Spot(spot_data) for spot_data in sample_api_response]
-
-        # First scrape - all spots are new
-        scraper.get_new_spots(existing_spots, initial_scrape)
+        scraper.client = self.mock_client(handler)
+        spots = await scraper.get_spot_reports()
 
-        # Second scrape with same data - no new spots
-        added = scraper.get_new_spots(existing_spots, initial_scrape)
-
-        assert len(added) == 0
-        assert len(existing_spots) == 2
+        assert requested == ["https://api.pota.app/v1/spots"]
+        assert spots == sample_api_response
 
     @pytest.mark.asyncio
     async def test_start_method(self):
@@ -118,9 +92,18 @@ class TestScraperComponent:
             await scraper.start(mock_ctx)
 
             # Verify resources are added
-            assert mock_ctx.add_resource.call_count == 2
+            assert mock_ctx.add_resource.call_count == 4
             calls = mock_ctx.add_resource.call_args_list
 
+            # Check that the scraper's metrics are added
+            assert any(
+                call[0][0] is scraper.metrics and call[1].get("name") == "scraper"
+                for call in calls
+            )
+
+            # Check that the dedupe policy is shared
+            assert any(call[0][0] is scraper.dedupe for call in calls)
+
             # Check that NewSpotEventSource is added
             assert any(isinstance(call[0][0], NewSpotEventSource) for call in calls)
             # Check that spots dict is added
@@ -157,25 +140,462 @@ class TestScraperComponent:
         await scraper.stop()
         assert scraper.running is False
 
-    @patch("src.ScraperComponent.requests.get")
-    def test_get_spot_reports_api_error(self, mock_get):
+    @pytest.mark.asyncio
+    async def test_get_spot_reports_api_error(self):
         """Test that get_spot_reports handles API errors appropriately."""
-        mock_get.side_effect = requests.RequestException("API Error")
+
+        def handler(request):
+            raise httpx.ConnectError("API Error", request=request)
 
         scraper = ScraperComponent()
+        scraper.client = self.mock_client(handler)
 
         # Should raise the exception (component handles this in scraper_task)
-        with pytest.raises(requests.RequestException):
-            scraper.get_spot_reports()
+        with pytest.raises(httpx.RequestError):
+            await scraper.get_spot_reports()
+
+    @pytest.mark.asyncio
+    async def test_get_spot_reports_http_error(self):
+        """Test that error status codes are raised rather than parsed."""
+        scraper = ScraperComponent()
+        scraper.client = self.mock_client(lambda request: httpx.Response(503))
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await scraper.get_spot_reports()
 
-    @patch("src.ScraperComponent.requests.get")
-    def test_get_spot_reports_invalid_json(self, mock_get):
+    @pytest.mark.asyncio
+    async def test_get_spot_reports_invalid_json(self):
         """Test handling of invalid JSON response."""
-        mock_response = Mock()
-        mock_response.json.side_effect = ValueError("Invalid JSON")
-        mock_get.return_value = mock_response
+        scraper = ScraperComponent()
+        scraper.client = self.mock_client(
+            lambda request: httpx.Response(200, content=b"not json")
+        )
+
+        with pytest.raises(ValueError):
+            await scraper.get_spot_reports()
+
+    def test_timeouts_are_configurable(self):
+        """Test that connect and read timeouts are passed to the HTTP client."""
+        scraper = ScraperComponent(connect_timeout=1.5, read_timeout=7.0)
+        assert scraper.client.timeout.connect == 1.5
+        assert scraper.client.timeout.read == 7.0
+
+    def test_fetch_period_is_configurable(self):
+        """Test that the poll scheduler is built from the component options."""
+        scraper = ScraperComponent(
+            fetch_period=60, min_fetch_period=20, max_fetch_period=600
+        )
+        assert scraper.scheduler.period == 60
+        assert scraper.scheduler.min_period == 20
+        assert scraper.scheduler.max_period == 600
+
+    @pytest.mark.asyncio
+    async def test_task_records_metrics(self, sample_api_response):
+        """Test that each scrape is recorded in the scraper metrics."""
+        responses = [
+            httpx.Response(200, json=sample_api_response),
+            httpx.Response(503),
+        ]
+        scraper = ScraperComponent()
+        scraper.client = self.mock_client(lambda request: responses.pop(0))
+        scraper.running = True
+        resources = {
+            NewSpotEventSource: NewSpotEventSource(),
+            SpotStore: SpotStore(ttl=timedelta(days=36500)),
+        }
+
+        async def wait():
+            if not responses:
+                await anyio.sleep_forever()
+
+        with (
+            patch("src.ScraperComponent.current_context") as mock_context,
+            patch.object(scraper.scheduler, "wait", wait),
+        ):
+            mock_context.return_value.request_resource = AsyncMock(
+                side_effect=lambda resource_type, name=None: resources[resource_type]
+            )
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(scraper.task)
+                with anyio.fail_after(1):
+                    while responses or not scraper.scrape_errors.value:
+                        await anyio.sleep(0)
+                tg.cancel_scope.cancel()
+
+        assert scraper.scrape_seconds.count == 1
+        assert scraper.scrape_spots.sum == 2
+        assert scraper.scrape_new_spots.sum == 2
+        assert scraper.scrape_errors.value == 1
 
+    @pytest.mark.asyncio
+    async def test_stop_closes_client(self):
+        """Test that stop releases the pooled HTTP connections."""
         scraper = ScraperComponent()
+        await scraper.stop()
+        assert scraper.client.is_closed
+
 
+class TestConditionalFetch:
+    @pytest.fixture
+    def body(self):
+        return json.dumps(
+            [
+                {
+                    "activator": "W1ABC",
+                    "frequency": "14.230",
+                    "grid4": "FN42",
+                    "mode": "CW",
+                    "name": "Mount Washington State Park",
+                    "reference": "K-0001",
+                    "spotId": 12345,
+                    "spotter": "W2XYZ",
+                    "spotTime": "2024-01-15T14:30:00",
+                }
+            ]
+            * 20
+        ).encode()
+
+    @pytest.mark.asyncio
+    async def test_not_modified_skips_parse(self, body):
+        """Test that validators are sent back and a 304 skips parsing."""
+        seen_headers = []
+
+        def handler(request):
+            seen_headers.append(request.headers)
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(
+                200,
+                stream=httpx.ByteStream(body),
+                headers={
+                    "ETag": '"v1"',
+                    "Last-Modified": "Mon, 15 Jan 2024 14:30:00 GMT",
+                },
+            )
+
+        scraper = ScraperComponent()
+        scraper.client = TestScraperComponent.mock_client(handler)
+
+        assert len(await scraper.get_spot_reports()) == 20
+        assert await scraper.get_spot_reports() is None
+
+        assert "If-None-Match" not in seen_headers[0]
+        assert seen_headers[1]["If-None-Match"] == '"v1"'
+        assert seen_headers[1]["If-Modified-Since"] == "Mon, 15 Jan 2024 14:30:00 GMT"
+        assert scraper.parses_skipped == 1
+        assert scraper.bytes_saved == len(body)
+
+    @pytest.mark.parametrize("stream", [False, True])
+    @pytest.mark.asyncio
+    async def test_failed_body_keeps_old_validators(self, body, stream):
+        """Test that a body that breaks part-way is fetched in full next time."""
+        seen_headers = []
+        bodies = iter([body[: len(body) // 2], body])
+
+        def handler(request):
+            seen_headers.append(request.headers)
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(
+                200, stream=httpx.ByteStream(next(bodies)), headers={"ETag": '"v1"'}
+            )
+
+        scraper = ScraperComponent(stream=stream)
+        scraper.client = TestScraperComponent.mock_client(handler)
+
+        async def dispatch(spot):
+            pass
+
+        spots = SpotStore(ttl=timedelta(days=36500))
         with pytest.raises(ValueError):
-            scraper.get_spot_reports()
+            await scraper.scrape(spots, dispatch)
+        assert scraper.etag is None
+
+        diff = await scraper.scrape(spots, dispatch)
+
+        assert "If-None-Match" not in seen_headers[1]
+        assert diff.seen == {"W1ABC-14.23-CW"}
+        assert scraper.etag == '"v1"'
+
+    @pytest.mark.asyncio
+    async def test_unchanged_body_skips_parse(self, body):
+        """Test that an identical body without validators is not decoded again."""
+        scraper = ScraperComponent()
+        scraper.client = TestScraperComponent.mock_client(
+            lambda request: httpx.Response(200, content=body)
+        )
+
+        assert len(await scraper.get_spot_reports()) == 20
+        with patch.object(httpx.Response, "json") as mock_json:
+            assert await scraper.get_spot_reports() is None
+            mock_json.assert_not_called()
+        assert scraper.parses_skipped == 1
+
+    @pytest.mark.asyncio
+    async def test_changed_body_is_parsed(self, body):
+        """Test that a new body is parsed after an unchanged one."""
+        bodies = iter([body, body, json.dumps(json.loads(body)[:5]).encode()])
+        scraper = ScraperComponent()
+        scraper.client = TestScraperComponent.mock_client(
+            lambda request: httpx.Response(200, content=next(bodies))
+        )
+
+        assert len(await scraper.get_spot_reports()) == 20
+        assert await scraper.get_spot_reports() is None
+        assert len(await scraper.get_spot_reports()) == 5
+
+    @pytest.mark.asyncio
+    async def test_compressed_transfer(self, body):
+        """Test that gzip bodies are accepted and the savings are counted."""
+        compressed = gzip.compress(body)
+
+        def handler(request):
+            assert "gzip" in request.headers["Accept-Encoding"]
+            return httpx.Response(
+                200,
+                stream=httpx.ByteStream(compressed),
+                headers={"Content-Encoding": "gzip"},
+            )
+
+        scraper = ScraperComponent()
+        scraper.client = TestScraperComponent.mock_client(handler)
+
+        assert len(await scraper.get_spot_reports()) == 20
+        assert scraper.bytes_saved == len(body) - len(compressed)
+
+
+class SlowSpotServer(ThreadingHTTPServer):
+    """Local stand-in for the spot API that holds every request open."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                self.release.wait(timeout=10)
+                body = b"[]"
+                handler.send_response(200)
+                handler.send_header("Content-Type", "application/json")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, *args):
+                pass
+
+        super().__init__(("127.0.0.1", 0), Handler)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1/spots"
+
+
+class TestNonBlockingFetch:
+    @pytest.fixture
+    def slow_server(self):
+        server = SlowSpotServer()
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.release.set()
+        server.shutdown()
+        server.server_close()
+
+    @pytest.mark.asyncio
+    async def test_fetch_times_out(self, slow_server):
+        """Test that a hung API call is abandoned after the read timeout."""
+        scraper = ScraperComponent(spot_url=slow_server.url, read_timeout=0.1)
+        try:
+            with pytest.raises(httpx.ReadTimeout):
+                await scraper.get_spot_reports()
+        finally:
+            await scraper.client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_mqtt_receive_runs_while_fetch_hangs(self, slow_server):
+        """Test that MQTT messages keep being handled during a slow fetch."""
+        scraper = ScraperComponent(spot_url=slow_server.url)
+        consumer = MeshtasticCommunicationComponent()
+        command_event_source = CommandEventSource()
+        received = []
+        command_event_source.signal.connect(received.append)
+
+        mock_config = Mock()
+        mock_config.aiomqtt_config = {}
+        mock_config.receive_topic = "test/receive"
+        mock_config.config = {"host": "test.host"}
+
+        def mock_request_resource(resource_type, name=None):
+            if resource_type == CommandEventSource:
+                return command_event_source
+            elif resource_type == MQTTConfig:
+                return mock_config
+            elif resource_type == MQTTConnection:
+                return mock_connection
+            return None
+
+        async def mock_messages():
+            while True:
+                message = Mock()
+                message.payload = b"enable"
+                yield message
+                await anyio.sleep(0.01)
+
+        mock_connection = AsyncMock()
+        mock_connection.messages = mock_messages()
+        fetch_done = anyio.Event()
+
+        async def fetch():
+            await scraper.get_spot_reports()
+            fetch_done.set()
+
+        with (
+            patch(
+                "src.MeshtasticCommunicationComponent.current_context"
+            ) as mock_context,
+            patch("src.MeshtasticCommunicationComponent.MeshtasticMessageParser"),
+            patch(
+                "src.MeshtasticCommunicationComponent.ReceiveFilter"
+            ) as mock_filter_class,
+            patch("src.CodecService.decode_text", return_value=("enable", 1234)),
+        ):
+            mock_ctx = AsyncMock()
+            mock_ctx.request_resource.side_effect = mock_request_resource
+            mock_context.return_value = mock_ctx
+            mock_filter_class.return_value.check.return_value = None
+
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(fetch)
+                tg.start_soon(consumer.receive_task)
+                tg.start_soon(consumer.command_task)
+                started = time.monotonic()
+                with anyio.fail_after(5):
+                    while len(received) < 10:
+                        await anyio.sleep(0.01)
+
+                # The fetch is still hanging on the stub server
+                assert not fetch_done.is_set()
+                assert time.monotonic() - started < 5
+
+                slow_server.release.set()
+                with anyio.fail_after(5):
+                    await fetch_done.wait()
+                tg.cancel_scope.cancel()
+
+        await scraper.client.aclose()
+
+
+class ChunkedSpotServer(ThreadingHTTPServer):
+    """Local stand-in for the spot API that streams a chunked response."""
+
+    def __init__(self, records):
+        self.release = threading.Event()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(handler):
+                handler.send_response(200)
+                handler.send_header("Content-Type", "application/json")
+                handler.send_header("Transfer-Encoding", "chunked")
+                handler.end_headers()
+
+                body = json.dumps(records).encode()
+                split = len(json.dumps(records[0])) + 2
+                self.write_chunk(handler, body[:split])
+                # Hold the rest back until the test has seen the first spot
+                self.release.wait(timeout=10)
+                for start in range(split, len(body), 50):
+                    self.write_chunk(handler, body[start : start + 50])
+                self.write_chunk(handler, b"")
+
+            def log_message(handler, *args):
+                pass
+
+        super().__init__(("127.0.0.1", 0), Handler)
+
+    @staticmethod
+    def write_chunk(handler, data: bytes) -> None:
+        handler.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        handler.wfile.flush()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1/spots"
+
+
+class TestStreamingFetch:
+    @pytest.fixture
+    def chunked_server(self, multiple_spot_data):
+        server = ChunkedSpotServer(multiple_spot_data)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.release.set()
+        server.shutdown()
+        server.server_close()
+
+    @pytest.mark.asyncio
+    async def test_first_spot_dispatched_before_download_finishes(self, chunked_server):
+        """Test that streaming mode dispatches spots as records arrive."""
+        scraper = ScraperComponent(spot_url=chunked_server.url, stream=True)
+        spots = SpotStore(ttl=timedelta(days=36500))
+        dispatched = []
+        result = []
+
+        async def dispatch(spot):
+            dispatched.append(spot)
+
+        async def scrape():
+            result.append(await scraper.scrape(spots, dispatch))
+
+        try:
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(scrape)
+                with anyio.fail_after(5):
+                    while not dispatched:
+                        await anyio.sleep(0.01)
+
+                assert [spot.callsign for spot in dispatched] == ["W1ABC"]
+                assert not result
+                chunked_server.release.set()
+        finally:
+            await scraper.client.aclose()
+
+        diff = result[0]
+        assert [spot.callsign for spot in dispatched] == ["W1ABC", "W3DEF", "VE3JKL"]
+        assert diff.added == dispatched
+        assert len(spots) == 3
+
+    @pytest.mark.asyncio
+    async def test_streaming_not_modified(self):
+        """Test that a 304 in streaming mode skips the scrape."""
+        scraper = ScraperComponent(stream=True)
+        scraper.etag = '"v1"'
+        scraper.client = TestScraperComponent.mock_client(
+            lambda request: httpx.Response(304)
+        )
+
+        async def dispatch(spot):
+            pytest.fail("No spots should be dispatched")
+
+        assert await scraper.scrape(SpotStore(), dispatch) is None
+        assert scraper.parses_skipped == 1
+
+    @pytest.mark.asyncio
+    async def test_streaming_matches_buffered(self, multiple_spot_data):
+        """Test that both fetch modes produce the same diff."""
+        diffs = []
+        for stream in (False, True):
+            scraper = ScraperComponent(stream=stream)
+            scraper.client = TestScraperComponent.mock_client(
+                lambda request: httpx.Response(200, json=multiple_spot_data)
+            )
+
+            async def dispatch(spot):
+                pass
+
+            diffs.append(await scraper.scrape(SpotStore(), dispatch))
+
+        assert [s.key for s in diffs[0].added] == [s.key for s in diffs[1].added]
+        assert diffs[0].seen == diffs[1].seen
@@ -0,0 +1,138 @@
+import gzip
+import json
+import os
+from datetime import datetime
+from unittest.mock import patch
+
+import anyio
+import pytest
+from asphalt.core import Context
+
+from src.SnapshotComponent import SnapshotComponent
+from src.Spot import Spot
+from src.SpotDiff import SpotDiff
+from src.SpotStore import SpotStore
+from src.State import State
+from src.Subscription import Subscription
+from src.Subscriptions import Subscriptions
+
+NOW = datetime(2024, 1, 15, 14, 45)
+
+
+class TestSnapshotComponent:
+    @pytest.fixture
+    def path(self, tmp_path):
+        return str(tmp_path / "snapshot.json.gz")
+
+    async def run(self, path, spots=None, state=None, subscriptions=None, **kwargs):
+        """Start and stop a snapshot component, returning what it restored into."""
+        spots = spots if spots is not None else SpotStore()
+        state = state or State()
+        subscriptions = subscriptions or Subscriptions()
+        component = SnapshotComponent(path, **kwargs)
+        async with Context() as ctx:
+            ctx.add_resource(spots, name="spots", types=SpotStore)
+            ctx.add_resource(state)
+            ctx.add_resource(subscriptions)
+            await component.start(ctx)
+            await component.stop()
+        return component, spots, state, subscriptions
+
+    @pytest.mark.asyncio
+    async def test_round_trip(self, path, multiple_spot_data):
+        """Test that published spots, state and subscriptions survive a restart."""
+        spots = SpotStore()
+        for record in multiple_spot_data:
+            spot = Spot(record)
+            spots[spot.key] = spot
+        published = list(spots.values())[:2]
+        for spot in published:
+            spot.published = spot.timestamp
+        state = State()
+        state.enabled = False
+        subscriptions = Subscriptions()
+        subscriptions.add(Subscription(1, band="20m", mode="CW"))
+        subscriptions.add(Subscription(2, grid="FN42", radius=300))
+
+        await self.run(path, spots, state, subscriptions)
+        _, spots, state, subscriptions = await self.run(path)
+
+        assert list(spots) == [spot.key for spot in published]
+        assert all(spot.published for spot in spots.values())
+        assert not state.enabled
+        assert [str(s) for s in subscriptions] == ["band 20m mode CW", "grid FN42 300"]
+
+    @pytest.mark.asyncio
+    async def test_restored_spots_are_not_new(self, path, multiple_spot_data):
+        """Test that the first scrape after a restart skips published spots."""
+        spots = SpotStore()
+        SpotDiff.compute(spots, multiple_spot_data[:2], now=NOW)
+        for spot in spots.values():
+            spot.published = spot.timestamp
+        await self.run(path, spots)
+
+        _, spots, _, _ = await self.run(path)
+        diff = SpotDiff.compute(spots, multiple_spot_data, now=NOW)
+
+        assert [spot.callsign for spot in diff.added] == ["VE3JKL"]
+
+    @pytest.mark.asyncio
+    async def test_restored_spots_past_ttl_are_not_new(self, path, multiple_spot_data):
+        """Test that restored spots that have since expired are not announced."""
+        spots = SpotStore()
+        SpotDiff.compute(spots, multiple_spot_data, now=NOW)
+        for spot in spots.values():
+            spot.published = spot.timestamp
+        await self.run(path, spots)
+
+        _, spots, _, _ = await self.run(path)
+        later = datetime(2024, 1, 15, 15, 38)
+        spots.expire(later)
+        diff = SpotDiff.compute(spots, multiple_spot_data, now=later)
+
+        assert diff.added == []
+        assert diff.stale == 2
+
+    @pytest.mark.asyncio
+    async def test_unreadable_snapshot_starts_cold(self, path):
+        """Test that a missing or corrupt snapshot is ignored."""
+        _, spots, state, _ = await self.run(path + ".missing")
+        assert len(spots) == 0
+
+        with open(path, "wb") as file:
+            file.write(b"not a snapshot")
+        _, spots, state, _ = await self.run(path)
+        assert len(spots) == 0 and state.enabled
+
+    @pytest.mark.asyncio
+    async def test_failed_write_keeps_previous_snapshot(self, path, tmp_path):
+        """Test that a snapshot is replaced atomically or not at all."""
+        state = State()
+        state.enabled = False
+        await self.run(path, state=state)
+        with gzip.open(path) as file:
+            previous = json.load(file)
+
+        with patch("src.SnapshotComponent.os.fsync", side_effect=OSError("full")):
+            component, _, _, _ = await self.run(path)
+
+        assert component.save_errors.value == 1
+        with gzip.open(path) as file:
+            assert json.load(file) == previous
+        assert os.listdir(tmp_path) == ["snapshot.json.gz"]
+
+    @pytest.mark.asyncio
+    async def test_periodic_save(self, path):
+        """Test that the snapshot is written every interval while running."""
+        component = SnapshotComponent(path, interval=0.01)
+        async with Context() as ctx:
+            ctx.add_resource(SpotStore(), name="spots", types=SpotStore)
+            ctx.add_resource(State())
+            ctx.add_resource(Subscriptions())
+            await component.start(ctx)
+            with anyio.fail_after(1):
+                while not os.path.exists(path):
+                    await anyio.sleep(0.01)
+            await component.stop()
+
+        assert component.save_seconds.count >= 1
@@ -1,3 +1,4 @@
+import json
 from datetime import datetime
 
 import pytest
@@ -103,3 +104,48 @@ class TestSpot:
         assert spot.timestamp.hour == 23
         assert spot.timestamp.minute == 45
         assert spot.timestamp.second == 59
+
+    def test_spot_has_no_instance_dict(self, sample_spot_data):
+        """Test that spots use slots rather than a per-instance dict."""
+        spot = Spot(sample_spot_data)
+        assert not hasattr(spot, "__dict__")
+        with pytest.raises(AttributeError):
+            spot.extra = True
+
+    def test_spot_strings_are_interned(self, sample_spot_data):
+        """Test that repeated callsign, mode and reference strings are shared."""
+        first = Spot(json.loads(json.dumps(sample_spot_data)))
+        second = Spot(json.loads(json.dumps(sample_spot_data)))
+        assert first.name is not second.name
+        assert first.callsign is second.callsign
+        assert first.mode is second.mode
+        assert first.reference is second.reference
+
+    def test_spot_key_is_computed_once(self, sample_spot_data):
+        """Test that the key is stored rather than rebuilt on each access."""
+        spot = Spot(sample_spot_data)
+        assert spot.key is spot.key
+
+    @pytest.mark.parametrize(
+        "frequency,band",
+        [("14074", "20m"), ("14.230", "20m"), ("7030", "40m"), ("146.52", "2m")],
+    )
+    def test_spot_band(self, sample_spot_data, frequency, band):
+        """Test that the band is derived from kHz or MHz frequencies."""
+        spot = Spot(dict(sample_spot_data, frequency=frequency))
+        assert spot.band == band
+
+    def test_spot_band_out_of_band(self, sample_spot_data):
+        """Test that frequencies outside the amateur bands have no band."""
+        spot = Spot(dict(sample_spot_data, frequency="27185"))
+        assert spot.band is None
+
+    def test_spot_record_round_trip(self, sample_spot_data):
+        """Test that a spot rebuilt from its record is the same spot."""
+        spot = Spot(sample_spot_data)
+        copy = Spot(spot.record())
+
+        assert copy.key == spot.key
+        assert copy.timestamp == spot.timestamp
+        assert str(copy) == str(spot)
+        assert not copy.published
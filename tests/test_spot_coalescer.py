@@ -0,0 +1,52 @@
+import pytest
+
+from src.Spot import Spot
+from src.SpotCoalescer import SpotCoalescer
+
+
+class TestSpotCoalescer:
+    @pytest.fixture
+    def spots(self, multiple_spot_data):
+        return [Spot(data) for data in multiple_spot_data]
+
+    def test_compact_format(self, spots):
+        """Test the single-line spot format used in combined messages."""
+        assert spots[0].compact() == "W1ABC 14.23 CW K-0001"
+
+    def test_single_spot_uses_full_format(self, spots):
+        """Test that a lone spot keeps the readable multi-line format."""
+        text, rest = SpotCoalescer().pack(spots[:1])
+        assert text == str(spots[0])
+        assert rest == []
+
+    def test_packs_spots_into_one_message(self, spots):
+        """Test that several spots are combined one per line."""
+        text, rest = SpotCoalescer().pack(spots)
+        assert text == "\n".join(spot.compact() for spot in spots)
+        assert rest == []
+
+    def test_respects_byte_limit(self, spots):
+        """Test that spots beyond the payload limit are returned."""
+        limit = len(spots[0].compact()) + 1 + len(spots[1].compact())
+        text, rest = SpotCoalescer(max_bytes=limit).pack(spots)
+
+        assert len(text.encode()) == limit
+        assert rest == spots[2:]
+
+    def test_respects_spot_limit(self, spots):
+        """Test that max_spots caps the number of spots per message."""
+        text, rest = SpotCoalescer(max_spots=2).pack(spots)
+        assert len(text.splitlines()) == 2
+        assert rest == spots[2:]
+
+    def test_has_room(self, spots):
+        """Test when a batch can still take more spots."""
+        coalescer = SpotCoalescer(max_bytes=50, max_spots=3)
+        assert coalescer.has_room(spots[:1])
+        assert not coalescer.has_room(spots[:3])
+        assert not SpotCoalescer(max_bytes=10).has_room(spots[:1])
+
+    def test_size_counts_utf8_bytes(self, multiple_spot_data):
+        """Test that multi-byte characters are counted by encoded length."""
+        spot = Spot(dict(multiple_spot_data[0], reference="CA-é"))
+        assert SpotCoalescer().size([spot]) == len(spot.compact().encode())
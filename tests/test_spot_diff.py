@@ -0,0 +1,113 @@
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from src.Spot import Spot
+from src.SpotDiff import SpotDiff
+from src.SpotStore import SpotStore
+
+# Shortly after the fixture spots, so none of them are past the TTL
+NOW = datetime(2024, 1, 15, 14, 45)
+
+
+class TestSpotDiff:
+    @pytest.fixture
+    def records(self, multiple_spot_data):
+        return multiple_spot_data
+
+    def test_record_key_matches_spot_key(self, records):
+        """Test that keys built from raw records match Spot.key."""
+        for record in records:
+            assert Spot.record_key(record) == Spot(record).key
+
+    def test_all_new_with_empty_store(self, records):
+        """Test that every record is added when the store is empty."""
+        spots = SpotStore()
+        diff = SpotDiff.compute(spots, records, now=NOW)
+
+        assert [spot.callsign for spot in diff.added] == ["W1ABC", "W3DEF", "VE3JKL"]
+        assert diff.updated == []
+        assert diff.expired == set()
+        assert "W1ABC-14.23-CW" in spots
+        assert "W3DEF-7.074-FT8" in spots
+
+    def test_only_unknown_records_are_added(self, records):
+        """Test that records already in the store are not reported as new."""
+        first = Spot(records[0])
+        spots = SpotStore()
+        spots[first.key] = first
+
+        diff = SpotDiff.compute(spots, records, now=NOW)
+
+        assert [spot.callsign for spot in diff.added] == ["W3DEF", "VE3JKL"]
+        assert spots[first.key] is first
+        assert len(spots) == 3
+
+    def test_unchanged_scrape_builds_no_spots(self, records):
+        """Test that a repeat scrape only extracts keys."""
+        spots = SpotStore()
+        SpotDiff.compute(spots, records, now=NOW)
+
+        with patch("src.SpotDiff.Spot", wraps=Spot) as spot_class:
+            spot_class.record_key = Spot.record_key
+            diff = SpotDiff.compute(spots, records, now=NOW)
+            spot_class.assert_not_called()
+
+        assert diff.added == []
+        assert diff.updated == []
+
+    def test_changed_spot_id_is_updated(self, records):
+        """Test that a re-spot with a new ID replaces the stored spot."""
+        spots = SpotStore()
+        SpotDiff.compute(spots, records, now=NOW)
+
+        respot = dict(records[1], spotId=99999, spotTime="2024-01-15T14:44:00")
+        diff = SpotDiff.compute(spots, [records[0], respot, records[2]], now=NOW)
+
+        assert diff.added == []
+        assert [spot.id for spot in diff.updated] == [99999]
+        assert spots["W3DEF-7.074-FT8"].id == 99999
+
+    def test_expired_keys_are_reported(self, records):
+        """Test that keys missing from this scrape are reported as expired."""
+        spots = SpotStore()
+        first = SpotDiff.compute(spots, records, now=NOW)
+        second = SpotDiff.compute(spots, records[:2], first.seen, now=NOW)
+
+        assert second.expired == {"VE3JKL-21.205-SSB"}
+        # Spots stay in the store until the TTL removes them
+        assert "VE3JKL-21.205-SSB" in spots
+
+    def test_duplicate_records_counted_once(self, records):
+        """Test that a key repeated within one scrape is only added once."""
+        spots = SpotStore()
+        diff = SpotDiff.compute(spots, [records[0], records[0]], now=NOW)
+
+        assert len(diff.added) == 1
+        assert diff.seen == {"W1ABC-14.23-CW"}
+
+    def test_feed_returns_new_spots(self, records):
+        """Test incremental feeding returns each new spot as it is seen."""
+        spots = SpotStore()
+        diff = SpotDiff(spots, now=NOW)
+
+        assert diff.feed(records[0]).callsign == "W1ABC"
+        assert diff.feed(records[0]) is None
+        assert diff.finish() is diff
+
+    def test_spot_past_ttl_is_not_announced_again(self, records):
+        """Test that a spot older than the TTL stays quiet on every poll."""
+        spots = SpotStore()
+        diff = SpotDiff.compute(spots, records, now=NOW)
+        assert len(diff.added) == 3
+
+        later = datetime(2024, 1, 15, 15, 38)
+        for _ in range(2):
+            spots.expire(later)
+            diff = SpotDiff.compute(spots, records, diff.seen, now=later)
+
+            # W1ABC and W3DEF are past the hour, VE3JKL is not
+            assert diff.added == []
+            assert diff.stale == 2
+            assert list(spots) == ["VE3JKL-21.205-SSB"]
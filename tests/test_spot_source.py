@@ -0,0 +1,165 @@
+from datetime import timedelta
+from unittest.mock import AsyncMock, Mock, patch
+
+import anyio
+import httpx
+import pytest
+
+from src.NewSpotEventSource import NewSpotEventSource
+from src.ScraperComponent import ScraperComponent
+from src.SOTASource import SOTASource
+from src.Spot import Spot
+from src.SpotDiff import SpotDiff
+from src.SpotStore import SpotStore
+from src.WWFFSource import WWFFSource
+
+
+@pytest.fixture
+def sota_record():
+    return {
+        "id": 901,
+        "timeStamp": "2024-01-15T14:30:00",
+        "callsign": "W2XYZ",
+        "associationCode": "W1",
+        "summitCode": "NH-001",
+        "activatorCallsign": "w1abc",
+        "frequency": "14.230",
+        "mode": "cw",
+        "summitDetails": "Mount Washington, 1917m, 10 pts",
+    }
+
+
+@pytest.fixture
+def wwff_record():
+    return {
+        "id": 77,
+        "activator": "W3DEF",
+        "frequency_khz": 7074.0,
+        "mode": "FT8",
+        "reference": "KFF-0234",
+        "reference_name": "Valley Forge",
+        "spotter": "W3GHI",
+        "spot_time": 1705329300,
+    }
+
+
+class TestSpotSource:
+    def test_sota_record(self, sota_record, sample_spot_data):
+        """Test that SOTA spots are translated and share POTA keys."""
+        spot = Spot(SOTASource.normalise(sota_record))
+        pota = Spot(dict(sample_spot_data, frequency="14230"))
+
+        assert spot.key == pota.key
+        assert spot.reference == "W1/NH-001"
+        assert spot.band == "20m"
+        assert spot.id == "sota:901"
+
+    def test_sota_sub_khz_frequency(self, sota_record, sample_spot_data):
+        """Test that a sub-kHz SOTA frequency keys the same as the POTA spot."""
+        sota = dict(sota_record, frequency="7.0321", mode="ssb")
+        pota = dict(sample_spot_data, frequency="7032.1", mode="SSB")
+        spot = Spot(SOTASource.normalise(sota))
+
+        assert spot.key == Spot(pota).key == "W1ABC-7032.1-SSB"
+        assert spot.frequency == 7032.1
+
+        spots = SpotStore(ttl=timedelta(days=36500))
+        SpotDiff.compute(spots, [pota])
+        assert SpotDiff.compute(spots, [SOTASource.normalise(sota)]).added == []
+
+    def test_wwff_record(self, wwff_record):
+        """Test that WWFF spots are translated, with Unix times made naive UTC."""
+        spot = Spot(WWFFSource.normalise(wwff_record))
+
+        assert spot.key == "W3DEF-7074.0-FT8"
+        assert spot.reference == "KFF-0234"
+        assert spot.timestamp.isoformat() == "2024-01-15T14:35:00"
+
+    async def test_unusable_records_are_skipped(self, sota_record):
+        """Test that records a source cannot translate are dropped."""
+        source = SOTASource()
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(
+                    200, json=[sota_record, {"id": 1}, dict(sota_record, mode=None)]
+                )
+            )
+        )
+
+        records = await source.get_spot_reports(client)
+
+        assert [record["spotId"] for record in records] == ["sota:901"]
+
+
+class TestSources:
+    async def test_slow_source_does_not_delay_others(
+        self, sample_spot_data, sota_record, wwff_record
+    ):
+        """Test that sources run independently and share one dedupe store."""
+        requested = []
+
+        async def handler(request):
+            requested.append(request.url.host)
+            if request.url.host == "api2.sota.org.uk":
+                await anyio.sleep_forever()
+            if request.url.host == "spots.wwff.co":
+                # The same activation as the POTA spot, plus one of its own
+                duplicate = dict(
+                    wwff_record,
+                    activator="W1ABC",
+                    frequency_khz=14230,
+                    mode="CW",
+                    id=78,
+                )
+                return httpx.Response(200, json=[duplicate, wwff_record])
+            return httpx.Response(200, json=[dict(sample_spot_data, frequency="14230")])
+
+        scraper = ScraperComponent(
+            sources=[{"type": "sota", "timeout": 0.2}, {"type": "wwff"}]
+        )
+        scraper.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        scraper.running = True
+        dispatched = []
+        events = Mock()
+        events.signal.dispatch = AsyncMock(side_effect=dispatched.append)
+        resources = {
+            NewSpotEventSource: events,
+            SpotStore: SpotStore(ttl=timedelta(days=36500)),
+        }
+
+        def poll_once():
+            polled = False
+
+            async def wait():
+                nonlocal polled
+                if polled:
+                    await anyio.sleep_forever()
+                polled = True
+
+            return wait
+
+        with patch("src.ScraperComponent.current_context") as mock_context:
+            mock_context.return_value.request_resource = AsyncMock(
+                side_effect=lambda resource_type, name=None: resources[resource_type]
+            )
+            for source in scraper.sources:
+                source.scheduler.wait = poll_once()
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(scraper.task)
+                with anyio.fail_after(0.1):
+                    while len(dispatched) < 2:
+                        await anyio.sleep(0.01)
+                assert scraper.scrape_errors.value == 0
+
+                with anyio.fail_after(1):
+                    while not scraper.scrape_errors.value:
+                        await anyio.sleep(0.01)
+                tg.cancel_scope.cancel()
+
+        assert sorted(spot.callsign for spot in dispatched) == ["W1ABC", "W3DEF"]
+        assert sorted(requested) == [
+            "api.pota.app",
+            "api2.sota.org.uk",
+            "spots.wwff.co",
+        ]
+        assert len(resources[SpotStore]) == 2
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.Spot import Spot
+from src.SpotStore import SpotStore
+
+
+def make_spot(callsign: str, minute: int = 0) -> Spot:
+    return Spot(
+        {
+            "activator": callsign,
+            "frequency": "14.230",
+            "grid4": "FN42",
+            "mode": "CW",
+            "name": "Test Park",
+            "reference": "K-0001",
+            "spotId": 12345,
+            "spotter": "W2XYZ",
+            "spotTime": f"2024-01-15T14:{minute:02d}:00",
+        }
+    )
+
+
+class TestSpotStore:
+    @pytest.fixture
+    def store(self):
+        return SpotStore(max_size=3, ttl=timedelta(minutes=30))
+
+    def test_mapping_interface(self, store):
+        """Test that the store behaves like a dict of spots."""
+        spot = make_spot("W1ABC")
+        store[spot.key] = spot
+
+        assert store == {spot.key: spot}
+        assert spot.key in store
+        assert store[spot.key] is spot
+        assert store.get("missing") is None
+        assert list(store) == [spot.key]
+        assert len(store) == 1
+
+        del store[spot.key]
+        assert len(store) == 0
+
+    def test_empty_store_equals_empty_dict(self, store):
+        """Test that an empty store compares equal to an empty dict."""
+        assert store == {}
+
+    def test_evicts_least_recently_seen(self, store):
+        """Test that the oldest untouched spot is evicted past max_size."""
+        spots = [make_spot(call) for call in ("W1A", "W1B", "W1C", "W1D")]
+        for spot in spots[:3]:
+            store[spot.key] = spot
+        store[spots[0].key] = spots[0]
+        store[spots[3].key] = spots[3]
+
+        assert spots[1].key not in store
+        assert set(store) == {spots[0].key, spots[2].key, spots[3].key}
+        assert store.evicted == 1
+
+    def test_touch_refreshes_recency(self, store):
+        """Test that touching a spot protects it from eviction."""
+        spots = [make_spot(call) for call in ("W1A", "W1B", "W1C", "W1D")]
+        for spot in spots[:3]:
+            store[spot.key] = spot
+        store.touch(spots[0].key)
+        store[spots[3].key] = spots[3]
+
+        assert spots[0].key in store
+        assert spots[1].key not in store
+
+    def test_expire_by_spot_timestamp(self, store):
+        """Test that spots older than the TTL are removed."""
+        old = make_spot("W1OLD", minute=0)
+        new = make_spot("W1NEW", minute=40)
+        store[old.key] = old
+        store[new.key] = new
+
+        removed = store.expire(datetime(2024, 1, 15, 15, 5))
+
+        assert removed == 1
+        assert old.key not in store
+        assert new.key in store
+        assert store.expired == 1
+
+    def test_expire_accepts_aware_now(self, store):
+        """Test that an aware current time is compared as UTC."""
+        spot = make_spot("W1ABC", minute=0)
+        store[spot.key] = spot
+
+        now = datetime(2024, 1, 15, 14, 20, tzinfo=timezone.utc)
+        assert store.expire(now) == 0
+        assert store.expire(now + timedelta(minutes=20)) == 1
+
+    def test_updated_spot_is_not_expired_early(self, store):
+        """Test that a re-spotted activator uses its newest timestamp."""
+        store["W1ABC"] = make_spot("W1ABC", minute=0)
+        store["W1ABC"] = make_spot("W1ABC", minute=50)
+
+        assert store.expire(datetime(2024, 1, 15, 15, 5)) == 0
+        assert "W1ABC" in store
+
+    def test_returning_activator_is_new_again(self, store):
+        """Test that an expired key can be added again."""
+        spot = make_spot("W1ABC", minute=0)
+        store[spot.key] = spot
+        store.expire(datetime(2024, 1, 15, 18, 0))
+
+        assert spot.key not in store
+
+    def test_expiry_heap_stays_bounded(self):
+        """Test that repeated updates do not grow the expiry heap forever."""
+        store = SpotStore(max_size=10, ttl=timedelta(hours=1))
+        for minute in range(60):
+            for call in ("W1A", "W1B", "W1C"):
+                store[call] = make_spot(call, minute=minute)
+
+        assert len(store) == 3
+        assert len(store.expiry) <= 2 * len(store) + 64 + 1
@@ -0,0 +1,77 @@
+import pytest
+
+from src.Spot import Spot
+from src.Subscription import Subscription
+
+
+class TestSubscription:
+    @pytest.fixture
+    def spot(self, sample_spot_data):
+        return Spot(sample_spot_data)
+
+    def test_parse(self):
+        """Test building a subscription from command arguments."""
+        subscription = Subscription.parse(
+            1, ["band", "20M", "mode", "cw", "ref", "k-", "grid", "fn42", "300"]
+        )
+
+        assert subscription.user_id == 1
+        assert subscription.band == "20m"
+        assert subscription.mode == "CW"
+        assert subscription.prefix == "K-"
+        assert subscription.grid == "FN42"
+        assert subscription.radius == 300
+        assert str(subscription) == "ref K- band 20m mode CW grid FN42 300"
+
+    @pytest.mark.parametrize(
+        "args",
+        [
+            [],
+            ["band"],
+            ["band", "11m"],
+            ["colour", "red"],
+            ["grid", "ZZ99"],
+            ["grid", "FN4"],
+        ],
+    )
+    def test_parse_rejects_bad_arguments(self, args):
+        """Test that malformed filters are refused."""
+        with pytest.raises(ValueError):
+            Subscription.parse(1, args)
+
+    @pytest.mark.parametrize(
+        "criteria, expected",
+        [
+            ({"band": "20m"}, True),
+            ({"band": "40m"}, False),
+            ({"mode": "cw"}, True),
+            ({"mode": "SSB"}, False),
+            ({"prefix": "K-"}, True),
+            ({"prefix": "VE-"}, False),
+            ({"callsign": "w1abc"}, True),
+            ({"callsign": "W1ABC", "mode": "FT8"}, False),
+            ({"grid": "FN31", "radius": 300}, True),
+            ({"grid": "EM12", "radius": 300}, False),
+        ],
+    )
+    def test_matches(self, spot, criteria, expected):
+        """Test that every criterion set must match the spot."""
+        assert Subscription(1, **criteria).matches(spot) is expected
+
+    def test_grid_filter_skips_spots_without_grid(self, sample_spot_data):
+        """Test that a spot with no usable grid never matches a grid filter."""
+        spot = Spot(dict(sample_spot_data, grid4=""))
+
+        assert not Subscription(1, grid="FN42").matches(spot)
+
+    def test_distance(self):
+        """Test grid centres and the great-circle distance between them."""
+        assert Subscription.grid_location("FN42") == (42.5, -71.0)
+        assert Subscription.grid_location("fn42aa") == pytest.approx(
+            (42.0208, -71.9583), abs=1e-3
+        )
+        # FN42 (Boston) to IO91 (London) is about 5200 km
+        distance = Subscription.distance(
+            Subscription.grid_location("FN42"), Subscription.grid_location("IO91")
+        )
+        assert distance == pytest.approx(5200, rel=0.02)
@@ -0,0 +1,106 @@
+import pytest
+
+from src.Spot import Spot
+from src.Subscription import Subscription
+from src.Subscriptions import Subscriptions
+
+
+class TestSubscriptions:
+    @pytest.fixture
+    def spots(self, multiple_spot_data):
+        return [Spot(record) for record in multiple_spot_data]
+
+    @pytest.fixture
+    def subscriptions(self):
+        subscriptions = Subscriptions()
+        subscriptions.add(Subscription(1, callsign="W1ABC"))
+        subscriptions.add(Subscription(2, prefix="K-02"))
+        subscriptions.add(Subscription(2, prefix="VE-"))
+        subscriptions.add(Subscription(3, band="40m", mode="FT8"))
+        subscriptions.add(Subscription(4, mode="SSB"))
+        subscriptions.add(Subscription(5, grid="FN42", radius=200))
+        return subscriptions
+
+    def test_index_placement(self, subscriptions):
+        """Test that each subscription is filed under its most selective criterion."""
+        assert list(subscriptions.by_callsign) == ["W1ABC"]
+        assert list(subscriptions.by_prefix) == ["K-02", "VE-"]
+        assert list(subscriptions.by_band_mode) == [("40m", "FT8")]
+        assert not subscriptions.by_band
+        assert list(subscriptions.by_mode) == ["SSB"]
+        assert list(subscriptions.by_field) == ["FN"]
+        assert not subscriptions.unindexed
+        assert subscriptions.prefix_lengths == {3, 4}
+        assert len(subscriptions) == 6
+
+    def test_match(self, subscriptions, spots):
+        """Test that matching finds the users whose filters accept each spot."""
+        assert [subscriptions.match(spot) for spot in spots] == [
+            {1, 5},
+            {2, 3},
+            {2, 4},
+        ]
+
+    def test_match_agrees_with_linear_scan(self, subscriptions, spots):
+        """Test that the indexes never miss a subscription that matches."""
+        for spot in spots:
+            assert subscriptions.match(spot) == {
+                s.user_id for s in subscriptions if s.matches(spot)
+            }
+
+    def test_remove(self, subscriptions, spots):
+        """Test that removing a user clears them from every index."""
+        assert subscriptions.remove(2) == 2
+        assert subscriptions.remove(2) == 0
+
+        assert subscriptions.get(2) == []
+        assert not subscriptions.by_prefix
+        assert not subscriptions.prefix_lengths
+        assert subscriptions.match(spots[1]) == {3}
+
+    @pytest.mark.parametrize(
+        "grid, radius, fields",
+        [
+            ("FN42", 200, {"FN"}),
+            # Reaches across the field boundary to the west and south
+            ("FN00", 300, {"EN", "EM", "FN", "FM"}),
+            # Wraps around the antimeridian
+            ("AO10", 300, {"AO", "RO"}),
+            # Takes in the pole, so every longitude
+            ("JR09", 1500, {f"{chr(ord('A') + c)}R" for c in range(18)} | {"JQ"}),
+        ],
+    )
+    def test_grid_fields(self, grid, radius, fields):
+        """Test that a grid filter is filed under every field its circle reaches."""
+        subscription = Subscription(1, grid=grid, radius=radius)
+
+        assert set(Subscriptions.grid_fields(subscription)) >= fields
+
+    def test_grid_matches_across_field_boundary(self):
+        """Test that a spot just over a field boundary still reaches the filter."""
+        subscriptions = Subscriptions()
+        subscriptions.add(Subscription(1, grid="FN00", radius=300))
+        spot = Spot(
+            {
+                "activator": "W1ABC",
+                "frequency": "14230",
+                "grid4": "EN90",
+                "mode": "CW",
+                "name": "",
+                "reference": "K-0001",
+                "spotId": 1,
+                "spotter": "W2XYZ",
+                "spotTime": "2024-01-15T14:30:00",
+            }
+        )
+
+        assert subscriptions.match(spot) == {1}
+
+    def test_per_user_limit(self):
+        """Test that one user cannot register unlimited subscriptions."""
+        subscriptions = Subscriptions(max_per_user=1)
+        subscriptions.add(Subscription(1, band="20m"))
+
+        with pytest.raises(ValueError):
+            subscriptions.add(Subscription(1, band="40m"))
+        subscriptions.add(Subscription(2, band="40m"))
@@ -0,0 +1,41 @@
+import pytest
+
+from src.TokenBucket import TokenBucket
+
+
+class TestTokenBucket:
+    @pytest.fixture
+    def bucket(self, fake_clock):
+        return TokenBucket(
+            rate=0.5, capacity=3, clock=fake_clock, sleep=fake_clock.sleep
+        )
+
+    def test_starts_full(self, bucket):
+        """Test that a full burst is available immediately."""
+        assert all(bucket.try_acquire() for _ in range(3))
+        assert not bucket.try_acquire()
+
+    def test_refills_at_rate(self, bucket, fake_clock):
+        """Test that tokens come back at the configured rate."""
+        for _ in range(3):
+            bucket.try_acquire()
+        fake_clock.now += 1
+        assert not bucket.try_acquire()
+        fake_clock.now += 1
+        assert bucket.try_acquire()
+
+    def test_never_exceeds_capacity(self, bucket, fake_clock):
+        """Test that an idle bucket does not bank more than its capacity."""
+        fake_clock.now += 3600
+        assert bucket.delay(3) == 0
+        assert bucket.delay(4) == 2
+
+    @pytest.mark.asyncio
+    async def test_acquire_waits_for_tokens(self, bucket, fake_clock):
+        """Test that acquire sleeps just long enough for each token."""
+        start = fake_clock.now
+        for _ in range(6):
+            await bucket.acquire()
+
+        assert fake_clock.now - start == 6
+        assert fake_clock.sleeps == [2, 2, 2]